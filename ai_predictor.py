@@ -2,36 +2,297 @@
 ai_predictor.py
 Implementación de algoritmos de predicción financiera avanzados.
 """
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple, Callable, Hashable, Union
+from collections import OrderedDict
+import os
+import copy
+import json
+import time
+import shutil
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
 import numpy as np
 from datetime import datetime, timedelta
 import pandas as pd
-from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
+import joblib
 import logging
 
 from logger import NeoproyecttoLogger
-from error_handling import InvestmentError
+from compiled_forest import CompiledForest, CHUNK_ROWS
+from feature_encoder import FEATURE_NAMES, FeatureEncoder, default_encoder
+from monte_carlo import MonteCarloSimulator
+from hyperparameter_search import (
+    DEFAULT_HYPERPARAMETERS, HyperparameterSearch, make_forest, make_linear_model
+)
+from sharded_predictor import ShardedPredictor
+from asset_universe import AssetUniverse
+from technical_indicators import INDICATOR_NAMES, MIN_HISTORY, indicator_encoder, latest_indicators
+from price_store import PriceStore
+from error_handling import InvestmentError, ConfigurationError
 
 # Inicializar logger
 logger = NeoproyecttoLogger("neoproyectto.ai_predictor")
 
+# Versión del formato de los artefactos de modelos en disco
+MODEL_FORMAT_VERSION = 2
+
+# Columna objetivo de cada marco temporal en los datos históricos
+TIMEFRAME_TARGETS = {
+    '1m': 'rendimiento',
+    '3m': 'rendimiento_3m',
+    '6m': 'rendimiento_6m',
+    '1y': 'rendimiento_1y'
+}
+
+# Simulación básica (sin modelos entrenados): factores por sector y tipo,
+# multiplicador por riesgo y desviación típica del componente aleatorio
+BASIC_SECTOR_FACTORS = {
+    "tecnología": 0.8,
+    "finanzas": 0.6,
+    "salud": 0.7,
+    "energía": 0.5,
+    "industrial": 0.6
+}
+BASIC_TIPO_FACTORS = {
+    "acción": 0.7,
+    "bono": 0.3,
+    "fondo": 0.5,
+    "etf": 0.6,
+    "cripto": 1.2
+}
+BASIC_RIESGO_MULTIPLIERS = {
+    "bajo": 0.7,
+    "alto": 1.4
+}
+BASIC_RETURN_STD = 0.2
+
+# Lotes más grandes que esto se predicen con los estimadores de sklearn aunque
+# el modo compilado esté activo: el bosque compilado gana en latencia por fila
+# (una o pocas filas), pero sklearn recorre los árboles en C y escala mejor
+# con el número de filas (el cruce está entre 100 y 1000 filas)
+COMPILED_MAX_BATCH = int(os.environ.get("NEOPROYECTTO_COMPILED_MAX_BATCH", "256"))
+
+_basic_encoder = FeatureEncoder(
+    categorical={
+        "sector": (BASIC_SECTOR_FACTORS, 0.4),
+        "tipo": (BASIC_TIPO_FACTORS, 0.4),
+        "riesgo": (BASIC_RIESGO_MULTIPLIERS, 1.0)
+    },
+    numeric={}
+)
+
+def feature_schema_hash(feature_names: List[str]) -> str:
+    """
+    Calcula un hash estable del esquema de características.
+    """
+    return hashlib.sha256(json.dumps(list(feature_names)).encode("utf-8")).hexdigest()
+
+# Esquemas de características admitidos (hash -> codificador de activos):
+# atributos estáticos, o atributos estáticos más indicadores técnicos
+FEATURE_ENCODERS: Dict[str, FeatureEncoder] = {
+    feature_schema_hash(FEATURE_NAMES): default_encoder,
+    feature_schema_hash(indicator_encoder.feature_names): indicator_encoder
+}
+
+def _linear_stats(X: np.ndarray, y: np.ndarray) -> Dict[str, Any]:
+    """
+    Estadísticos suficientes (centrados) de una regresión lineal por mínimos cuadrados.
+    """
+    mean_x = X.mean(axis=0)
+    mean_y = float(y.mean())
+    Xc = X - mean_x
+    return {
+        "n": len(X),
+        "mean_x": mean_x,
+        "mean_y": mean_y,
+        "sxx": Xc.T @ Xc,
+        "sxy": Xc.T @ (y - mean_y),
+    }
+
+def _merge_linear_stats(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Combina dos conjuntos de estadísticos suficientes (fórmula de Chan et al.).
+    """
+    n = a["n"] + b["n"]
+    delta_x = b["mean_x"] - a["mean_x"]
+    delta_y = b["mean_y"] - a["mean_y"]
+    weight = a["n"] * b["n"] / n
+    return {
+        "n": n,
+        "mean_x": a["mean_x"] + delta_x * b["n"] / n,
+        "mean_y": a["mean_y"] + delta_y * b["n"] / n,
+        "sxx": a["sxx"] + b["sxx"] + np.outer(delta_x, delta_x) * weight,
+        "sxy": a["sxy"] + b["sxy"] + delta_x * delta_y * weight,
+    }
+
+def _replace_artifact(tmp_path: str, path: str) -> None:
+    """
+    Sustituye el artefacto de `path` por el directorio `tmp_path` (los
+    ficheros del anterior siguen vivos mientras estén mapeados).
+    """
+    if os.path.exists(path):
+        old_path = f"{path}.old-{os.getpid()}"
+        shutil.rmtree(old_path, ignore_errors=True)
+        os.replace(path, old_path)
+        os.replace(tmp_path, path)
+        shutil.rmtree(old_path, ignore_errors=True)
+    else:
+        os.replace(tmp_path, path)
+
+class PredictionCache:
+    """
+    Caché acotada de predicciones con expiración (TTL) y desalojo LRU.
+    
+    Las claves son (bytes del vector de características, marco temporal,
+    versión del modelo), por lo que un activo con los mismos datos de mercado
+    no se vuelve a predecir mientras el modelo no cambie.
+    """
+    
+    def __init__(self, maxsize: int = 10000, ttl: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Inicializa la caché.
+        
+        Args:
+            maxsize: Número máximo de entradas.
+            ttl: Segundos de validez de cada entrada.
+            clock: Reloj monótono (inyectable para pruebas).
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: 'OrderedDict[Hashable, Tuple[float, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get_many(self, keys: List[Hashable]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Busca varias claves con una sola adquisición del lock.
+        
+        Returns:
+            Tuple: (valores, máscara de aciertos). Los fallos valen NaN.
+        """
+        values = np.full(len(keys), np.nan)
+        found = np.zeros(len(keys), dtype=bool)
+        now = self._clock()
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                value, expires_at = entry
+                if expires_at <= now:
+                    del self._entries[key]
+                    continue
+                self._entries.move_to_end(key)
+                values[i] = value
+                found[i] = True
+            hits = int(found.sum())
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return values, found
+    
+    def set_many(self, keys: List[Hashable], values: np.ndarray) -> None:
+        """
+        Guarda varias predicciones, desalojando las menos usadas si hace falta.
+        """
+        expires_at = self._clock() + self.ttl
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._entries[key] = (float(value), expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self) -> None:
+        """Invalida todas las entradas."""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de la caché."""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
+
 class FinancialPredictor:
     """
     Clase para realizar predicciones financieras basadas en modelos de ML.
     """
     
-    def __init__(self, historical_data: Optional[pd.DataFrame] = None):
+    def __init__(
+        self,
+        historical_data: Optional[pd.DataFrame] = None,
+        compiled: bool = False,
+        n_jobs: Optional[int] = None,
+        seed: Optional[int] = None,
+        hyperparameters: Optional[Dict[str, Any]] = None,
+        search: Union[bool, HyperparameterSearch, None] = None,
+        compact: bool = False,
+        compiled_max_batch: int = COMPILED_MAX_BATCH
+    ):
         """
         Inicializa el predictor financiero.
         
         Args:
-            historical_data: Datos históricos para entrenar los modelos.
+            historical_data: Datos históricos para entrenar los modelos. Si incluye
+                             columnas 'rendimiento_3m', 'rendimiento_6m' o
+                             'rendimiento_1y' se entrena un modelo propio por marco temporal.
+            compiled: Si se usa el modo de inferencia compilado (bosque en
+                      arrays planos y escalado/regresión lineal en NumPy) para
+                      los lotes de hasta `compiled_max_batch` filas.
+            n_jobs: Núcleos para el entrenamiento (por defecto, todos).
+            seed: Semilla del generador aleatorio de la simulación básica.
+            hyperparameters: Configuración de los modelos (ver DEFAULT_HYPERPARAMETERS).
+            search: Buscar los hiperparámetros antes de entrenar (True o una
+                    HyperparameterSearch configurada). Las filas de
+                    `historical_data` deben estar en orden cronológico.
+            compact: Modo de precisión compacta (implica el modo compilado):
+                     características y arrays del bosque en float32. Las
+                     decisiones de los árboles no cambian; la diferencia con
+                     float64 (redondeo de hojas y precios) es inferior a 1e-6
+                     puntos de retorno con los datos de benchmark_predictor.py.
+            compiled_max_batch: Filas a partir de las cuales se predice con
+                                sklearn en lugar del bosque compilado (salvo
+                                en el modo compacto o si se cargó sin el
+                                modelo de sklearn: ver `load`).
         """
         self.historical_data = historical_data
         self.models = {}
         self.scaler = StandardScaler()
+        self.feature_names = list(FEATURE_NAMES)
+        self.encoder = default_encoder
+        self.model_version: Optional[str] = None
+        self.compact = compact
+        self.compiled = compiled or compact
+        self.compiled_forest: Optional[CompiledForest] = None
+        self.compiled_max_batch = compiled_max_batch
+        # Escalador con el que se entrenaron los árboles (se congela al actualizar)
+        self.forest_scaler = self.scaler
+        self.linear_stats: Optional[Dict[str, Any]] = None
+        self.training_duration: Optional[float] = None
+        self.n_jobs = n_jobs
+        self.hyperparameters = {**DEFAULT_HYPERPARAMETERS, **(hyperparameters or {})}
+        self.search = HyperparameterSearch(n_jobs=n_jobs) if search is True else (search or None)
+        self.search_result: Optional[Dict[str, Any]] = None
+        # Artefacto del que se cargó el predictor (si se cargó con `load`)
+        self.artifact_path: Optional[str] = None
+        # Predictores dedicados por marco temporal ('3m', '6m', '1y')
+        self.timeframe_predictors: Dict[str, 'FinancialPredictor'] = {}
+        self.rng = np.random.default_rng(seed)
         
         # Verificar si tenemos datos históricos para entrenar
         if historical_data is not None and not historical_data.empty:
@@ -42,40 +303,462 @@ class FinancialPredictor:
         Entrena modelos de predicción con datos históricos.
         """
         logger.info("Entrenando modelos de predicción financiera")
+        start_time = time.perf_counter()
         
         try:
             # Preparar datos
-            X = self.historical_data.drop(['rendimiento'], axis=1)
+            targets = [col for col in TIMEFRAME_TARGETS.values() if col in self.historical_data.columns]
+            X = self.historical_data.drop(targets, axis=1)
             y = self.historical_data['rendimiento']
             
+            # Búsqueda de hiperparámetros (los marcos temporales usan la misma configuración)
+            if self.search is not None:
+                self.search_result = self.search.run(X, y)
+                self.hyperparameters = dict(self.search_result["params"])
+            
+            # Marcos temporales con objetivo propio: se entrenan en otros procesos
+            horizons = [tf for tf, col in TIMEFRAME_TARGETS.items()
+                        if tf != '1m' and col in self.historical_data.columns]
+            n_jobs = self.n_jobs or os.cpu_count() or 1
+            jobs_per_model = max(1, n_jobs // (len(horizons) + 1))
+            pending = self._submit_timeframe_training(X, horizons, n_jobs, jobs_per_model)
+            
             # Escalar características
             X_scaled = self.scaler.fit_transform(X)
             
             # Entrenar modelos
             # 1. Regresión lineal
-            lr_model = LinearRegression()
+            lr_model = make_linear_model(self.hyperparameters)
             lr_model.fit(X_scaled, y)
             self.models['linear'] = lr_model
             
-            # 2. Random Forest
-            rf_model = RandomForestRegressor(n_estimators=100, random_state=42)
+            # 2. Random Forest (n_jobs solo durante el entrenamiento)
+            rf_model = make_forest(self.hyperparameters, n_jobs=jobs_per_model)
             rf_model.fit(X_scaled, y)
+            rf_model.set_params(n_jobs=None)
             self.models['random_forest'] = rf_model
             
-            logger.info("Modelos entrenados correctamente")
+            self.timeframe_predictors = {tf: result() for tf, result in pending.items()}
+            
+            self.forest_scaler = self.scaler
+            self.linear_stats = _linear_stats(X.to_numpy(dtype=float), y.to_numpy(dtype=float))
+            self.feature_names = [str(c) for c in X.columns]
+            self.encoder = FEATURE_ENCODERS.get(feature_schema_hash(self.feature_names), default_encoder)
+            self.model_version = datetime.now().strftime("%Y%m%d%H%M%S%f")
+            
+            if self.compiled:
+                self.compile_models()
+            
+            self.training_duration = time.perf_counter() - start_time
+            logger.info("Modelos entrenados correctamente",
+                      {"model_version": self.model_version, "duration_s": round(self.training_duration, 3)})
             
         except Exception as e:
             logger.error("Error entrenando modelos de predicción", exception=e)
             raise InvestmentError("No se pudieron entrenar los modelos de predicción", 
                                 {"error": str(e)})
     
-    def predict_return(self, asset: Dict[str, Any], timeframe: str = '1m') -> float:
+    def _submit_timeframe_training(
+        self,
+        X: pd.DataFrame,
+        horizons: List[str],
+        n_jobs: int,
+        jobs_per_model: int
+    ) -> Dict[str, Callable[[], 'FinancialPredictor']]:
+        """
+        Lanza el entrenamiento de los predictores por marco temporal.
+        
+        Con más de un núcleo se usa un pool de procesos (contexto 'spawn', seguro
+        también desde hilos en segundo plano) que trabaja en paralelo con el
+        entrenamiento de los modelos a 1 mes.
+        
+        Returns:
+            Dict: Marco temporal -> función que devuelve el predictor entrenado.
+        """
+        datasets = {}
+        for tf in horizons:
+            target = TIMEFRAME_TARGETS[tf]
+            data = X.assign(rendimiento=self.historical_data[target])
+            datasets[tf] = data.dropna(subset=['rendimiento'])
+        
+        if not horizons or n_jobs <= 1:
+            return {
+                tf: (lambda data=data: _train_timeframe_predictor(
+                    data, self.compiled, jobs_per_model, self.hyperparameters, self.compact))
+                for tf, data in datasets.items()
+            }
+        
+        executor = ProcessPoolExecutor(
+            max_workers=min(len(horizons), n_jobs),
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        futures = {
+            tf: executor.submit(_train_timeframe_predictor, data, self.compiled, jobs_per_model,
+                                self.hyperparameters, self.compact)
+            for tf, data in datasets.items()
+        }
+        executor.shutdown(wait=False)
+        return {tf: future.result for tf, future in futures.items()}
+    
+    def update(self, new_rows: pd.DataFrame, trees_per_update: int = 10, max_trees: int = 300) -> None:
+        """
+        Incorpora nuevas observaciones sin reentrenar con todo el histórico.
+        
+        El coste es proporcional al número de filas nuevas:
+        - El escalador se actualiza con `partial_fit` (media y varianza acumuladas).
+        - La regresión lineal se recalcula de forma exacta a partir de
+          estadísticos suficientes acumulados (equivale a reentrenarla con todo).
+        - El Random Forest añade `trees_per_update` árboles entrenados solo con
+          las filas nuevas y descarta los más antiguos por encima de `max_trees`.
+          Los árboles usan un escalador congelado para seguir siendo válidos.
+        
+        El predictor se modifica en sitio: para un predictor publicado en el
+        registro, actualizar una copia y publicarla con `ModelRegistry.swap`.
+        
+        Args:
+            new_rows: Observaciones nuevas con las columnas de entrenamiento y 'rendimiento'.
+            trees_per_update: Árboles nuevos por actualización.
+            max_trees: Número máximo de árboles del bosque.
+        """
+        if new_rows is None or new_rows.empty:
+            return
+        if not self.models or self.linear_stats is None:
+            raise InvestmentError("El predictor no tiene modelos entrenados que actualizar",
+                                {"rows": len(new_rows)})
+        if 'random_forest' not in self.models:
+            raise InvestmentError("El predictor se cargó sin el Random Forest de sklearn",
+                                {"rows": len(new_rows)})
+        
+        try:
+            X = new_rows[self.feature_names].to_numpy(dtype=float)
+            y = new_rows['rendimiento'].to_numpy(dtype=float)
+            
+            # 1. Escalador acumulado (los árboles conservan el anterior)
+            if self.forest_scaler is self.scaler:
+                self.forest_scaler = copy.deepcopy(self.scaler)
+            self.scaler.partial_fit(X)
+            
+            # 2. Regresión lineal exacta desde los estadísticos acumulados
+            #    (con Ridge, la penalización sobre características escaladas)
+            self.linear_stats = _merge_linear_stats(self.linear_stats, _linear_stats(X, y))
+            penalty = self.hyperparameters.get("linear_alpha", 0.0) * np.diag(self.scaler.scale_ ** 2)
+            weights = np.linalg.lstsq(self.linear_stats["sxx"] + penalty, self.linear_stats["sxy"], rcond=None)[0]
+            linear = self.models['linear']
+            linear.coef_ = weights * self.scaler.scale_
+            linear.intercept_ = self.linear_stats["mean_y"] - (self.linear_stats["mean_x"] - self.scaler.mean_) @ weights
+            
+            # 3. Árboles nuevos solo con las filas nuevas
+            rf_model = self.models['random_forest']
+            rf_model.set_params(warm_start=True, n_estimators=len(rf_model.estimators_) + trees_per_update)
+            rf_model.fit(self.forest_scaler.transform(X), y)
+            if len(rf_model.estimators_) > max_trees:
+                rf_model.estimators_ = rf_model.estimators_[-max_trees:]
+                rf_model.set_params(n_estimators=max_trees)
+            
+            # 4. Predictores por marco temporal con objetivo en las filas nuevas
+            for tf, predictor in self.timeframe_predictors.items():
+                target = TIMEFRAME_TARGETS[tf]
+                if target in new_rows.columns:
+                    rows = new_rows[self.feature_names].assign(rendimiento=new_rows[target])
+                    predictor.update(rows.dropna(subset=['rendimiento']), trees_per_update, max_trees)
+            
+            self.model_version = datetime.now().strftime("%Y%m%d%H%M%S%f")
+            if self.compiled:
+                self.compile_models()
+            
+            logger.info("Modelos actualizados de forma incremental",
+                      {"rows": len(new_rows), "trees": len(rf_model.estimators_),
+                       "model_version": self.model_version})
+            
+        except Exception as e:
+            logger.error("Error actualizando modelos de predicción", exception=e)
+            raise InvestmentError("No se pudieron actualizar los modelos de predicción",
+                                {"error": str(e)})
+    
+    def save(self, path: str) -> Dict[str, Any]:
+        """
+        Guarda los modelos entrenados y el escalador como artefacto versionado.
+        
+        El artefacto es un directorio con un fichero joblib sin comprimir por
+        componente (para poder cargarlo con memoria mapeada) y un `metadata.json`.
+        Se escribe en un directorio temporal que después se renombra al destino:
+        los ficheros que otros procesos tengan mapeados nunca se truncan.
+        Un predictor cargado sin el Random Forest de sklearn (modo compilado)
+        copia el artefacto del que se cargó.
+        
+        Args:
+            path: Directorio de destino.
+            
+        Returns:
+            Dict[str, Any]: Metadatos del artefacto.
+        """
+        if not self.models:
+            raise InvestmentError("No hay modelos entrenados que guardar", {"path": path})
+        
+        path = os.path.normpath(path)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if 'random_forest' not in self.models and self.compiled_forest is not None:
+            metadata = self._copy_artifact(tmp_path)
+            _replace_artifact(tmp_path, path)
+            return metadata
+        os.makedirs(tmp_path)
+        
+        components = {'scaler': self.scaler, **self.models}
+        if self.forest_scaler is not self.scaler:
+            components['forest_scaler'] = self.forest_scaler
+        if self.linear_stats is not None:
+            components['linear_stats'] = self.linear_stats
+        for name, component in components.items():
+            joblib.dump(component, os.path.join(tmp_path, f"{name}.joblib"))
+        
+        # Copias del bosque en arrays planos (float64 y float32): se cargan con
+        # memoria mapeada en los modos compilado y compacto
+        compiled_forest = None
+        if 'random_forest' in self.models:
+            compiled_forest = CompiledForest.from_sklearn(self.models['random_forest'])
+            compiled_forest.save(os.path.join(tmp_path, "random_forest.compiled"))
+            compiled_forest.astype(np.float32).save(os.path.join(tmp_path, "random_forest.compact"))
+        
+        for tf, predictor in self.timeframe_predictors.items():
+            predictor.save(os.path.join(tmp_path, "timeframes", tf))
+        
+        metadata = {
+            "format_version": MODEL_FORMAT_VERSION,
+            "model_version": self.model_version,
+            "feature_names": self.feature_names,
+            "feature_schema_hash": feature_schema_hash(self.feature_names),
+            "components": sorted(components),
+            "compiled_forest": compiled_forest is not None,
+            "timeframes": sorted(self.timeframe_predictors),
+            "training_duration_s": self.training_duration,
+            "hyperparameters": self.hyperparameters,
+            "hyperparameter_search": self.search_result,
+            "created_at": datetime.now().isoformat()
+        }
+        with open(os.path.join(tmp_path, "metadata.json"), "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2)
+        
+        _replace_artifact(tmp_path, path)
+        
+        logger.info("Artefacto de modelos guardado", {"path": path, "model_version": self.model_version})
+        return metadata
+    
+    def _copy_artifact(self, path: str) -> Dict[str, Any]:
+        """
+        Copia el artefacto del que se cargó el predictor en `path`.
+        
+        Raises:
+            InvestmentError: Si el artefacto ya no existe o se ha sustituido
+                             por otra versión del modelo.
+        """
+        metadata = None
+        if self.artifact_path is not None:
+            shutil.copytree(self.artifact_path, path)
+            with open(os.path.join(path, "metadata.json"), encoding="utf-8") as f:
+                metadata = json.load(f)
+        if metadata is None or metadata.get("model_version") != self.model_version:
+            shutil.rmtree(path, ignore_errors=True)
+            raise InvestmentError(
+                "El predictor se cargó sin el Random Forest de sklearn y su artefacto ya no está disponible",
+                {"path": self.artifact_path, "model_version": self.model_version}
+            )
+        return metadata
+    
+    @classmethod
+    def load(cls, path: str, mmap: bool = True, compiled: bool = False,
+             compact: bool = False) -> 'FinancialPredictor':
+        """
+        Carga un artefacto guardado con `save`.
+        
+        Args:
+            path: Directorio del artefacto.
+            mmap: Si se mapean en memoria (solo lectura) los arrays de los modelos,
+                  para que varios procesos compartan las mismas páginas.
+            compiled: Si se usa el modo compilado. En ese caso el bosque se lee
+                      de sus arrays planos (.npy mapeados en memoria, que
+                      comparten todos los procesos) y no se carga el modelo de
+                      sklearn: al deserializarlo copiaría sus nodos.
+            compact: Si se usa el modo de precisión compacta: como el modo
+                     compilado, con la copia float32 del bosque.
+            
+        Returns:
+            FinancialPredictor: Predictor con los modelos cargados.
+            
+        Raises:
+            ConfigurationError: Si el artefacto no existe o no es compatible.
+        """
+        metadata_path = os.path.join(path, "metadata.json")
+        if not os.path.exists(metadata_path):
+            raise ConfigurationError("Artefacto de modelos no encontrado", {"path": path})
+        
+        with open(metadata_path, encoding="utf-8") as f:
+            metadata = json.load(f)
+        
+        if metadata.get("format_version") != MODEL_FORMAT_VERSION:
+            raise ConfigurationError(
+                "Versión de artefacto de modelos no soportada",
+                {"path": path, "format_version": metadata.get("format_version"),
+                 "expected": MODEL_FORMAT_VERSION}
+            )
+        if metadata.get("feature_schema_hash") not in FEATURE_ENCODERS:
+            raise ConfigurationError(
+                "El esquema de características del artefacto no coincide",
+                {"path": path, "feature_names": metadata.get("feature_names"),
+                 "expected": [encoder.feature_names for encoder in FEATURE_ENCODERS.values()]}
+            )
+        
+        mmap_mode = 'r' if mmap else None
+        compiled = compiled or compact
+        use_compiled = compiled and metadata.get("compiled_forest", False)
+        predictor = cls(compiled=compiled, compact=compact)
+        for name in metadata["components"]:
+            # El bosque de sklearn copia sus nodos al deserializarse: en el modo
+            # compilado solo se usan los arrays mapeados del bosque compilado
+            if name == 'random_forest' and use_compiled:
+                continue
+            component = joblib.load(os.path.join(path, f"{name}.joblib"), mmap_mode=mmap_mode)
+            if name == 'scaler':
+                predictor.scaler = component
+            elif name == 'forest_scaler':
+                predictor.forest_scaler = component
+            elif name == 'linear_stats':
+                predictor.linear_stats = component
+            else:
+                predictor.models[name] = component
+        if 'forest_scaler' not in metadata["components"]:
+            predictor.forest_scaler = predictor.scaler
+        predictor.feature_names = list(metadata["feature_names"])
+        predictor.encoder = FEATURE_ENCODERS[metadata["feature_schema_hash"]]
+        predictor.model_version = metadata["model_version"]
+        predictor.training_duration = metadata.get("training_duration_s")
+        predictor.hyperparameters = {**DEFAULT_HYPERPARAMETERS, **metadata.get("hyperparameters", {})}
+        predictor.search_result = metadata.get("hyperparameter_search")
+        predictor.artifact_path = os.path.normpath(path)
+        if use_compiled:
+            forest_dir = "random_forest.compact" if compact else "random_forest.compiled"
+            predictor.compiled_forest = CompiledForest.load(os.path.join(path, forest_dir), mmap=mmap)
+        elif compiled:
+            predictor.compile_models()
+        for tf in metadata.get("timeframes", []):
+            predictor.timeframe_predictors[tf] = cls.load(
+                os.path.join(path, "timeframes", tf), mmap=mmap, compiled=compiled, compact=compact
+            )
+        
+        logger.info("Artefacto de modelos cargado",
+                  {"path": path, "model_version": predictor.model_version, "mmap": mmap})
+        return predictor
+    
+    def compile_models(self) -> None:
+        """
+        Exporta el Random Forest entrenado a arrays planos y activa el modo compilado.
+        """
+        self.compiled_forest = CompiledForest.from_sklearn(self.models['random_forest'])
+        if self.compact:
+            self.compiled_forest = self.compiled_forest.astype(np.float32)
+        self.compiled = True
+    
+    @property
+    def feature_dtype(self) -> type:
+        """Tipo de las matrices de características (float32 en el modo compacto)."""
+        return np.float32 if self.compact else np.float64
+    
+    def _predict_matrix(self, features: np.ndarray) -> np.ndarray:
+        """
+        Aplica el escalado y el promedio ponderado de ambos modelos a una
+        matriz de características sin escalar.
+        """
+        lr_pred, rf_pred = self._predict_components(features)
+        
+        # Promedio ponderado (dando más peso al Random Forest)
+        return 0.3 * lr_pred + 0.7 * rf_pred
+    
+    def _use_compiled(self, n_rows: int) -> bool:
+        """
+        Si un lote de `n_rows` filas se predice con el bosque compilado.
+        """
+        if self.compiled_forest is None:
+            return False
+        return self.compact or n_rows <= self.compiled_max_batch or 'random_forest' not in self.models
+    
+    def _predict_components(self, features: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Predicciones por separado de la regresión lineal y del Random Forest.
+        """
+        if self._use_compiled(len(features)):
+            # Modo compilado: sin la validación ni el despacho de sklearn.
+            # El escalado se calcula en float64 también para características
+            # float32 (el bosque recibe los mismos valores que en el modo
+            # float64), por bloques de CHUNK_ROWS filas
+            linear = self.models['linear']
+            lr_pred = np.empty(len(features))
+            rf_pred = np.empty(len(features))
+            for start in range(0, len(features), CHUNK_ROWS):
+                block = features[start:start + CHUNK_ROWS]
+                rows = slice(start, start + len(block))
+                block_scaled = (block - self.scaler.mean_) / self.scaler.scale_
+                lr_pred[rows] = block_scaled @ linear.coef_ + linear.intercept_
+                if self.forest_scaler is not self.scaler:
+                    block_scaled = (block - self.forest_scaler.mean_) / self.forest_scaler.scale_
+                rf_pred[rows] = self.compiled_forest.predict(block_scaled)
+        else:
+            # Escalado en float64 también para las características float32 del modo compacto
+            features = np.asarray(features, dtype=np.float64)
+            features_scaled = self.scaler.transform(features)
+            lr_pred = self.models['linear'].predict(features_scaled)
+            if self.forest_scaler is not self.scaler:
+                features_scaled = self.forest_scaler.transform(features)
+            rf_pred = self.models['random_forest'].predict(features_scaled)
+        return lr_pred, rf_pred
+    
+    def _predict_timeframe(self, features: np.ndarray, timeframe: str) -> np.ndarray:
+        """
+        Predice con el modelo del marco temporal indicado. Sin modelo propio,
+        escala la predicción a 1 mes con el factor del marco temporal.
+        """
+        predictor = self.timeframe_predictors.get(timeframe)
+        if predictor is not None:
+            return predictor._predict_matrix(features)
+        return self._predict_matrix(features) * self._get_timeframe_factor(timeframe)
+    
+    def _predict_features(
+        self,
+        features: np.ndarray,
+        timeframe: str,
+        cache: Optional[PredictionCache] = None
+    ) -> np.ndarray:
+        """
+        Predice para una matriz de características, consultando antes la caché.
+        Solo se predicen (y se guardan) las filas que no estén en caché.
+        """
+        if cache is None or self.model_version is None:
+            return self._predict_timeframe(features, timeframe)
+        
+        keys = [(row.tobytes(), timeframe, self.model_version) for row in features]
+        predictions, found = cache.get_many(keys)
+        missing = np.flatnonzero(~found)
+        if len(missing):
+            computed = self._predict_timeframe(features[missing], timeframe)
+            predictions[missing] = computed
+            cache.set_many([keys[i] for i in missing], computed)
+        return predictions
+    
+    def predict_return(
+        self,
+        asset: Dict[str, Any],
+        timeframe: str = '1m',
+        cache: Optional[PredictionCache] = None,
+        price_history: Optional[np.ndarray] = None
+    ) -> float:
         """
         Predice el retorno esperado para un activo.
         
         Args:
             asset: Datos del activo.
             timeframe: Marco temporal para la predicción ('1m', '3m', '6m', '1y').
+            cache: Caché de predicciones opcional.
+            price_history: Precios (1, n_días) del activo, para los modelos
+                           entrenados con indicadores técnicos.
             
         Returns:
             float: Retorno esperado en porcentaje.
@@ -87,21 +770,13 @@ class FinancialPredictor:
             
         try:
             # Preparar datos del activo para predicción
-            asset_features = self._extract_features(asset)
-            
-            # Escalar características
-            asset_scaled = self.scaler.transform([asset_features])
+            if price_history is None:
+                asset_features = np.array([self._extract_features(asset)], dtype=self.feature_dtype)
+            else:
+                asset_features = self._encode([asset], price_history)
             
-            # Realizar predicción con ambos modelos
-            lr_pred = self.models['linear'].predict(asset_scaled)[0]
-            rf_pred = self.models['random_forest'].predict(asset_scaled)[0]
-            
-            # Promedio ponderado (dando más peso al Random Forest)
-            prediction = 0.3 * lr_pred + 0.7 * rf_pred
-            
-            # Ajustar predicción según timeframe
-            timeframe_factor = self._get_timeframe_factor(timeframe)
-            adjusted_prediction = prediction * timeframe_factor
+            # Realizar predicción con ambos modelos del marco temporal
+            adjusted_prediction = float(self._predict_features(asset_features, timeframe, cache)[0])
             
             logger.info(f"Predicción para activo {asset.get('nombre', 'desconocido')}: {adjusted_prediction}%",
                       {"asset": asset.get('nombre'), "prediction": adjusted_prediction})
@@ -114,49 +789,72 @@ class FinancialPredictor:
             # Fallback a simulación básica
             return self._simulate_basic_return(asset, timeframe)
     
-    def _extract_features(self, asset: Dict[str, Any]) -> List[float]:
-        """
-        Extrae características numéricas de un activo para predicción.
+    def predict_returns_batch(
+        self,
+        assets: List[Dict[str, Any]],
+        timeframe: str = '1m',
+        cache: Optional[PredictionCache] = None,
+        price_history: Optional[np.ndarray] = None
+    ) -> np.ndarray:
         """
-        # Mapeo de sectores a valores numéricos
-        sector_mapping = {
-            "tecnología": 1.0,
-            "finanzas": 2.0,
-            "salud": 3.0,
-            "consumo": 4.0,
-            "energía": 5.0,
-            "industrial": 6.0,
-            "otros": 7.0
-        }
-        
-        # Mapeo de tipos a valores numéricos
-        tipo_mapping = {
-            "acción": 1.0,
-            "bono": 2.0,
-            "fondo": 3.0,
-            "etf": 4.0,
-            "cripto": 5.0,
-            "otros": 6.0
-        }
+        Predice el retorno esperado para una lista completa de activos.
         
-        # Mapeo de riesgo a valores numéricos
-        riesgo_mapping = {
-            "bajo": 1.0,
-            "moderado": 2.0,
-            "alto": 3.0
-        }
+        Construye una única matriz de características y ejecuta cada modelo
+        una sola vez sobre todo el universo, en lugar de una llamada por activo.
         
-        # Extraer características
-        sector = sector_mapping.get(asset.get('sector', '').lower(), 7.0)
-        tipo = tipo_mapping.get(asset.get('tipo', '').lower(), 6.0)
-        riesgo = riesgo_mapping.get(asset.get('riesgo', '').lower(), 2.0)
+        Args:
+            assets: Lista de activos.
+            timeframe: Marco temporal para la predicción ('1m', '3m', '6m', '1y').
+            cache: Caché de predicciones opcional.
+            price_history: Matriz de precios (n_activos, n_días) en el orden de
+                           `assets`, para los modelos entrenados con indicadores técnicos.
+            
+        Returns:
+            np.ndarray: Retornos esperados en porcentaje, en el orden de `assets`.
+        """
+        if len(assets) == 0:
+            return np.empty(0, dtype=float)
         
-        # Obtener otras características numéricas
-        price = asset.get('precio', 50.0)  # Precio por defecto si no está disponible
-        volatility = asset.get('volatilidad', 0.1)  # Volatilidad por defecto
+        # Si no tenemos modelos entrenados, usar simulación básica
+        if not self.models:
+            logger.warning("Usando simulación básica por falta de modelos entrenados",
+                         {"assets": len(assets)})
+            return self._simulate_basic_returns(assets, timeframe)
         
-        # Vector de características
-        features = [sector, tipo, riesgo, price, volatility]
+        try:
+            # Matriz de características (una fila por activo)
+            features = self._encode(assets, price_history)
+            
+            # Una sola pasada por modelo
+            predictions = self._predict_features(features, timeframe, cache)
+            
+            logger.info(f"Predicción por lotes para {len(assets)} activos",
+                      {"assets": len(assets), "timeframe": timeframe})
+            
+            return predictions
+            
+        except Exception as e:
+            logger.error(f"Error prediciendo retornos por lotes ({len(assets)} activos)", exception=e)
+            # Fallback a simulación básica
+            return self._simulate_basic_returns(assets, timeframe)
+    
+    def _extract_features(self, asset: Dict[str, Any]) -> List[float]:
+        """
+        Extrae características numéricas de un activo para predicción.
+        """
+        return self.encoder.encode_one(asset)
+    
+    def _encode(self, assets: List[Dict[str, Any]], price_history: Optional[np.ndarray] = None,
+                out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Matriz de características de los activos (en `out` si se indica). Si
+        el modelo usa indicadores técnicos y se da el historial de precios, se
+        calculan a partir de él.
+        """
+        features = self.encoder.transform(assets, out=out, dtype=self.feature_dtype)
+        if price_history is not None and self.encoder is indicator_encoder:
+            columns = [self.encoder.feature_names.index(name) for name in INDICATOR_NAMES]
+            features[:, columns] = latest_indicators(price_history)
         return features
     
     def _get_timeframe_factor(self, timeframe: str) -> float:
@@ -171,83 +869,540 @@ class FinancialPredictor:
         }
         return mapping.get(timeframe, 1.0)
     
+    def _basic_return_means(self, assets: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Retorno base (sin componente aleatorio) de la simulación básica por activo.
+        """
+        factors = _basic_encoder.transform(assets)
+        return (factors[:, 0] + factors[:, 1]) * factors[:, 2]
+    
     def _simulate_basic_return(self, asset: Dict[str, Any], timeframe: str) -> float:
         """
         Simula un retorno básico basado en características del activo.
         Usado como fallback cuando no hay modelos entrenados.
         """
-        # Obtener factores base según tipo y sector
-        base_factor = 0.0
-        
-        # Factor por sector
-        sector = asset.get('sector', '').lower()
-        if sector == 'tecnología':
-            base_factor += 0.8
-        elif sector == 'finanzas':
-            base_factor += 0.6
-        elif sector == 'salud':
-            base_factor += 0.7
-        elif sector == 'energía':
-            base_factor += 0.5
-        elif sector == 'industrial':
-            base_factor += 0.6
-        else:
-            base_factor += 0.4
-        
-        # Factor por tipo
-        tipo = asset.get('tipo', '').lower()
-        if tipo == 'acción':
-            base_factor += 0.7
-        elif tipo == 'bono':
-            base_factor += 0.3
-        elif tipo == 'fondo':
-            base_factor += 0.5
-        elif tipo == 'etf':
-            base_factor += 0.6
-        elif tipo == 'cripto':
-            base_factor += 1.2
+        sector, tipo, riesgo = _basic_encoder.encode_one(asset)
+        random_component = self.rng.normal(0, BASIC_RETURN_STD)
+        return float(((sector + tipo) * riesgo + random_component) * self._get_timeframe_factor(timeframe))
+    
+    def _simulate_basic_returns(self, assets: List[Dict[str, Any]], timeframe: str) -> np.ndarray:
+        """
+        Versión vectorizada de `_simulate_basic_return` para una lista de activos.
+        """
+        random_component = self.rng.normal(0, BASIC_RETURN_STD, len(assets))
+        return (self._basic_return_means(assets) + random_component) * self._get_timeframe_factor(timeframe)
+    
+    def _forest_tree_predictions(self, features: np.ndarray) -> np.ndarray:
+        """
+        Predicciones de cada árbol del bosque, (n_árboles, n_filas).
+        """
+        if self._use_compiled(len(features)):
+            features_scaled = (features - self.forest_scaler.mean_) / self.forest_scaler.scale_
+            return self.compiled_forest.predict_trees(features_scaled)
+        features_scaled = self.forest_scaler.transform(np.asarray(features, dtype=np.float64))
+        return np.stack([tree.predict(features_scaled) for tree in self.models['random_forest'].estimators_])
+    
+    def predict_return_distribution(
+        self,
+        assets: List[Dict[str, Any]],
+        timeframe: str = '1m',
+        price_history: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Media y desviación típica del retorno esperado de cada activo.
+        
+        Con modelos entrenados, la media es la predicción puntual y la
+        dispersión es la de los árboles del bosque (con el peso que tiene el
+        bosque en la mezcla). Sin modelos, es la distribución de la simulación básica.
+        `price_history` es como en `predict_returns_batch`.
+        
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (medias, desviaciones típicas).
+        """
+        factor = self._get_timeframe_factor(timeframe)
+        if self.models:
+            try:
+                features = self._encode(assets, price_history)
+                means = self._predict_timeframe(features, timeframe)
+                predictor = self.timeframe_predictors.get(timeframe)
+                if predictor is None:
+                    predictor = self
+                else:
+                    factor = 1.0
+                stds = 0.7 * predictor._forest_tree_predictions(features).std(axis=0) * factor
+                return means, stds
+            except Exception as e:
+                logger.error(f"Error estimando la distribución de {len(assets)} activos", exception=e)
+        
+        return self._basic_return_means(assets) * factor, np.full(len(assets), BASIC_RETURN_STD * factor)
+
+def _train_timeframe_predictor(data: pd.DataFrame, compiled: bool, n_jobs: int,
+                               hyperparameters: Optional[Dict[str, Any]] = None,
+                               compact: bool = False) -> FinancialPredictor:
+    """
+    Entrena el predictor de un marco temporal (se ejecuta en un proceso del pool).
+    """
+    predictor = FinancialPredictor(data, compiled=compiled, n_jobs=n_jobs,
+                                   hyperparameters=hyperparameters, compact=compact)
+    # No devolver los datos de entrenamiento al proceso principal
+    predictor.historical_data = None
+    return predictor
+
+def _load_historical_data() -> Optional[pd.DataFrame]:
+    """
+    Carga los datos históricos de entrenamiento desde el CSV indicado en
+    NEOPROYECTTO_HISTORICAL_DATA, si está configurado.
+    """
+    path = os.environ.get("NEOPROYECTTO_HISTORICAL_DATA")
+    if not path:
+        return None
+    
+    logger.info("Cargando datos históricos de entrenamiento", {"path": path})
+    return pd.read_csv(path)
+
+def _open_price_store() -> Optional[PriceStore]:
+    """
+    Abre el almacén de precios indicado en NEOPROYECTTO_PRICE_STORE, si está configurado.
+    """
+    path = os.environ.get("NEOPROYECTTO_PRICE_STORE")
+    if not path:
+        return None
+    
+    logger.info("Abriendo el almacén de precios", {"path": path})
+    return PriceStore(path)
+
+class ModelRegistry:
+    """
+    Registro de modelos compartido por todo el proceso.
+    
+    Entrena (o carga) los modelos una sola vez y expone un único
+    FinancialPredictor de solo lectura. Para actualizar los modelos se
+    construye un predictor nuevo y se sustituye de forma atómica con `swap`;
+    el predictor publicado nunca se modifica en sitio.
+    
+    El reentrenamiento en segundo plano sigue el mismo esquema de doble
+    buffer: el candidato se entrena y valida fuera del camino de las
+    peticiones y solo entonces se publica.
+    """
+    
+    def __init__(
+        self,
+        data_loader: Optional[Callable[[], Optional[pd.DataFrame]]] = None,
+        model_dir: Optional[str] = None,
+        compiled: bool = False,
+        cache: Optional[PredictionCache] = None,
+        search: bool = False,
+        prediction_workers: int = 0,
+        compact: bool = False,
+        price_store: Optional[PriceStore] = None
+    ):
+        """
+        Inicializa el registro.
+        
+        Args:
+            data_loader: Función que devuelve los datos históricos de entrenamiento.
+            model_dir: Directorio del artefacto de modelos (por defecto
+                       NEOPROYECTTO_MODEL_DIR). Si existe se carga en lugar de
+                       entrenar; si no, se guarda tras el entrenamiento.
+            compiled: Si el predictor publicado usa el modo de inferencia compilado.
+            cache: Caché de predicciones compartida; se invalida en cada `swap`.
+            search: Si cada entrenamiento busca antes los hiperparámetros.
+            prediction_workers: Procesos para predecir universos grandes por
+                                fragmentos en memoria compartida (0 o 1: sin pool).
+            compact: Si el predictor publicado usa el modo de precisión compacta (float32).
+            price_store: Historial de precios para los indicadores técnicos de
+                         los modelos que los usan (por defecto, el almacén de
+                         NEOPROYECTTO_PRICE_STORE). Los activos se buscan por 'nombre'.
+        """
+        self._data_loader = data_loader or _load_historical_data
+        self._model_dir = model_dir or os.environ.get("NEOPROYECTTO_MODEL_DIR")
+        self._compiled = compiled
+        self._compact = compact
+        self._search = search
+        self._sharded = ShardedPredictor(prediction_workers) if prediction_workers > 1 else None
+        self.price_store = price_store if price_store is not None else _open_price_store()
+        self.cache = cache or PredictionCache()
+        self._lock = threading.Lock()
+        self._predictor: Optional[FinancialPredictor] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._retrain_future: Optional[Future] = None
+        self._stop_event = threading.Event()
+        self._scheduler: Optional[threading.Thread] = None
+        self.last_retrain: Dict[str, Any] = {}
+    
+    def warm_up(self, historical_data: Optional[pd.DataFrame] = None) -> FinancialPredictor:
+        """
+        Entrena los modelos si todavía no hay un predictor publicado.
+        
+        Args:
+            historical_data: Datos históricos; si no se indican se usa `data_loader`.
+            
+        Returns:
+            FinancialPredictor: Predictor publicado.
+        """
+        with self._lock:
+            if self._predictor is None:
+                self._predictor = self._build_predictor(historical_data)
+            return self._predictor
+    
+    def _build_predictor(self, historical_data: Optional[pd.DataFrame]) -> FinancialPredictor:
+        """
+        Carga el artefacto de modelos o, si no existe, entrena un predictor nuevo.
+        """
+        if historical_data is None and self._model_dir and \
+                os.path.exists(os.path.join(self._model_dir, "metadata.json")):
+            return FinancialPredictor.load(self._model_dir, compiled=self._compiled, compact=self._compact)
+        
+        if historical_data is None:
+            historical_data = self._data_loader()
+        if historical_data is None or historical_data.empty:
+            logger.warning("Sin datos históricos: el predictor usará simulación básica")
+        
+        predictor = FinancialPredictor(historical_data, compiled=self._compiled, search=self._search,
+                                       compact=self._compact)
+        if self._model_dir and predictor.models:
+            predictor.save(self._model_dir)
+        return predictor
+    
+    def get_predictor(self) -> FinancialPredictor:
+        """
+        Devuelve el predictor compartido, entrenándolo en el primer uso.
+        """
+        predictor = self._predictor
+        if predictor is None:
+            predictor = self.warm_up()
+        return predictor
+    
+    def swap(self, predictor: FinancialPredictor) -> Optional[FinancialPredictor]:
+        """
+        Publica un nuevo predictor de forma atómica.
+        
+        Args:
+            predictor: Predictor ya entrenado que sustituye al actual.
+            
+        Returns:
+            FinancialPredictor: Predictor anterior (o None).
+        """
+        with self._lock:
+            previous, self._predictor = self._predictor, predictor
+            self.cache.clear()
+        logger.info("Predictor publicado en el registro de modelos",
+                  {"trained": bool(predictor.models)})
+        return previous
+    
+    def predict_returns(self, assets: List[Dict[str, Any]], timeframe: str = '1m') -> np.ndarray:
+        """
+        Predice el retorno esperado de una lista de activos con el predictor publicado.
+        
+        Los universos de al menos `min_assets` activos se reparten entre los
+        procesos de predicción (si están configurados); el resto usa la caché
+        y la predicción por lotes del proceso actual.
+        """
+        predictor = self.get_predictor()
+        price_history = self.price_history(assets, predictor)
+        if self._sharded is not None and predictor.models and len(assets) >= self._sharded.min_assets:
+            try:
+                return self._sharded.predict(predictor, assets, timeframe, price_history)
+            except Exception as e:
+                logger.error("Error en la predicción por fragmentos; se predice en el proceso actual",
+                           exception=e)
+        return predictor.predict_returns_batch(assets, timeframe, cache=self.cache,
+                                               price_history=price_history)
+    
+    def price_history(
+        self,
+        assets: Union[List[Dict[str, Any]], pd.DataFrame],
+        predictor: Optional[FinancialPredictor] = None
+    ) -> Optional[np.ndarray]:
+        """
+        Últimos precios de cierre de los activos (n_activos, n_días) del
+        almacén de precios, si el predictor usa indicadores técnicos.
+        
+        Returns:
+            np.ndarray: Historial en el orden de `assets`, o None sin almacén
+                        de precios o si el modelo no usa indicadores.
+        """
+        if predictor is None:
+            predictor = self.get_predictor()
+        if self.price_store is None or predictor.encoder is not indicator_encoder:
+            return None
+        if isinstance(assets, pd.DataFrame):
+            names = assets["nombre"] if "nombre" in assets.columns else [None] * len(assets)
         else:
-            base_factor += 0.4
+            names = [asset.get("nombre") for asset in assets]
+        return self.price_store.latest("close", names, MIN_HISTORY + 1)
+    
+    @property
+    def price_history_version(self) -> Optional[int]:
+        """
+        Días del almacén de precios: las puntuaciones que dependen de los
+        indicadores técnicos cambian con cada día nuevo.
+        """
+        return self.price_store.n_days if self.price_store is not None else None
+    
+    @property
+    def is_trained(self) -> bool:
+        """Indica si el predictor publicado tiene modelos entrenados."""
+        predictor = self._predictor
+        return predictor is not None and bool(predictor.models)
+    
+    def retrain_in_background(
+        self,
+        historical_data: Optional[pd.DataFrame] = None,
+        validation_data: Optional[pd.DataFrame] = None
+    ) -> Future:
+        """
+        Lanza un reentrenamiento en segundo plano.
+        
+        Si ya hay uno en curso se devuelve el mismo Future en lugar de lanzar otro.
+        
+        Args:
+            historical_data: Datos de entrenamiento; si no se indican se usa `data_loader`.
+            validation_data: Datos para validar el candidato antes de publicarlo.
+            
+        Returns:
+            Future: Resuelve al predictor publicado (o al actual si se rechaza).
+        """
+        with self._lock:
+            if self._retrain_future is not None and not self._retrain_future.done():
+                return self._retrain_future
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-retrain")
+            self._retrain_future = self._executor.submit(
+                self._retrain, historical_data, validation_data
+            )
+            return self._retrain_future
+    
+    def _retrain(
+        self,
+        historical_data: Optional[pd.DataFrame],
+        validation_data: Optional[pd.DataFrame]
+    ) -> Optional[FinancialPredictor]:
+        """
+        Entrena, valida y publica un predictor candidato.
+        """
+        started_at = datetime.now().isoformat()
+        try:
+            if historical_data is None:
+                historical_data = self._data_loader()
+            if historical_data is None or historical_data.empty:
+                raise InvestmentError("No hay datos históricos para reentrenar")
+            
+            candidate = FinancialPredictor(historical_data, compiled=self._compiled, search=self._search,
+                                         compact=self._compact)
+            self._validate_candidate(candidate, validation_data)
+            
+            if self._model_dir:
+                candidate.save(self._model_dir)
+            self.swap(candidate)
+            
+            self.last_retrain = {
+                "status": "published",
+                "model_version": candidate.model_version,
+                "training_duration_s": candidate.training_duration,
+                "started_at": started_at,
+                "finished_at": datetime.now().isoformat()
+            }
+            return candidate
+            
+        except Exception as e:
+            logger.error("Reentrenamiento en segundo plano descartado", exception=e)
+            self.last_retrain = {
+                "status": "rejected",
+                "error": str(e),
+                "started_at": started_at,
+                "finished_at": datetime.now().isoformat()
+            }
+            return self._predictor
+    
+    def _validate_candidate(
+        self,
+        candidate: FinancialPredictor,
+        validation_data: Optional[pd.DataFrame],
+        tolerance: float = 0.1
+    ) -> None:
+        """
+        Comprueba que el candidato produce predicciones finitas y, si hay datos
+        de validación, que su error no empeora más de `tolerance` respecto al actual.
+        """
+        if not candidate.models:
+            raise InvestmentError("El candidato no tiene modelos entrenados")
+        
+        sample = validation_data if validation_data is not None else candidate.historical_data.head(256)
+        X = sample[candidate.feature_names].to_numpy(dtype=float)
+        candidate_pred = candidate._predict_matrix(X)
+        if not np.all(np.isfinite(candidate_pred)):
+            raise InvestmentError("El candidato produce predicciones no finitas")
         
-        # Factor por riesgo
-        riesgo = asset.get('riesgo', '').lower()
-        if riesgo == 'bajo':
-            base_factor *= 0.7
-        elif riesgo == 'alto':
-            base_factor *= 1.4
+        current = self._predictor
+        if validation_data is None or current is None or not current.models:
+            return
+        
+        y = validation_data['rendimiento'].to_numpy(dtype=float)
+        candidate_mae = float(np.mean(np.abs(candidate_pred - y)))
+        current_mae = float(np.mean(np.abs(current._predict_matrix(X) - y)))
+        if candidate_mae > current_mae * (1 + tolerance):
+            raise InvestmentError(
+                "El candidato empeora el error de validación",
+                {"candidate_mae": candidate_mae, "current_mae": current_mae}
+            )
+    
+    def start_periodic_retraining(self, interval_s: float) -> None:
+        """
+        Reentrena en segundo plano cada `interval_s` segundos hasta `stop`.
+        """
+        if self._scheduler is not None and self._scheduler.is_alive():
+            return
+        self._stop_event.clear()
         
-        # Añadir componente aleatorio
-        random_component = np.random.normal(0, 0.2)
+        def _loop():
+            while not self._stop_event.wait(interval_s):
+                self.retrain_in_background().result()
         
-        # Calcular retorno simulado
-        timeframe_factor = self._get_timeframe_factor(timeframe)
-        return (base_factor + random_component) * timeframe_factor
+        self._scheduler = threading.Thread(target=_loop, name="model-retrain-scheduler", daemon=True)
+        self._scheduler.start()
+        logger.info("Reentrenamiento periódico activado", {"interval_s": interval_s})
+    
+    def stop(self) -> None:
+        """
+        Detiene el reentrenamiento periódico, el ejecutor en segundo plano y
+        los procesos de predicción por fragmentos.
+        """
+        self._stop_event.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._sharded is not None:
+            self._sharded.close()
+    
+    def status(self) -> Dict[str, Any]:
+        """
+        Estado del predictor publicado y del último reentrenamiento.
+        """
+        predictor = self._predictor
+        future = self._retrain_future
+        return {
+            "trained": self.is_trained,
+            "model_version": predictor.model_version if predictor else None,
+            "training_duration_s": predictor.training_duration if predictor else None,
+            "compiled": predictor.compiled_forest is not None if predictor else False,
+            "compact": predictor.compact if predictor else False,
+            "timeframes": sorted(predictor.timeframe_predictors) if predictor else [],
+            "hyperparameters": predictor.hyperparameters if predictor else None,
+            "retraining": future is not None and not future.done(),
+            "last_retrain": self.last_retrain,
+            "cache": self.cache.stats()
+        }
 
-# Función compatible con versiones anteriores
-def calcular_probabilidad_ganancia(activo, perfil_riesgo='moderado', preferencias=None):
+# Registro compartido por el proceso
+model_registry = ModelRegistry(
+    compiled=os.environ.get("NEOPROYECTTO_COMPILED_INFERENCE") == "1",
+    search=os.environ.get("NEOPROYECTTO_HYPERPARAMETER_SEARCH") == "1",
+    prediction_workers=int(os.environ.get("NEOPROYECTTO_PREDICTION_WORKERS", "0")),
+    compact=os.environ.get("NEOPROYECTTO_COMPACT_PRECISION") == "1"
+)
+
+def _probabilidad_desde_retorno(
+    expected_returns: np.ndarray,
+    riesgos: np.ndarray,
+    perfil_riesgo: str = 'moderado'
+) -> np.ndarray:
     """
-    Calcula la probabilidad de ganancia de un activo (función legacy).
+    Convierte retornos esperados en probabilidades de ganancia (0-1),
+    ajustadas según el perfil de riesgo.
     """
-    predictor = FinancialPredictor()
-    expected_return = predictor.predict_return(activo)
+    expected_returns = np.asarray(expected_returns, dtype=float)
     
     # Convertir retorno esperado a probabilidad (0-1)
-    if expected_return <= -10:
-        probability = 0.1
-    elif expected_return >= 10:
-        probability = 0.9
-    else:
-        probability = 0.5 + (expected_return / 20)
-    
-    # Ajustar según perfil de riesgo
+    probability = np.where(
+        expected_returns <= -10, 0.1,
+        np.where(expected_returns >= 10, 0.9, 0.5 + expected_returns / 20)
+    )
+    return _ajustar_por_perfil(probability, riesgos, perfil_riesgo)
+
+def _ajustar_por_perfil(
+    probability: np.ndarray,
+    riesgos: np.ndarray,
+    perfil_riesgo: str = 'moderado'
+) -> np.ndarray:
+    """
+    Ajusta probabilidades de ganancia según el perfil de riesgo.
+    """
+    riesgo_alto = np.asarray(riesgos) == 'alto'
     if perfil_riesgo == 'bajo':
         # Penalizar activos más volátiles
-        if activo.get('riesgo') == 'alto':
-            probability *= 0.8
+        probability = np.where(riesgo_alto, probability * 0.8, probability)
     elif perfil_riesgo == 'alto':
-        # Favorecer activos más volátiles
-        if activo.get('riesgo') == 'alto':
-            probability *= 1.2
-            probability = min(probability, 0.95)  # Limitar a 0.95
+        # Favorecer activos más volátiles (limitado a 0.95)
+        probability = np.where(riesgo_alto, np.minimum(probability * 1.2, 0.95), probability)
+    
+    return probability
+
+def _probabilidad_montecarlo(predictor: FinancialPredictor, activos, n_trayectorias: int) -> np.ndarray:
+    """
+    Probabilidad de ganancia a partir de la distribución simulada de retornos.
+    """
+    price_history = model_registry.price_history(activos, predictor)
+    means, stds = predictor.predict_return_distribution(activos, price_history=price_history)
+    simulator = MonteCarloSimulator(n_paths=n_trayectorias, quantiles=())
+    return simulator.simulate(means, stds)["probability_gain"]
+
+# Función compatible con versiones anteriores
+def calcular_probabilidad_ganancia(activo, perfil_riesgo='moderado', preferencias=None,
+                                   metodo='lineal', n_trayectorias=10000):
+    """
+    Calcula la probabilidad de ganancia de un activo (función legacy).
+    
+    Con metodo='montecarlo' la probabilidad se obtiene de la distribución
+    simulada de retornos en lugar de la conversión lineal del retorno esperado.
+    """
+    predictor = model_registry.get_predictor()
+    if metodo == 'montecarlo':
+        probability = _ajustar_por_perfil(
+            _probabilidad_montecarlo(predictor, [activo], n_trayectorias),
+            [activo.get('riesgo')], perfil_riesgo
+        )
+        return float(probability[0])
+    
+    expected_return = predictor.predict_return(
+        activo, cache=model_registry.cache, price_history=model_registry.price_history([activo], predictor)
+    )
+    
+    probability = _probabilidad_desde_retorno(
+        [expected_return], [activo.get('riesgo')], perfil_riesgo
+    )
+    return float(probability[0])
+
+def calcular_probabilidades_ganancia(activos, perfil_riesgo='moderado', preferencias=None,
+                                     metodo='lineal', n_trayectorias=10000):
+    """
+    Calcula la probabilidad de ganancia de una lista de activos en una sola pasada.
+    
+    Args:
+        activos (list | AssetUniverse): Activos.
+        perfil_riesgo (str): Perfil de riesgo.
+        preferencias (dict, opcional): Preferencias del inversor.
+        metodo (str): 'lineal' (conversión del retorno esperado) o
+                      'montecarlo' (distribución simulada de retornos).
+        n_trayectorias (int): Trayectorias por activo con metodo='montecarlo'.
+        
+    Returns:
+        list: Probabilidades de ganancia, en el orden de `activos`.
+    """
+    if isinstance(activos, AssetUniverse):
+        # Columnar: el codificador trabaja directamente sobre el DataFrame
+        riesgos = activos.column('riesgo')
+        activos = activos.frame
+    else:
+        riesgos = [a.get('riesgo') for a in activos]
+    if metodo == 'montecarlo':
+        probabilities = _ajustar_por_perfil(
+            _probabilidad_montecarlo(model_registry.get_predictor(), activos, n_trayectorias),
+            riesgos, perfil_riesgo
+        )
+        return probabilities.tolist()
+    
+    expected_returns = model_registry.predict_returns(activos)
     
-    return probability
\ No newline at end of file
+    probabilities = _probabilidad_desde_retorno(expected_returns, riesgos, perfil_riesgo)
+    return probabilities.tolist()
@@ -3,16 +3,20 @@ api.py
 Implementación de API REST para Neoproyectto.
 """
 from fastapi import FastAPI, HTTPException, Depends, Header, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 from typing import Dict, Any, List, Optional, Union
 import uvicorn
 import json
+import os
 import time
 from datetime import datetime
 
 from logger import NeoproyecttoLogger
 from security import authenticate_request
 from error_handling import handle_error, ValidationError, NeoproyecttoBaseError
+from ai_predictor import model_registry
+from scraper import market_data_ingestor, market_snapshots
 from main import (
     gestionar_inversion_dividendos_mensuales,
     autoinversion_ia_global,
@@ -81,6 +85,25 @@ async def log_requests(request: Request, call_next):
     
     return response
 
+@app.on_event("startup")
+async def warm_up_models():
+    """Entrena o carga los modelos de predicción una vez por proceso."""
+    model_registry.warm_up()
+    
+    # Primera descarga de datos de mercado fuera del camino de las peticiones
+    market_snapshots.prefetch()
+    
+    # Reentrenamiento periódico en segundo plano (opcional)
+    retrain_interval = os.environ.get("NEOPROYECTTO_RETRAIN_INTERVAL")
+    if retrain_interval:
+        model_registry.start_periodic_retraining(float(retrain_interval))
+
+@app.on_event("shutdown")
+async def stop_model_retraining():
+    """Detiene el reentrenamiento en segundo plano y cierra el cliente de datos de mercado."""
+    model_registry.stop()
+    market_data_ingestor.close()
+
 async def verify_token(authorization: Optional[str] = Header(None)):
     """Verifica el token de autorización."""
     if not authorization:
@@ -110,6 +133,11 @@ async def root():
         "timestamp": datetime.now().isoformat()
     }
 
+@app.get("/api/modelo")
+async def api_modelo(user_info: Dict[str, Any] = Depends(verify_token)):
+    """Endpoint con la versión y el estado de los modelos de predicción."""
+    return model_registry.status()
+
 @app.post("/api/dividendos")
 async def api_dividendos(
     request: InversionDividendosRequest, 
@@ -122,7 +150,8 @@ async def api_dividendos(
     )
     
     try:
-        result = gestionar_inversion_dividendos_mensuales(
+        result = await run_in_threadpool(
+            gestionar_inversion_dividendos_mensuales,
             capital=request.capital,
             moneda=request.moneda,
             preferencias=request.preferencias
@@ -167,7 +196,8 @@ async def api_autoinversion(
     )
     
     try:
-        result = autoinversion_ia_global(
+        result = await run_in_threadpool(
+            autoinversion_ia_global,
             capital=request.capital,
             moneda=request.moneda,
             perfil_riesgo=request.perfil_riesgo,
@@ -215,7 +245,8 @@ async def api_puente(
     )
     
     try:
-        result = puente_autoinversion_a_dividendos(
+        result = await run_in_threadpool(
+            puente_autoinversion_a_dividendos,
             capital_minimo_activacion=request.capital_minimo_activacion,
             capital_objetivo=request.capital_objetivo,
             args_autoinversion=request.args_autoinversion,
@@ -1,50 +1,103 @@
 """
 asset_selector.py
 Selecciona activos de todos los mercados según perfil de riesgo y preferencias.
+
+Las funciones aceptan una lista de activos o un `AssetUniverse`; con un
+universo, la selección se hace con máscaras sobre las columnas y devuelve
+otro universo.
 """
+import heapq
+
+from asset_universe import AssetUniverse
+from preference_query import compile_preferences, Equals, Not, Truthy
+
+def _risk_predicates(perfil_riesgo):
+    """
+    Predicados del filtro por perfil de riesgo (los activos sin riesgo cuentan como 'moderado').
+    """
+    if perfil_riesgo == "bajo":
+        return (Not(Equals("riesgo", "alto")),)
+    if perfil_riesgo == "alto":
+        return (Not(Equals("riesgo", "bajo")),)
+    return ()
 
 def select_all_assets(assets, perfil_riesgo="moderado", preferencias=None):
     """
     Selecciona activos de todos los mercados según perfil de riesgo y preferencias.
 
     Args:
-        assets (list): Lista de activos.
+        assets (list | AssetUniverse): Activos.
         perfil_riesgo (str): Perfil de riesgo.
-        preferencias (dict, opcional): Preferencias para filtrar activos.
+        preferencias (dict, opcional): Preferencias para filtrar activos
+            (igualdad, rangos, conjuntos y negación; ver preference_query).
 
     Returns:
-        list: Activos seleccionados.
-    """
-    activos_filtrados = assets
-    # Filtrar por preferencias (sector, tipo, etc.)
-    if preferencias:
-        for clave, valor in preferencias.items():
-            activos_filtrados = [
-                a for a in activos_filtrados if a.get(clave) == valor
-            ]
-    # Filtrar por perfil de riesgo (simulado)
-    if perfil_riesgo == "bajo":
-        activos_filtrados = [a for a in activos_filtrados if a.get("riesgo", "moderado") != "alto"]
-    elif perfil_riesgo == "alto":
-        activos_filtrados = [a for a in activos_filtrados if a.get("riesgo", "moderado") != "bajo"]
-    return activos_filtrados
+        list | AssetUniverse: Activos seleccionados (del mismo tipo que `assets`).
+    """
+    # Preferencias y perfil de riesgo en una sola consulta compilada
+    return compile_preferences(preferencias).and_(*_risk_predicates(perfil_riesgo)).filter(assets)
 
 def select_dividend_assets(assets, preferencias=None):
     """
     Selecciona activos enfocados en dividendos mensuales según preferencias.
 
     Args:
-        assets (list): Lista de activos con datos de dividendos.
-        preferencias (dict, opcional): Preferencias para filtrar activos.
+        assets (list | AssetUniverse): Activos con datos de dividendos.
+        preferencias (dict, opcional): Preferencias para filtrar activos
+            (igualdad, rangos, conjuntos y negación; ver preference_query).
 
     Returns:
-        list: Activos seleccionados (simulados).
-    """
-    activos_filtrados = assets
-    if preferencias:
-        for clave, valor in preferencias.items():
-            activos_filtrados = [
-                a for a in activos_filtrados if a.get(clave) == valor
-            ]
+        list | AssetUniverse: Activos seleccionados (del mismo tipo que `assets`).
+    """
     # Simula selección de activos con dividendos mensuales
-    return [a for a in activos_filtrados if a.get("dividendos_mensuales", False)]
\ No newline at end of file
+    return compile_preferences(preferencias).and_(Truthy("dividendos_mensuales")).filter(assets)
+
+
+def iter_select_all_assets(chunks, perfil_riesgo="moderado", preferencias=None):
+    """
+    Versión perezosa de `select_all_assets` para un universo en bloques:
+    cada bloque se filtra al llegar y los bloques vacíos se descartan.
+
+    Args:
+        chunks (iterable): Bloques de activos (listas o AssetUniverse).
+        perfil_riesgo (str): Perfil de riesgo.
+        preferencias (dict, opcional): Preferencias para filtrar activos.
+
+    Yields:
+        list | AssetUniverse: Activos seleccionados de cada bloque.
+    """
+    for chunk in chunks:
+        seleccion = select_all_assets(chunk, perfil_riesgo, preferencias)
+        if len(seleccion):
+            yield seleccion
+
+def top_assets(chunks, k, clave="probabilidad_ganancia"):
+    """
+    Los `k` activos con mayor `clave` de un universo en bloques, con un heap
+    acotado: la memoria es O(k + bloque) en lugar de O(universo). El orden es
+    el de ordenar todo el universo de mayor a menor (los empates conservan el
+    orden de llegada).
+
+    Args:
+        chunks (iterable): Bloques de activos (listas o AssetUniverse).
+        k (int): Número de activos.
+        clave (str): Atributo por el que se ordena.
+
+    Returns:
+        list: Los `k` mejores activos, de mayor a menor.
+    """
+    heap = []
+    posicion = 0
+    for chunk in chunks:
+        if isinstance(chunk, AssetUniverse):
+            # Solo los k mejores del bloque pueden entrar en el heap
+            chunk = chunk.top(clave, k).to_records()
+        for activo in chunk:
+            # (valor, -posición): a igual valor, el que llegó después es "menor"
+            item = (activo.get(clave, 0), -posicion, activo)
+            posicion += 1
+            if len(heap) < k:
+                heapq.heappush(heap, item)
+            else:
+                heapq.heappushpop(heap, item)
+    return [activo for _, _, activo in sorted(heap, key=lambda item: item[:2], reverse=True)]
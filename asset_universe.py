@@ -0,0 +1,112 @@
+"""
+asset_universe.py
+Representación columnar del universo de activos.
+
+Los activos viajan por la selección, la puntuación y la construcción de la
+cartera como columnas de un DataFrame (sector, tipo y riesgo categóricos) en
+lugar de listas de dicts; las listas de dicts solo se usan en los extremos
+(datos de entrada y cartera de salida).
+"""
+from typing import Dict, Any, List, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+
+from attribute_index import AttributeIndex
+
+# Columnas que se guardan como categóricas
+CATEGORICAL_COLUMNS = ("sector", "tipo", "riesgo")
+
+class AssetUniverse:
+    """
+    Universo de activos en columnas.
+
+    Es inmutable: filtrar o añadir una columna devuelve un universo nuevo
+    (pandas comparte los datos no modificados), así que una misma instancia
+    puede servirse a varias peticiones a la vez.
+    """
+
+    def __init__(self, frame: pd.DataFrame, index: Optional[AttributeIndex] = None):
+        """
+        Args:
+            frame: Una fila por activo, con índice 0..n-1.
+            index: Índice invertido ya construido para estas filas.
+        """
+        self.frame = frame
+        self._index = index
+
+    @property
+    def index(self) -> AttributeIndex:
+        """
+        Índice invertido de sector, tipo, riesgo y dividendos_mensuales
+        (se construye la primera vez y se conserva al añadir columnas).
+        """
+        if self._index is None:
+            self._index = AttributeIndex(self.frame)
+        return self._index
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]]) -> 'AssetUniverse':
+        """
+        Construye el universo a partir de una lista de activos (dicts).
+        """
+        frame = pd.DataFrame.from_records(list(records))
+        for name in CATEGORICAL_COLUMNS:
+            if name in frame.columns:
+                frame[name] = frame[name].astype("category")
+        return cls(frame)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """
+        Lista de activos (dicts), sin las claves que el activo original no tenía.
+        """
+        return [
+            {key: value for key, value in record.items() if not _is_missing(value)}
+            for record in self.frame.to_dict("records")
+        ]
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @property
+    def columns(self) -> List[str]:
+        """Columnas del universo."""
+        return list(self.frame.columns)
+
+    def column(self, name: str, default: Any = None) -> np.ndarray:
+        """
+        Valores de una columna (o `default` para todos si no existe).
+        """
+        if name not in self.frame.columns:
+            return np.array([default] * len(self.frame), dtype=object)
+        values = self.frame[name]
+        if default is not None and values.hasnans:
+            values = values.astype(object).where(values.notna(), default)
+        return values.to_numpy()
+
+    def take(self, rows: Union[np.ndarray, Sequence[int]]) -> 'AssetUniverse':
+        """
+        Subconjunto de activos por máscara booleana o posiciones.
+        """
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        return AssetUniverse(self.frame.take(rows).reset_index(drop=True))
+
+    def with_column(self, name: str, values: Any) -> 'AssetUniverse':
+        """
+        Universo con una columna añadida o sustituida.
+        """
+        index = self._index if self._index is not None and name not in self._index.columns else None
+        return AssetUniverse(self.frame.assign(**{name: values}), index)
+
+    def top(self, name: str, k: int) -> 'AssetUniverse':
+        """
+        Los `k` activos con mayor valor de la columna, de mayor a menor
+        (los empates conservan el orden original).
+        """
+        order = np.argsort(-self.frame[name].to_numpy(dtype=float), kind="stable")
+        return self.take(order[:k])
+
+def _is_missing(value: Any) -> bool:
+    """Valor ausente de una columna (NaN/None)."""
+    return value is None or (isinstance(value, float) and value != value)
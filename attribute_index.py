@@ -0,0 +1,117 @@
+"""
+attribute_index.py
+Índice invertido (valor -> bitmap de activos) sobre los atributos
+categóricos del universo, para resolver las preferencias intersecando
+bitmaps en lugar de recorrer la lista de activos.
+"""
+from typing import Dict, Any, Hashable, List, Sequence
+import numpy as np
+import pandas as pd
+
+# Atributos indexados por defecto
+INDEXED_COLUMNS = ("sector", "tipo", "riesgo", "dividendos_mensuales")
+
+# Número de bits a 1 de cada byte
+_POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+class AttributeIndex:
+    """
+    Índice invertido de un universo de activos.
+
+    Para cada atributo indexado guarda un bitmap empaquetado (np.packbits,
+    1 bit por activo) por valor distinto, más el de los activos sin valor.
+    Una consulta con varias preferencias es un AND de bitmaps de n/8 bytes;
+    solo al final se desempaqueta una máscara booleana.
+    """
+
+    def __init__(self, frame: pd.DataFrame, columns: Sequence[str] = INDEXED_COLUMNS):
+        """
+        Construye el índice (una vez por instantánea).
+
+        Args:
+            frame: DataFrame del universo.
+            columns: Atributos a indexar (los que no estén en `frame` se ignoran).
+        """
+        self.n_assets = len(frame)
+        self._bitmaps: Dict[str, Dict[Hashable, np.ndarray]] = {}
+        self._missing: Dict[str, np.ndarray] = {}
+        for name in columns:
+            if name not in frame.columns:
+                continue
+            values = frame[name]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                codes, uniques = values.cat.codes.to_numpy(), list(values.cat.categories)
+            else:
+                codes, uniques = pd.factorize(values.to_numpy(dtype=object), use_na_sentinel=True)
+                uniques = list(uniques)
+            # Un bitmap por valor: ordenar por código agrupa las posiciones de cada valor
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(-1, len(uniques) + 1))
+            self._missing[name] = self._pack(order[bounds[0]:bounds[1]])
+            self._bitmaps[name] = {
+                value: self._pack(order[bounds[k + 1]:bounds[k + 2]]) for k, value in enumerate(uniques)
+            }
+
+    @property
+    def columns(self) -> List[str]:
+        """Atributos indexados."""
+        return list(self._bitmaps)
+
+    def _pack(self, positions: np.ndarray) -> np.ndarray:
+        """Bitmap empaquetado con las posiciones dadas a 1."""
+        mask = np.zeros(self.n_assets, dtype=bool)
+        mask[positions] = True
+        return np.packbits(mask)
+
+    def _empty(self) -> np.ndarray:
+        return np.zeros((self.n_assets + 7) // 8, dtype=np.uint8)
+
+    def _full(self) -> np.ndarray:
+        return np.packbits(np.ones(self.n_assets, dtype=bool))
+
+    def bitmap(self, name: str, value: Any) -> np.ndarray:
+        """
+        Bitmap de los activos con `name == value` (None: activos sin valor).
+        """
+        if value is None:
+            return self._missing[name]
+        try:
+            bitmap = self._bitmaps[name].get(value)
+        except TypeError:
+            # Valor no hashable (lista, dict): no coincide con ningún atributo escalar
+            bitmap = None
+        return self._empty() if bitmap is None else bitmap
+
+    def truthy(self, name: str) -> np.ndarray:
+        """
+        Bitmap de los activos cuyo atributo es verdadero (`a.get(name, False)`).
+        """
+        result = self._empty()
+        for value, bitmap in self._bitmaps[name].items():
+            if value:
+                result |= bitmap
+        return result
+
+    def not_equal(self, name: str, value: Any) -> np.ndarray:
+        """
+        Bitmap de los activos con `name != value` (los que no tienen valor incluidos).
+        """
+        return self.complement(self.bitmap(name, value))
+
+    def complement(self, bitmap: np.ndarray) -> np.ndarray:
+        """Bitmap de los activos que no están en `bitmap`."""
+        return ~bitmap & self._full()
+
+    def count(self, bitmap: np.ndarray) -> int:
+        """Número de activos del bitmap."""
+        return int(_POPCOUNT[bitmap].sum(dtype=np.int64))
+
+    def contains(self, bitmap: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """
+        Máscara de las filas `rows` que están en el bitmap (sin desempaquetarlo entero).
+        """
+        return ((bitmap[rows >> 3] >> (7 - (rows & 7))) & 1).astype(bool)
+
+    def to_mask(self, bitmap: np.ndarray) -> np.ndarray:
+        """Máscara booleana (n_activos,) de un bitmap."""
+        return np.unpackbits(bitmap, count=self.n_assets).view(bool)
@@ -0,0 +1,219 @@
+"""
+backtester.py
+Backtesting walk-forward del predictor financiero: reentrena en ventanas
+crecientes o móviles y puntúa las predicciones contra los retornos realizados.
+"""
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from logger import NeoproyecttoLogger
+from ai_predictor import FinancialPredictor, TIMEFRAME_TARGETS
+from error_handling import InvestmentError
+
+logger = NeoproyecttoLogger("neoproyectto.backtester")
+
+# Pesos de la regresión lineal en la mezcla que se puntúan (0.3 es el del predictor)
+DEFAULT_BLEND_WEIGHTS = (0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.7, 1.0)
+
+def score_predictions(linear: np.ndarray, forest: np.ndarray, realized: np.ndarray,
+                      weights: Sequence[float]) -> Dict[str, np.ndarray]:
+    """
+    Métricas de todas las mezclas `w * lineal + (1 - w) * forest` a la vez.
+
+    Returns:
+        dict: 'mae', 'rmse', 'hit_rate' (acierto de signo) e 'ic' (correlación
+              con el retorno realizado), un valor por peso.
+    """
+    weights = np.asarray(weights, dtype=float)[:, np.newaxis]
+    predictions = weights * linear + (1.0 - weights) * forest
+    errors = predictions - realized
+    centered = predictions - predictions.mean(axis=1, keepdims=True)
+    realized_centered = realized - realized.mean()
+    denominator = np.sqrt((centered ** 2).sum(axis=1) * (realized_centered ** 2).sum())
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ic = np.where(denominator > 0, centered @ realized_centered / denominator, 0.0)
+    return {
+        "mae": np.abs(errors).mean(axis=1),
+        "rmse": np.sqrt((errors ** 2).mean(axis=1)),
+        "hit_rate": (np.sign(predictions) == np.sign(realized)).mean(axis=1),
+        "ic": ic
+    }
+
+def _run_window(data: pd.DataFrame, train: np.ndarray, test: np.ndarray,
+                hyperparameters: Optional[Dict[str, Any]], weights: Sequence[float]) -> Dict[str, Any]:
+    """
+    Entrena un predictor con las filas `train` y puntúa las filas `test`
+    (predicción vectorizada de toda la ventana de prueba).
+    """
+    predictor = FinancialPredictor(data.iloc[train], n_jobs=1, hyperparameters=hyperparameters)
+    features = data.iloc[test].drop(columns='rendimiento').to_numpy(dtype=float)
+    linear, forest = predictor._predict_components(features)
+    realized = data['rendimiento'].to_numpy(dtype=float)[test]
+    metrics = score_predictions(linear, forest, realized, weights)
+    return {"rows": len(test), **{name: values.tolist() for name, values in metrics.items()}}
+
+# Datos del backtest en cada proceso del pool (se envían una vez por proceso)
+_worker_data: Dict[str, Any] = {}
+
+def _init_worker(data: pd.DataFrame, hyperparameters: Optional[Dict[str, Any]],
+                 weights: Sequence[float]) -> None:
+    """Inicializador de los procesos del pool."""
+    _worker_data.update(data=data, hyperparameters=hyperparameters, weights=weights)
+
+def _run_window_in_worker(train: np.ndarray, test: np.ndarray) -> Dict[str, Any]:
+    """Evalúa una ventana con los datos del proceso."""
+    return _run_window(_worker_data["data"], train, test,
+                       _worker_data["hyperparameters"], _worker_data["weights"])
+
+class WalkForwardBacktester:
+    """
+    Backtest walk-forward: el histórico se recorre en orden cronológico y,
+    en cada ventana, se entrena con el pasado y se predice el periodo siguiente.
+
+    Con `mode='expanding'` cada entrenamiento usa todo el pasado; con
+    `mode='rolling'`, solo los últimos `train_periods` periodos. Un periodo es
+    una fila o, si se indica `time_column`, un valor distinto de esa columna
+    (por ejemplo, una fecha con todos los activos del universo). Las ventanas
+    se reparten entre procesos y cada una se predice en una sola pasada.
+    """
+
+    def __init__(
+        self,
+        train_periods: int,
+        test_periods: int,
+        mode: str = 'expanding',
+        gap: int = 0,
+        time_column: Optional[str] = None,
+        timeframe: str = '1m',
+        hyperparameters: Optional[Dict[str, Any]] = None,
+        blend_weights: Sequence[float] = DEFAULT_BLEND_WEIGHTS,
+        n_jobs: Optional[int] = None
+    ):
+        """
+        Inicializa el backtester.
+
+        Args:
+            train_periods: Periodos del primer entrenamiento (y de cada uno, en 'rolling').
+            test_periods: Periodos predichos por ventana.
+            mode: 'expanding' o 'rolling'.
+            gap: Periodos descartados entre entrenamiento y prueba, para que el
+                 objetivo (retorno futuro) del entrenamiento no solape la prueba.
+            time_column: Columna que identifica el periodo de cada fila (no se usa como característica).
+            timeframe: Marco temporal cuyo objetivo se puntúa ('1m', '3m', '6m', '1y').
+            hyperparameters: Configuración de los modelos de cada ventana.
+            blend_weights: Pesos de la regresión lineal en las mezclas puntuadas.
+            n_jobs: Procesos del pool (por defecto, todos los núcleos; 1 sin pool).
+        """
+        if mode not in ('expanding', 'rolling'):
+            raise InvestmentError("Modo de backtest no soportado", {"mode": mode})
+        if timeframe not in TIMEFRAME_TARGETS:
+            raise InvestmentError("Marco temporal no soportado", {"timeframe": timeframe})
+        self.train_periods = train_periods
+        self.test_periods = test_periods
+        self.mode = mode
+        self.gap = gap
+        self.time_column = time_column
+        self.timeframe = timeframe
+        self.hyperparameters = hyperparameters
+        self.blend_weights = tuple(blend_weights)
+        self.n_jobs = n_jobs
+
+    def windows(self, periods: np.ndarray) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Índices de fila (entrenamiento, prueba) de cada ventana.
+
+        Args:
+            periods: Periodo de cada fila (enteros crecientes desde 0).
+        """
+        n_periods = int(periods.max()) + 1 if len(periods) else 0
+        windows = []
+        test_start = self.train_periods + self.gap
+        while test_start < n_periods:
+            train_end = test_start - self.gap
+            train_start = 0 if self.mode == 'expanding' else train_end - self.train_periods
+            test_end = min(test_start + self.test_periods, n_periods)
+            train = np.flatnonzero((periods >= train_start) & (periods < train_end))
+            test = np.flatnonzero((periods >= test_start) & (periods < test_end))
+            windows.append((train, test))
+            test_start = test_end
+        return windows
+
+    def run(self, data: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Ejecuta el backtest.
+
+        Args:
+            data: Histórico con las características y la columna objetivo del
+                  marco temporal, en orden cronológico si no hay `time_column`.
+
+        Returns:
+            dict: Métricas por ventana y agregadas por peso de la mezcla
+                  ('summary'), con la mezcla del predictor en 'blend'.
+        """
+        start_time = time.perf_counter()
+        target = TIMEFRAME_TARGETS[self.timeframe]
+        if self.time_column is not None:
+            periods = pd.factorize(data[self.time_column], sort=True)[0]
+            data = data.drop(columns=self.time_column)
+        else:
+            periods = np.arange(len(data))
+        # Solo el objetivo del marco temporal, con el nombre que espera el predictor
+        other_targets = [col for col in TIMEFRAME_TARGETS.values() if col in data.columns and col != target]
+        data = data.drop(columns=other_targets).rename(columns={target: 'rendimiento'})
+        valid = data['rendimiento'].notna().to_numpy()
+        data, periods = data[valid].reset_index(drop=True), periods[valid]
+
+        windows = self.windows(periods)
+        if not windows:
+            raise InvestmentError("Histórico insuficiente para el backtest",
+                                {"periods": int(periods.max()) + 1 if len(periods) else 0,
+                                 "train_periods": self.train_periods})
+
+        n_jobs = min(self.n_jobs or os.cpu_count() or 1, len(windows))
+        if n_jobs <= 1:
+            results = [_run_window(data, train, test, self.hyperparameters, self.blend_weights)
+                       for train, test in windows]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=n_jobs,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(data, self.hyperparameters, self.blend_weights)
+            ) as executor:
+                futures = [executor.submit(_run_window_in_worker, train, test) for train, test in windows]
+                results = [future.result() for future in futures]
+
+        for (train, test), result in zip(windows, results):
+            result["train_rows"] = len(train)
+
+        summary = self._summarize(results)
+        report = {
+            "mode": self.mode,
+            "timeframe": self.timeframe,
+            "windows": results,
+            "summary": summary,
+            "blend": summary.get("0.3"),
+            "duration_s": round(time.perf_counter() - start_time, 3)
+        }
+        logger.info("Backtest walk-forward completado",
+                  {"windows": len(results), "blend": report["blend"], "duration_s": report["duration_s"]})
+        return report
+
+    def _summarize(self, results: List[Dict[str, Any]]) -> Dict[str, Dict[str, float]]:
+        """
+        Agrega las métricas de todas las ventanas (ponderadas por filas) por peso de la mezcla.
+        """
+        rows = np.array([result["rows"] for result in results], dtype=float)
+        summary = {}
+        for k, weight in enumerate(self.blend_weights):
+            metrics = {}
+            for name in ("mae", "hit_rate", "ic"):
+                metrics[name] = float(np.average([r[name][k] for r in results], weights=rows))
+            metrics["rmse"] = float(np.sqrt(np.average([r["rmse"][k] ** 2 for r in results], weights=rows)))
+            summary[f"{weight:g}"] = metrics
+        return summary
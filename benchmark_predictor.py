@@ -0,0 +1,405 @@
+"""
+benchmark_predictor.py
+Benchmarks de rendimiento del predictor financiero (ai_predictor.py).
+
+Uso:
+    python benchmark_predictor.py                       # ejecutar y mostrar resultados
+    python benchmark_predictor.py --save-baseline       # guardar benchmark_baseline.json
+    python benchmark_predictor.py --compare             # comparar con la línea base
+"""
+from typing import Dict, Any, List, Callable, Optional, Sequence
+from contextlib import contextmanager
+from datetime import datetime
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import sklearn
+
+from ai_predictor import FinancialPredictor, FEATURE_NAMES
+from monte_carlo import MonteCarloSimulator
+from technical_indicators import indicator_training_frame, latest_indicators
+from market_generator import generate_assets
+
+def synthetic_historical_data(rows: int = 1000, seed: int = 42) -> pd.DataFrame:
+    """
+    Genera datos históricos sintéticos (reproducibles) para entrenar el predictor.
+
+    Args:
+        rows (int): Número de observaciones.
+        seed (int): Semilla del generador aleatorio.
+
+    Returns:
+        pd.DataFrame: Columnas de FEATURE_NAMES más 'rendimiento'.
+    """
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        "sector": rng.integers(1, 8, rows).astype(float),
+        "tipo": rng.integers(1, 7, rows).astype(float),
+        "riesgo": rng.integers(1, 4, rows).astype(float),
+        "precio": rng.uniform(5, 500, rows),
+        "volatilidad": rng.uniform(0.01, 0.6, rows),
+    })[FEATURE_NAMES]
+    data["rendimiento"] = (
+        1.5 * data["riesgo"] + 8 * data["volatilidad"] - 0.4 * data["tipo"]
+        + 0.3 * np.sin(data["sector"]) + rng.normal(0, 0.5, rows)
+    )
+    return data
+
+def synthetic_assets(count: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """
+    Genera activos sintéticos con los atributos que usa el predictor
+    (mercado sintético de market_generator.py).
+    """
+    return generate_assets(count, seed=seed)
+
+@contextmanager
+def _quiet_logs():
+    """
+    Silencia los logs INFO del predictor para no medir la escritura de logs.
+    """
+    predictor_logger = logging.getLogger("neoproyectto.ai_predictor")
+    level = predictor_logger.level
+    predictor_logger.setLevel(logging.ERROR)
+    try:
+        yield
+    finally:
+        predictor_logger.setLevel(level)
+
+def _latencies(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """
+    Mide la latencia de `func` y devuelve percentiles en microsegundos.
+    """
+    samples = np.empty(repeat)
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples[i] = time.perf_counter() - start
+    samples *= 1e6
+    return {
+        "p50_us": round(float(np.percentile(samples, 50)), 2),
+        "p99_us": round(float(np.percentile(samples, 99)), 2),
+        "mean_us": round(float(samples.mean()), 2),
+    }
+
+def benchmark_compiled_forest(rows: int = 2000, repeat: int = 200) -> Dict[str, Any]:
+    """
+    Compara la latencia de `predict_return` (una fila) entre sklearn y el
+    modo compilado, y la diferencia máxima entre sus predicciones.
+
+    Args:
+        rows (int): Filas de datos históricos para entrenar.
+        repeat (int): Número de predicciones medidas por modo.
+
+    Returns:
+        dict: Latencias por modo, aceleración y diferencia máxima.
+    """
+    data = synthetic_historical_data(rows)
+    predictor = FinancialPredictor(data)
+    compiled = FinancialPredictor(data, compiled=True)
+    assets = synthetic_assets(repeat)
+
+    # Las predicciones deben coincidir (dentro de tolerancia)
+    max_abs_diff = float(np.max(np.abs(
+        predictor.predict_returns_batch(assets) - compiled.predict_returns_batch(assets)
+    )))
+
+    with _quiet_logs():
+        asset_iter = iter(assets)
+        sklearn_latency = _latencies(lambda: predictor.predict_return(next(asset_iter)), repeat)
+        asset_iter = iter(assets)
+        compiled_latency = _latencies(lambda: compiled.predict_return(next(asset_iter)), repeat)
+
+    return {
+        "rows": rows,
+        "trees": compiled.compiled_forest.n_trees,
+        "sklearn": sklearn_latency,
+        "compiled": compiled_latency,
+        "speedup_p50": round(sklearn_latency["p50_us"] / compiled_latency["p50_us"], 2),
+        "max_abs_diff": max_abs_diff,
+    }
+
+def benchmark_monte_carlo(assets: int = 1000, n_paths: int = 10000) -> Dict[str, Any]:
+    """
+    Mide el rendimiento (trayectorias por segundo) del simulador Monte Carlo.
+    """
+    rng = np.random.default_rng(0)
+    means = rng.normal(1, 2, assets)
+    stds = rng.uniform(0.1, 3, assets)
+    simulator = MonteCarloSimulator(n_paths=n_paths, seed=1)
+
+    start = time.perf_counter()
+    simulator.simulate(means, stds)
+    elapsed = time.perf_counter() - start
+    return {
+        "assets": assets,
+        "n_paths": n_paths,
+        "seconds": round(elapsed, 4),
+        "paths_per_second": round(assets * n_paths / elapsed)
+    }
+
+def benchmark_batch_throughput(
+    rows: int = 2000,
+    sizes: Sequence[int] = (10, 100, 1000, 10000, 100000),
+    repeat: int = 3
+) -> Dict[str, Any]:
+    """
+    Mide el rendimiento de `predict_returns_batch` para universos de distintos tamaños.
+
+    Args:
+        rows (int): Filas de datos históricos para entrenar.
+        sizes (list): Número de activos por lote.
+        repeat (int): Repeticiones por tamaño (se toma la mejor).
+
+    Returns:
+        dict: Segundos y activos por segundo por modo y tamaño.
+    """
+    data = synthetic_historical_data(rows)
+    predictors = {
+        "sklearn": FinancialPredictor(data),
+        "compiled": FinancialPredictor(data, compiled=True)
+    }
+    universe = synthetic_assets(max(sizes))
+
+    results: Dict[str, Any] = {"rows": rows}
+    with _quiet_logs():
+        for mode, predictor in predictors.items():
+            results[mode] = {}
+            for size in sizes:
+                assets = universe[:size]
+                best = min(
+                    _timed(lambda: predictor.predict_returns_batch(assets)) for _ in range(repeat)
+                )
+                results[mode][str(size)] = {
+                    "seconds": round(best, 5),
+                    "assets_per_second": round(size / best)
+                }
+    return results
+
+def benchmark_training(
+    row_counts: Sequence[int] = (1000, 5000, 20000),
+    core_counts: Optional[Sequence[int]] = None
+) -> Dict[str, Any]:
+    """
+    Mide el tiempo de `_train_models` según el número de filas y de núcleos.
+
+    Args:
+        row_counts (list): Filas de datos históricos.
+        core_counts (list): Núcleos (n_jobs); por defecto 1 y todos los disponibles.
+
+    Returns:
+        dict: Segundos de entrenamiento por número de núcleos y de filas.
+    """
+    if core_counts is None:
+        core_counts = sorted({1, os.cpu_count() or 1})
+
+    results: Dict[str, Any] = {}
+    with _quiet_logs():
+        for cores in core_counts:
+            results[f"cores_{cores}"] = {}
+            for rows in row_counts:
+                data = synthetic_historical_data(rows)
+                predictor = FinancialPredictor(n_jobs=cores)
+                predictor.historical_data = data
+                results[f"cores_{cores}"][str(rows)] = {
+                    "seconds": round(_timed(predictor._train_models), 4)
+                }
+    return results
+
+def _forest_bytes(predictor: FinancialPredictor) -> int:
+    """
+    Memoria de los bosques cargados en un predictor: nodos del Random Forest
+    de sklearn (si está cargado) más arrays del bosque compilado.
+    """
+    total = predictor.compiled_forest.nbytes if predictor.compiled_forest is not None else 0
+    forest = predictor.models.get("random_forest")
+    if forest is not None:
+        for estimator in forest.estimators_:
+            state = estimator.tree_.__getstate__()
+            total += state["nodes"].nbytes + state["values"].nbytes
+    return total
+
+def benchmark_compact_precision(rows: int = 2000, assets: int = 20000, repeat: int = 3) -> Dict[str, Any]:
+    """
+    Compara el modo compacto (float32) con el compilado en float64 y con el
+    predictor por defecto (sklearn), cargados desde el mismo artefacto:
+    memoria de los bosques y de la matriz de características, tiempo por
+    lote (el mejor de `repeat`) y diferencia de las predicciones.
+    """
+    data = synthetic_historical_data(rows)
+    universe = synthetic_assets(assets)
+
+    results: Dict[str, Any] = {"rows": rows, "assets": assets}
+    predictions = {}
+    with _quiet_logs(), tempfile.TemporaryDirectory() as model_dir:
+        FinancialPredictor(data).save(model_dir)
+        predictors = {
+            "default": FinancialPredictor.load(model_dir),
+            "float64": FinancialPredictor.load(model_dir, compiled=True),
+            "float32": FinancialPredictor.load(model_dir, compact=True)
+        }
+        for mode, predictor in predictors.items():
+            predictions[mode] = predictor.predict_returns_batch(universe)
+            results[mode] = {
+                "forest_bytes": _forest_bytes(predictor),
+                "feature_bytes": predictor._encode(universe).nbytes,
+                "seconds": round(min(
+                    _timed(lambda: predictor.predict_returns_batch(universe)) for _ in range(repeat)
+                ), 4)
+            }
+    delta = np.abs(predictions["float32"] - predictions["float64"])
+    results["max_abs_diff"] = float(delta.max())
+    results["mean_abs_diff"] = float(delta.mean())
+    results["max_abs_diff_default"] = float(np.abs(predictions["float32"] - predictions["default"]).max())
+    results["forest_bytes_vs_default"] = round(results["float32"]["forest_bytes"] / results["default"]["forest_bytes"], 3)
+    results["speedup_vs_default"] = round(results["default"]["seconds"] / results["float32"]["seconds"], 2)
+    return results
+
+def benchmark_indicators(assets: int = 10000, days: int = 1260, seed: int = 11) -> Dict[str, Any]:
+    """
+    Mide la construcción de indicadores técnicos (por defecto, 10k activos x 5 años).
+
+    Returns:
+        dict: Segundos de los indicadores del último día y del conjunto de entrenamiento.
+    """
+    rng = np.random.default_rng(seed)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, (assets, days)), axis=1))
+    return {
+        "assets": assets,
+        "days": days,
+        "latest": {"seconds": round(min(_timed(lambda: latest_indicators(prices)) for _ in range(3)), 5)},
+        "training_frame": {"seconds": round(_timed(lambda: indicator_training_frame(prices)), 4)}
+    }
+
+def _timed(func: Callable[[], Any]) -> float:
+    """Segundos que tarda en ejecutarse `func`."""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+def run_suite(quick: bool = False) -> Dict[str, Any]:
+    """
+    Ejecuta todos los benchmarks del predictor.
+
+    Args:
+        quick (bool): Versión reducida (para pruebas y comprobaciones rápidas).
+
+    Returns:
+        dict: Resultados con la descripción del entorno de ejecución.
+    """
+    if quick:
+        latency = benchmark_compiled_forest(rows=300, repeat=20)
+        throughput = benchmark_batch_throughput(rows=300, sizes=(10, 100), repeat=1)
+        training = benchmark_training(row_counts=(300,), core_counts=(1,))
+        monte_carlo = benchmark_monte_carlo(assets=100, n_paths=1000)
+        indicators = benchmark_indicators(assets=100, days=300)
+        compact = benchmark_compact_precision(rows=300, assets=100)
+    else:
+        latency = benchmark_compiled_forest()
+        throughput = benchmark_batch_throughput()
+        training = benchmark_training()
+        monte_carlo = benchmark_monte_carlo()
+        indicators = benchmark_indicators()
+        compact = benchmark_compact_precision()
+
+    return {
+        "environment": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+            "cpu_count": os.cpu_count(),
+            "quick": quick
+        },
+        "predict_latency": latency,
+        "batch_throughput": throughput,
+        "training": training,
+        "monte_carlo": monte_carlo,
+        "indicators": indicators,
+        "compact_precision": compact
+    }
+
+def _flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    """Aplana los resultados a {ruta.de.la.métrica: valor}."""
+    flat: Dict[str, float] = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = float(value)
+    return flat
+
+def compare_with_baseline(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = 0.25
+) -> List[str]:
+    """
+    Compara unos resultados con la línea base.
+
+    Las latencias y tiempos (`*_us`, `seconds`) no deben crecer, y los
+    rendimientos (`*_per_second`) no deben bajar, más de `tolerance`.
+
+    Returns:
+        list: Descripción de cada regresión encontrada.
+    """
+    current = _flatten({k: v for k, v in results.items() if k != "environment"})
+    reference = _flatten({k: v for k, v in baseline.items() if k != "environment"})
+
+    regressions = []
+    for metric, base_value in reference.items():
+        value = current.get(metric)
+        if value is None or base_value <= 0:
+            continue
+        leaf = metric.rsplit(".", 1)[-1]
+        if leaf.endswith("_per_second"):
+            change = (base_value - value) / base_value
+        elif leaf.endswith("_us") or leaf == "seconds":
+            change = (value - base_value) / base_value
+        else:
+            continue
+        if change > tolerance:
+            regressions.append(f"{metric}: {base_value:g} -> {value:g} ({change:+.0%})")
+    return regressions
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Punto de entrada de línea de comandos.
+    """
+    parser = argparse.ArgumentParser(description="Benchmarks del predictor financiero")
+    parser.add_argument("--quick", action="store_true", help="versión reducida")
+    parser.add_argument("--output", help="fichero JSON donde guardar los resultados")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="fichero de línea base")
+    parser.add_argument("--save-baseline", action="store_true", help="guardar como línea base")
+    parser.add_argument("--compare", action="store_true", help="comparar con la línea base")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="regresión tolerada (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results = run_suite(quick=args.quick)
+    print(json.dumps(results, indent=2))
+
+    for path in filter(None, [args.output, args.baseline if args.save_baseline else None]):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESIÓN {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+compiled_forest.py
+Evaluador compilado de bosques de árboles sobre arrays planos de NumPy.
+"""
+from typing import Dict, Any
+import os
+import numpy as np
+
+from error_handling import ConfigurationError
+
+# Arrays que forman un bosque compilado (se guardan como .npy)
+_ARRAY_NAMES = ('feature', 'threshold', 'children', 'value', 'roots', 'depths')
+
+# Filas por bloque al evaluar lotes grandes (acota la memoria temporal)
+CHUNK_ROWS = int(os.environ.get("NEOPROYECTTO_COMPILED_CHUNK_ROWS", "8192"))
+
+# Hasta este número de filas se recorren todos los árboles a la vez; por
+# encima, árbol a árbol (los nodos de cada árbol caben en caché)
+_ALL_TREES_MAX_ROWS = 1024
+
+def _round_down(values: np.ndarray, dtype) -> np.ndarray:
+    """
+    Convierte a `dtype` redondeando hacia -inf (el mayor valor representable <= original).
+    """
+    rounded = values.astype(dtype)
+    above = rounded > values
+    rounded[above] = np.nextafter(rounded[above], dtype(-np.inf))
+    return rounded
+
+class CompiledForest:
+    """
+    Bosque de regresión exportado a arrays planos de nodos.
+
+    Todos los árboles se concatenan en los mismos arrays (feature, threshold,
+    hijos y valor). `children[n]` guarda los hijos del nodo `n` por resultado
+    de la comparación `x <= umbral`: [derecho, izquierdo]. Las hojas apuntan
+    a sí mismas, de modo que el recorrido avanza todas las filas durante la
+    profundidad del árbol sin ramas por nodo.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, children: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, depths: np.ndarray):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = roots
+        self.depths = depths
+
+    @classmethod
+    def from_sklearn(cls, forest) -> 'CompiledForest':
+        """
+        Exporta un RandomForestRegressor (o un árbol de decisión) ya entrenado.
+
+        Args:
+            forest: Estimador de sklearn con `estimators_` o `tree_`.
+
+        Returns:
+            CompiledForest: Bosque compilado equivalente.
+        """
+        estimators = getattr(forest, 'estimators_', None) or [forest]
+
+        features, thresholds, children, values, roots, depths = [], [], [], [], [], []
+        offset = 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            node_ids = np.arange(tree.node_count, dtype=np.int32)
+            is_leaf = tree.children_left == -1
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            # Las hojas apuntan a sí mismas
+            left = np.where(is_leaf, node_ids, tree.children_left)
+            right = np.where(is_leaf, node_ids, tree.children_right)
+            children.append(np.stack([right, left], axis=1).astype(np.int32) + offset)
+            values.append(tree.value.reshape(tree.node_count, -1)[:, 0])
+            roots.append(offset)
+            depths.append(tree.max_depth)
+
+            offset += tree.node_count
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            children=np.concatenate(children),
+            value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.int32),
+            depths=np.asarray(depths, dtype=np.int32)
+        )
+
+    def astype(self, dtype) -> 'CompiledForest':
+        """
+        Copia del bosque con umbrales y valores en `dtype` (por ejemplo float32)
+        e índices de característica en int16.
+
+        En float32 el bosque ocupa 18 bytes por nodo en lugar de 28 (y el
+        RandomForestRegressor de sklearn, 72). Las
+        características se comparan en float32, así que redondear cada umbral
+        hacia abajo al float32 más próximo conserva exactamente todas las
+        decisiones (x <= t equivale a x <= float32 más grande <= t); solo los
+        valores de las hojas pierden precisión.
+        """
+        feature = self.feature
+        if feature.size == 0 or int(feature.max()) < np.iinfo(np.int16).max:
+            feature = feature.astype(np.int16)
+        return CompiledForest(
+            feature=feature,
+            threshold=_round_down(self.threshold, dtype),
+            children=self.children,
+            value=self.value.astype(dtype),
+            roots=self.roots,
+            depths=self.depths
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Memoria ocupada por los arrays del bosque."""
+        return sum(getattr(self, name).nbytes for name in _ARRAY_NAMES)
+
+    @property
+    def n_trees(self) -> int:
+        """Número de árboles del bosque."""
+        return len(self.roots)
+
+    @property
+    def max_depth(self) -> int:
+        """Profundidad del árbol más profundo."""
+        return int(self.depths.max()) if len(self.depths) else 0
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """
+        Evalúa el bosque para una matriz de características.
+
+        Como sklearn, compara las características en float32 con umbrales
+        en float64, de modo que las decisiones coinciden con `predict`.
+        Los lotes grandes se evalúan en bloques de `CHUNK_ROWS` filas.
+
+        Args:
+            X: Matriz (n_filas, n_características) o vector de una fila.
+
+        Returns:
+            np.ndarray: Predicción media de los árboles por fila.
+        """
+        X = self._as_matrix(X)
+        predictions = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), CHUNK_ROWS):
+            block = X[start:start + CHUNK_ROWS]
+            predictions[start:start + len(block)] = self.predict_trees(block).mean(axis=0, dtype=np.float64)
+        return predictions
+
+    def predict_trees(self, X: np.ndarray) -> np.ndarray:
+        """
+        Evalúa cada árbol por separado.
+
+        Returns:
+            np.ndarray: Predicciones (n_árboles, n_filas).
+        """
+        X = self._as_matrix(X)
+        n_rows = X.shape[0]
+        if n_rows <= _ALL_TREES_MAX_ROWS:
+            # Un índice de nodo por (árbol, fila), todos a la vez
+            offsets = np.tile(self._row_offsets(X), self.n_trees)
+            nodes = np.repeat(np.asarray(self.roots, dtype=np.intp), n_rows)
+            return self._traverse(X, offsets, nodes, self.max_depth).reshape(self.n_trees, n_rows)
+
+        predictions = np.empty((self.n_trees, n_rows), dtype=self.value.dtype)
+        for start in range(0, n_rows, CHUNK_ROWS):
+            block = X[start:start + CHUNK_ROWS]
+            offsets = self._row_offsets(block)
+            for tree, (root, depth) in enumerate(zip(self.roots, self.depths)):
+                nodes = np.full(len(block), root, dtype=np.intp)
+                predictions[tree, start:start + len(block)] = self._traverse(block, offsets, nodes, depth)
+        return predictions
+
+    @staticmethod
+    def _as_matrix(X: np.ndarray) -> np.ndarray:
+        """Matriz contigua en float32 (un vector se trata como una fila)."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return X[np.newaxis, :] if X.ndim == 1 else X
+
+    @staticmethod
+    def _row_offsets(X: np.ndarray) -> np.ndarray:
+        """Posición de cada fila de `X` en su vista aplanada."""
+        return np.arange(X.shape[0], dtype=np.intp) * X.shape[1]
+
+    def _traverse(self, X: np.ndarray, offsets: np.ndarray, nodes: np.ndarray, depth: int) -> np.ndarray:
+        """
+        Avanza `depth` niveles desde `nodes` y devuelve el valor de las hojas.
+
+        Los índices se pasan a intp una vez por nivel: indexar con int32
+        obliga a NumPy a convertirlos en cada acceso.
+        """
+        flat = X.ravel()
+        feature = np.asarray(self.feature)
+        threshold = np.asarray(self.threshold)
+        children = np.asarray(self.children).ravel()
+        for _ in range(int(depth)):
+            go_left = flat[offsets + feature[nodes]] <= threshold[nodes]
+            nodes = children[2 * nodes + go_left].astype(np.intp)
+        return np.asarray(self.value)[nodes]
+
+    def save(self, path: str) -> None:
+        """
+        Guarda los arrays del bosque como ficheros .npy en un directorio.
+        """
+        os.makedirs(path, exist_ok=True)
+        for name in _ARRAY_NAMES:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'CompiledForest':
+        """
+        Carga un bosque guardado con `save`.
+
+        Args:
+            path: Directorio del bosque compilado.
+            mmap: Si se mapean los arrays en memoria (solo lectura), de modo que
+                  varios procesos compartan las mismas páginas.
+        """
+        if not os.path.isdir(path):
+            raise ConfigurationError("Bosque compilado no encontrado", {"path": path})
+
+        mmap_mode = 'r' if mmap else None
+        arrays: Dict[str, Any] = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in _ARRAY_NAMES
+        }
+        return cls(**arrays)
@@ -2,13 +2,17 @@
 diversify.py
 Construye y optimiza portfolios de inversión basados en activos seleccionados.
 """
+from functools import reduce
+import operator
+
+from asset_universe import AssetUniverse
 
 def build_portfolio(assets, capital):
     """
     Construye un portfolio diversificado basado en activos seleccionados.
     
     Args:
-        assets (list): Lista de activos seleccionados.
+        assets (list | AssetUniverse): Activos seleccionados.
         capital (float): Capital disponible para inversión.
         
     Returns:
@@ -16,6 +20,8 @@ def build_portfolio(assets, capital):
     """
     if not assets:
         return {"activos": [], "capital_total": capital, "moneda": "EUR"}
+    if isinstance(assets, AssetUniverse):
+        return _build_portfolio_columns(assets, capital)
         
     # Cálculo simple de pesos basado en probabilidad de ganancia
     total_prob = sum(asset.get("probabilidad_ganancia", 1) for asset in assets)
@@ -50,6 +56,41 @@ def build_portfolio(assets, capital):
         
     return cartera
 
+def _build_portfolio_columns(universe, capital):
+    """
+    Versión columnar de `build_portfolio`: los pesos y asignaciones se
+    calculan con operaciones sobre columnas y solo la cartera de salida se
+    convierte en dicts.
+    """
+    probabilidades = universe.column("probabilidad_ganancia", 1).astype(float)
+    # round() de Python (no np.round) para redondear igual que la versión por activo
+    asignaciones = [round(x, 2) for x in (capital * (probabilidades / probabilidades.sum())).tolist()]
+    # Último activo recibe el capital restante para evitar problemas de redondeo
+    # (restando en el mismo orden que la versión por activo, con el mismo resultado)
+    asignaciones[-1] = reduce(operator.sub, asignaciones[:-1], capital)
+
+    nombres = universe.column("nombre", None)
+    sectores = universe.column("sector", "general")
+    tipos = universe.column("tipo", "activo")
+    rendimientos = universe.column("rendimiento_simulado", 0)
+
+    return {
+        "activos": [
+            {
+                "nombre": nombres[i] if isinstance(nombres[i], str) else f"Activo {i}",
+                "sector": sectores[i],
+                "tipo": tipos[i],
+                "asignacion": asignaciones[i],
+                "porcentaje": round(asignaciones[i] / capital * 100, 2),
+                "rendimiento_simulado": float(rendimientos[i])
+            }
+            for i in range(len(universe))
+        ],
+        "capital_total": capital,
+        "moneda": "EUR",
+        "fecha_creacion": "2023-08-01"
+    }
+
 def rebalance_portfolio(portfolio, market_changes):
     """
     Rebalancea un portfolio existente basado en cambios del mercado.
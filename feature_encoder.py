@@ -0,0 +1,158 @@
+"""
+feature_encoder.py
+Codificación vectorizada de activos en matrices de características para el predictor.
+"""
+from typing import Dict, Any, List, Optional, Tuple, Union, Sequence
+import numpy as np
+import pandas as pd
+
+# Mapeo de sectores a valores numéricos (valor por defecto: 'otros')
+SECTOR_MAPPING = {
+    "tecnología": 1.0,
+    "finanzas": 2.0,
+    "salud": 3.0,
+    "consumo": 4.0,
+    "energía": 5.0,
+    "industrial": 6.0,
+    "otros": 7.0
+}
+
+# Mapeo de tipos a valores numéricos (valor por defecto: 'otros')
+TIPO_MAPPING = {
+    "acción": 1.0,
+    "bono": 2.0,
+    "fondo": 3.0,
+    "etf": 4.0,
+    "cripto": 5.0,
+    "otros": 6.0
+}
+
+# Mapeo de riesgo a valores numéricos (valor por defecto: 'moderado')
+RIESGO_MAPPING = {
+    "bajo": 1.0,
+    "moderado": 2.0,
+    "alto": 3.0
+}
+
+# Características categóricas: nombre -> (mapeo, valor para categorías desconocidas)
+CATEGORICAL_FEATURES: Dict[str, Tuple[Dict[str, float], float]] = {
+    "sector": (SECTOR_MAPPING, 7.0),
+    "tipo": (TIPO_MAPPING, 6.0),
+    "riesgo": (RIESGO_MAPPING, 2.0)
+}
+
+# Características numéricas: nombre -> valor por defecto si no está disponible
+NUMERIC_FEATURES: Dict[str, float] = {
+    "precio": 50.0,
+    "volatilidad": 0.1
+}
+
+# Orden de las columnas de la matriz de características
+FEATURE_NAMES = list(CATEGORICAL_FEATURES) + list(NUMERIC_FEATURES)
+
+class FeatureEncoder:
+    """
+    Codificador de activos compilado una sola vez.
+
+    Las tablas de búsqueda se construyen al crear el codificador; después,
+    `transform` convierte una lista de activos o un DataFrame completo en una
+    matriz float contigua, factorizando cada columna categórica y pasando a
+    minúsculas solo sus valores únicos.
+    """
+
+    def __init__(
+        self,
+        categorical: Dict[str, Tuple[Dict[str, float], float]] = None,
+        numeric: Dict[str, float] = None
+    ):
+        """
+        Inicializa el codificador.
+
+        Args:
+            categorical: Características categóricas y su valor por defecto.
+            numeric: Características numéricas y su valor por defecto.
+        """
+        self.categorical = CATEGORICAL_FEATURES if categorical is None else categorical
+        self.numeric = NUMERIC_FEATURES if numeric is None else numeric
+        self.feature_names = list(self.categorical) + list(self.numeric)
+
+        # Tablas compiladas: índice de categorías y valores (+ valor por defecto al final)
+        self._indexes = {name: pd.Index(list(mapping)) for name, (mapping, _) in self.categorical.items()}
+        self._tables = {
+            name: np.append(np.fromiter(mapping.values(), dtype=float), default)
+            for name, (mapping, default) in self.categorical.items()
+        }
+
+    def encode_one(self, asset: Dict[str, Any]) -> List[float]:
+        """
+        Codifica un único activo (camino de baja latencia, sin pandas).
+        """
+        features = [
+            mapping.get(str(asset.get(name, '')).lower(), default)
+            for name, (mapping, default) in self.categorical.items()
+        ]
+        for name, default in self.numeric.items():
+            value = asset.get(name, default)
+            features.append(default if value is None else value)
+        return features
+
+    def transform(
+        self,
+        assets: Union[Sequence[Dict[str, Any]], pd.DataFrame],
+        out: Optional[np.ndarray] = None,
+        dtype=np.float64
+    ) -> np.ndarray:
+        """
+        Codifica una lista de activos o un DataFrame en una sola pasada.
+
+        Args:
+            assets: Lista de activos (dicts) o DataFrame con una fila por activo.
+            out: Matriz de destino ya reservada (por ejemplo, en memoria compartida).
+            dtype: Tipo de la matriz si no se indica `out` (float64 o float32).
+
+        Returns:
+            np.ndarray: Matriz (n_activos, n_características) contigua.
+        """
+        n_assets = len(assets)
+        shape = (n_assets, len(self.feature_names))
+        matrix = np.empty(shape, dtype=dtype) if out is None else out
+        if matrix.shape != shape:
+            raise ValueError(f"La matriz de destino debe tener forma {shape}")
+        is_frame = isinstance(assets, pd.DataFrame)
+
+        for j, name in enumerate(self.categorical):
+            if is_frame:
+                values = assets[name] if name in assets.columns else pd.Series([None] * n_assets)
+            else:
+                values = [a.get(name) for a in assets]
+            matrix[:, j] = self._encode_categorical(name, values)
+
+        offset = len(self.categorical)
+        for j, (name, default) in enumerate(self.numeric.items(), start=offset):
+            if is_frame:
+                column = assets[name].to_numpy(dtype=float) if name in assets.columns \
+                    else np.full(n_assets, default)
+            else:
+                column = np.array([a.get(name, default) for a in assets], dtype=float)
+            # Valores ausentes (None/NaN) -> valor por defecto
+            matrix[:, j] = np.where(np.isnan(column), default, column)
+
+        return matrix
+
+    def _encode_categorical(self, name: str, values) -> np.ndarray:
+        """
+        Codifica una columna categórica mediante factorización.
+        """
+        if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+            # Columna ya categórica: sus códigos hacen de factorización
+            codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+        else:
+            codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+        lowered = [str(u).lower() for u in uniques]
+        # -1 (desconocido o ausente) apunta al valor por defecto del final de la tabla
+        table = self._tables[name]
+        mapped = np.append(table[self._indexes[name].get_indexer(lowered)], table[-1])
+        return mapped[codes]
+
+# Codificador compartido con los mapeos por defecto
+default_encoder = FeatureEncoder()
@@ -0,0 +1,222 @@
+"""
+hyperparameter_search.py
+Búsqueda de hiperparámetros para los modelos del predictor financiero,
+con validación cruzada temporal y successive halving en un pool de procesos.
+"""
+from typing import Dict, Any, List, Optional, Tuple
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.preprocessing import StandardScaler
+
+from logger import NeoproyecttoLogger
+
+logger = NeoproyecttoLogger("neoproyectto.hyperparameter_search")
+
+# Configuración por defecto de los modelos (la usada sin búsqueda)
+DEFAULT_HYPERPARAMETERS: Dict[str, Any] = {
+    "linear_alpha": 0.0,        # regularización L2 de la regresión lineal (0 = mínimos cuadrados)
+    "n_estimators": 100,
+    "max_depth": None,
+    "min_samples_leaf": 1,
+    "max_features": 1.0
+}
+
+# Espacio de búsqueda; el número de árboles lo decide successive halving
+SEARCH_SPACE: Dict[str, List[Any]] = {
+    "linear_alpha": [0.0, 1.0, 10.0],
+    "max_depth": [None, 6, 12],
+    "min_samples_leaf": [1, 3, 10],
+    "max_features": [1.0, 0.6, "sqrt"]
+}
+
+def make_linear_model(params: Dict[str, Any]):
+    """
+    Regresión lineal de la configuración: mínimos cuadrados o Ridge si linear_alpha > 0.
+    """
+    alpha = params.get("linear_alpha", 0.0)
+    return Ridge(alpha=alpha) if alpha else LinearRegression()
+
+def make_forest(params: Dict[str, Any], n_jobs: Optional[int] = None,
+                n_estimators: Optional[int] = None) -> RandomForestRegressor:
+    """
+    Random Forest de la configuración.
+    """
+    return RandomForestRegressor(
+        n_estimators=n_estimators or params.get("n_estimators", 100),
+        max_depth=params.get("max_depth"),
+        min_samples_leaf=params.get("min_samples_leaf", 1),
+        max_features=params.get("max_features", 1.0),
+        random_state=42,
+        n_jobs=n_jobs
+    )
+
+def evaluate_fold(X: np.ndarray, y: np.ndarray, train: np.ndarray, test: np.ndarray,
+                  params: Dict[str, Any], n_estimators: int) -> float:
+    """
+    Entrena ambos modelos en un pliegue y devuelve el MAE de su mezcla
+    (0.3 lineal + 0.7 Random Forest, como FinancialPredictor) en el tramo de prueba.
+    """
+    scaler = StandardScaler().fit(X[train])
+    X_train, X_test = scaler.transform(X[train]), scaler.transform(X[test])
+    linear = make_linear_model(params).fit(X_train, y[train])
+    forest = make_forest(params, n_estimators=n_estimators).fit(X_train, y[train])
+    prediction = 0.3 * linear.predict(X_test) + 0.7 * forest.predict(X_test)
+    return float(np.mean(np.abs(prediction - y[test])))
+
+# Datos de la búsqueda en cada proceso del pool (se envían una vez por proceso)
+_worker_data: Dict[str, Any] = {}
+
+def _init_worker(X: np.ndarray, y: np.ndarray, folds: List[Tuple[np.ndarray, np.ndarray]]) -> None:
+    """Inicializador de los procesos del pool."""
+    _worker_data.update(X=X, y=y, folds=folds)
+
+def _evaluate_in_worker(params: Dict[str, Any], fold: int, n_estimators: int) -> float:
+    """Evalúa un candidato en un pliegue con los datos del proceso."""
+    train, test = _worker_data["folds"][fold]
+    return evaluate_fold(_worker_data["X"], _worker_data["y"], train, test, params, n_estimators)
+
+class HyperparameterSearch:
+    """
+    Búsqueda de hiperparámetros por successive halving.
+
+    Se muestrean `n_candidates` configuraciones del espacio de búsqueda (más la
+    configuración por defecto) y se evalúan con validación cruzada temporal
+    (cada pliegue entrena con el pasado y valida con el tramo siguiente). En
+    cada ronda solo sobrevive el mejor 1/`eta` de los candidatos y el número de
+    árboles se multiplica por `eta`, hasta quedar uno o llegar a `max_trees`.
+    Cada par (candidato, pliegue) es una tarea del pool de procesos.
+    """
+
+    def __init__(
+        self,
+        space: Optional[Dict[str, List[Any]]] = None,
+        n_candidates: int = 12,
+        n_splits: int = 3,
+        min_trees: int = 20,
+        max_trees: int = 180,
+        eta: int = 3,
+        n_jobs: Optional[int] = None,
+        seed: int = 42
+    ):
+        """
+        Inicializa la búsqueda.
+
+        Args:
+            space: Valores candidatos por hiperparámetro (por defecto SEARCH_SPACE).
+            n_candidates: Configuraciones muestreadas del espacio.
+            n_splits: Pliegues de la validación cruzada temporal.
+            min_trees: Árboles en la primera ronda.
+            max_trees: Árboles máximos (los de la configuración ganadora).
+            eta: Factor de reducción de candidatos y de aumento de árboles por ronda.
+            n_jobs: Procesos del pool (por defecto, todos los núcleos; 1 sin pool).
+            seed: Semilla del muestreo de candidatos.
+        """
+        self.space = SEARCH_SPACE if space is None else space
+        self.n_candidates = n_candidates
+        self.n_splits = n_splits
+        self.min_trees = min_trees
+        self.max_trees = max_trees
+        self.eta = eta
+        self.n_jobs = n_jobs
+        self.seed = seed
+
+    def candidates(self) -> List[Dict[str, Any]]:
+        """
+        Configuraciones a evaluar: la configuración por defecto y una muestra del espacio.
+        """
+        names = list(self.space)
+        grid = [dict(zip(names, values)) for values in itertools.product(*self.space.values())]
+        default = {name: DEFAULT_HYPERPARAMETERS.get(name) for name in names}
+        grid = [params for params in grid if params != default]
+
+        rng = np.random.default_rng(self.seed)
+        sample = rng.choice(len(grid), size=min(self.n_candidates, len(grid)), replace=False)
+        return [default] + [grid[i] for i in sorted(sample)]
+
+    def run(self, X: pd.DataFrame, y: pd.Series) -> Dict[str, Any]:
+        """
+        Ejecuta la búsqueda. Las filas deben estar en orden cronológico.
+
+        Args:
+            X: Características de entrenamiento.
+            y: Retorno objetivo.
+
+        Returns:
+            dict: 'params' (configuración ganadora, con n_estimators), 'cv_mae',
+                  'default_cv_mae' y el historial de rondas.
+        """
+        start_time = time.perf_counter()
+        X = np.ascontiguousarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+        folds = list(TimeSeriesSplit(n_splits=self.n_splits).split(X))
+        n_jobs = self.n_jobs or os.cpu_count() or 1
+
+        candidates = self.candidates()
+        trees = min(self.min_trees, self.max_trees)
+        history = []
+        default_mae = None
+
+        executor = None
+        if n_jobs > 1:
+            executor = ProcessPoolExecutor(
+                max_workers=min(n_jobs, len(candidates) * len(folds)),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(X, y, folds)
+            )
+        try:
+            while True:
+                scores = self._evaluate(executor, X, y, folds, candidates, trees)
+                if default_mae is None:
+                    default_mae = float(scores[0])
+                order = np.argsort(scores, kind="stable")
+                history.append({
+                    "trees": trees,
+                    "candidates": len(candidates),
+                    "best_cv_mae": float(scores[order[0]])
+                })
+                if len(candidates) == 1 or trees >= self.max_trees:
+                    break
+                keep = max(1, len(candidates) // self.eta)
+                candidates = [candidates[i] for i in order[:keep]]
+                trees = min(trees * self.eta, self.max_trees)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        best = candidates[int(order[0])]
+        result = {
+            "params": {**DEFAULT_HYPERPARAMETERS, **best, "n_estimators": trees},
+            "cv_mae": float(scores[order[0]]),
+            "default_cv_mae": default_mae,
+            "n_splits": self.n_splits,
+            "history": history,
+            "duration_s": round(time.perf_counter() - start_time, 3)
+        }
+        logger.info("Búsqueda de hiperparámetros completada",
+                  {"params": result["params"], "cv_mae": result["cv_mae"],
+                   "duration_s": result["duration_s"]})
+        return result
+
+    def _evaluate(self, executor: Optional[ProcessPoolExecutor], X: np.ndarray, y: np.ndarray,
+                  folds: List[Tuple[np.ndarray, np.ndarray]], candidates: List[Dict[str, Any]],
+                  trees: int) -> np.ndarray:
+        """
+        MAE medio de validación cruzada de cada candidato con `trees` árboles.
+        """
+        tasks = [(i, fold) for i in range(len(candidates)) for fold in range(len(folds))]
+        if executor is None:
+            maes = [evaluate_fold(X, y, *folds[fold], candidates[i], trees) for i, fold in tasks]
+        else:
+            futures = [executor.submit(_evaluate_in_worker, candidates[i], fold, trees)
+                       for i, fold in tasks]
+            maes = [future.result() for future in futures]
+        return np.asarray(maes).reshape(len(candidates), len(folds)).mean(axis=1)
@@ -1,12 +1,14 @@
 import json
 import logging
+import os
 from typing import Dict, Any, Optional
 
-from asset_selector import select_dividend_assets, select_all_assets
+from asset_selector import select_dividend_assets, select_all_assets, iter_select_all_assets, top_assets
 from diversify import build_portfolio
 from currency import convert_currency
-from scraper import fetch_dividend_data, fetch_all_market_data
-from ai_predictor import calcular_probabilidad_ganancia
+from scraper import fetch_dividend_universe, iter_market_universe, market_snapshots
+from ai_predictor import calcular_probabilidades_ganancia, model_registry
+from snapshot_scores import SnapshotScorer
 from validation import validate_investment_params, validate_autoinversion_params
 
 # Configuración de logging
@@ -15,6 +17,29 @@ logging.basicConfig(
     format='%(asctime)s [%(levelname)s] %(message)s'
 )
 
+# Probabilidades de ganancia de la instantánea de mercado por perfil de
+# riesgo; con cada instantánea nueva solo se puntúan los activos que cambian
+probabilidades_instantanea = SnapshotScorer(
+    lambda universo, perfil_riesgo: calcular_probabilidades_ganancia(universo, perfil_riesgo)
+)
+
+# Modo streaming de la autoinversión: tamaño de bloque (0 = universo completo en caché)
+STREAMING_CHUNK_SIZE = int(os.environ.get("NEOPROYECTTO_STREAMING_CHUNK_SIZE", "0"))
+
+def _activos_top_streaming(perfil_riesgo, preferencias, k=5, chunk_size=None):
+    """
+    Los `k` activos con mayor probabilidad de ganancia, procesando el universo
+    en bloques: cada bloque se filtra al llegar, solo se puntúan los activos
+    seleccionados y un heap acotado guarda los mejores.
+    """
+    def puntuar(bloques):
+        for bloque in bloques:
+            probabilidades = calcular_probabilidades_ganancia(bloque, perfil_riesgo, preferencias)
+            yield bloque.with_column("probabilidad_ganancia", probabilidades)
+
+    bloques = iter_market_universe(chunk_size or STREAMING_CHUNK_SIZE)
+    return top_assets(puntuar(iter_select_all_assets(bloques, perfil_riesgo, preferencias)), k)
+
 def gestionar_inversion_dividendos_mensuales(
     capital: float,
     moneda: str = 'EUR',
@@ -32,11 +57,8 @@ def gestionar_inversion_dividendos_mensuales(
         return {"error": error_msg}
         
     try:
-        activos = fetch_dividend_data()
-        if preferencias:
-            activos = [a for a in activos if all(
-                preferencias.get(k, True) == a.get(k, True) for k in preferencias
-            )]
+        # Universo columnar: la selección son máscaras sobre columnas
+        activos = fetch_dividend_universe()
         activos_seleccionados = select_dividend_assets(activos, preferencias)
         cartera = build_portfolio(activos_seleccionados, capital)
         if moneda != 'EUR':
@@ -73,14 +95,21 @@ def autoinversion_ia_global(
         return {"error": error_auto}
     
     try:
-        activos = fetch_all_market_data()
-        for activo in activos:
-            activo["probabilidad_ganancia"] = calcular_probabilidad_ganancia(
-                activo, perfil_riesgo, preferencias_avanzadas
+        if STREAMING_CHUNK_SIZE:
+            activos_top = _activos_top_streaming(perfil_riesgo, preferencias_avanzadas)
+        else:
+            instantanea = market_snapshots.get()
+            predictor = model_registry.get_predictor()
+            # Los indicadores técnicos cambian con cada día nuevo del historial de precios
+            version = predictor.model_version
+            if model_registry.price_history_version is not None:
+                version = f"{version}@{model_registry.price_history_version}"
+            probabilidades = probabilidades_instantanea.scores(
+                instantanea, perfil_riesgo, version, predictor.encoder.feature_names
             )
-        activos_seleccionados = select_all_assets(activos, perfil_riesgo, preferencias_avanzadas)
-        activos_seleccionados = sorted(activos_seleccionados, key=lambda x: x["probabilidad_ganancia"], reverse=True)
-        activos_top = activos_seleccionados[:5]
+            activos = instantanea.universe.with_column("probabilidad_ganancia", probabilidades)
+            activos_seleccionados = select_all_assets(activos, perfil_riesgo, preferencias_avanzadas)
+            activos_top = activos_seleccionados.top("probabilidad_ganancia", 5)
         cartera = build_portfolio(activos_top, capital)
         if moneda != 'EUR':
             cartera = convert_currency(cartera, 'EUR', moneda)
@@ -0,0 +1,130 @@
+"""
+market_generator.py
+Generador vectorizado y reproducible de mercados sintéticos (de 10^3 a 10^6
+activos) con el esquema de activos del proyecto y, opcionalmente, historiales
+de precios correlacionados, para pruebas de carga y benchmarks.
+"""
+from typing import Dict, Any, List, Sequence, Union
+import numpy as np
+import pandas as pd
+
+from asset_universe import AssetUniverse, CATEGORICAL_COLUMNS
+
+SECTORES = ["tecnología", "finanzas", "salud", "consumo", "energía", "industrial", "inmobiliario", "cripto"]
+TIPOS = ["acción", "bono", "fondo", "ETF", "REIT", "criptomoneda"]
+RIESGOS = ["bajo", "moderado", "alto"]
+
+# Por tipo: probabilidad, volatilidad anual típica y probabilidad de dividendo mensual
+_TIPO_PROBABILIDAD = np.array([0.45, 0.15, 0.12, 0.13, 0.08, 0.07])
+_TIPO_VOLATILIDAD = np.array([0.28, 0.07, 0.15, 0.18, 0.22, 0.75])
+_TIPO_DIVIDENDO = np.array([0.04, 0.35, 0.10, 0.15, 0.60, 0.0])
+
+# Sector forzado por tipo (-1 = sector aleatorio)
+_TIPO_SECTOR = np.array([-1, -1, -1, -1, SECTORES.index("inmobiliario"), SECTORES.index("cripto")])
+
+# Rendimiento esperado (%) por nivel de riesgo
+_RIESGO_RENDIMIENTO = np.array([3.0, 7.0, 10.0])
+
+Seed = Union[int, Sequence[int]]
+
+def generate_universe(n_assets: int, seed: Seed = 0, offset: int = 0) -> AssetUniverse:
+    """
+    Genera un universo sintético columnar.
+
+    Las columnas son las del esquema de activos (nombre, sector, tipo, riesgo,
+    rendimiento_simulado, dividendos_mensuales) más precio y volatilidad, que
+    usa el predictor. El riesgo sale de la volatilidad (umbrales fijos) y el
+    rendimiento, del riesgo, de modo que los datos tienen estructura.
+
+    Args:
+        n_assets: Número de activos.
+        seed: Semilla (entero o secuencia de enteros).
+        offset: Número del primer activo (para generar por bloques con nombres únicos).
+
+    Returns:
+        AssetUniverse: Universo con sector, tipo y riesgo categóricos.
+    """
+    rng = np.random.default_rng(seed)
+    tipo = rng.choice(len(TIPOS), size=n_assets, p=_TIPO_PROBABILIDAD)
+    sector = rng.integers(0, len(SECTORES) - 2, n_assets)
+    sector = np.where(_TIPO_SECTOR[tipo] >= 0, _TIPO_SECTOR[tipo], sector)
+    volatilidad = _TIPO_VOLATILIDAD[tipo] * rng.lognormal(0.0, 0.35, n_assets)
+    riesgo = np.digitize(volatilidad, [0.12, 0.35])
+    rendimiento = _RIESGO_RENDIMIENTO[riesgo] + rng.normal(0.0, 1.0, n_assets) * volatilidad * 30
+    frame = pd.DataFrame({
+        "nombre": [f"SYN{i:07d}" for i in range(offset, offset + n_assets)],
+        "sector": pd.Categorical.from_codes(sector, SECTORES),
+        "tipo": pd.Categorical.from_codes(tipo, TIPOS),
+        "riesgo": pd.Categorical.from_codes(riesgo, RIESGOS),
+        "rendimiento_simulado": np.round(rendimiento, 2),
+        "dividendos_mensuales": rng.random(n_assets) < _TIPO_DIVIDENDO[tipo],
+        "precio": np.round(np.exp(rng.normal(3.5, 1.0, n_assets)), 2),
+        "volatilidad": np.round(volatilidad, 4)
+    })
+    return AssetUniverse(frame)
+
+def generate_assets(n_assets: int, seed: Seed = 0, offset: int = 0) -> List[Dict[str, Any]]:
+    """
+    Igual que `generate_universe`, como lista de activos (dicts).
+    """
+    frame = generate_universe(n_assets, seed, offset).frame
+    columns = [frame[name].astype(object).to_numpy() if name in CATEGORICAL_COLUMNS
+               else frame[name].to_numpy().tolist() for name in frame.columns]
+    names = list(frame.columns)
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+def generate_price_history(
+    universe: AssetUniverse,
+    n_days: int = 252,
+    seed: Seed = 0,
+    market_weight: float = 0.5,
+    sector_weight: float = 0.3,
+    dtype=np.float32
+) -> np.ndarray:
+    """
+    Historial diario de precios correlacionado de los activos del universo.
+
+    El retorno diario de cada activo combina un factor de mercado común, un
+    factor de su sector y un componente propio, escalados a su volatilidad
+    anual, de modo que los activos del mismo sector están más correlacionados.
+    El último precio coincide con la columna 'precio'.
+
+    Args:
+        universe: Universo (con sector, volatilidad y precio).
+        n_days: Sesiones de historial.
+        seed: Semilla.
+        market_weight: Peso (varianza) del factor de mercado.
+        sector_weight: Peso (varianza) del factor sectorial.
+        dtype: Tipo del resultado (float32 por defecto: 10^6 activos x 252 días ocupan ~1 GB).
+
+    Returns:
+        np.ndarray: Matriz (n_activos, n_días), como espera technical_indicators.
+    """
+    rng = np.random.default_rng(seed)
+    frame = universe.frame
+    n_assets = len(frame)
+    sector = frame["sector"].cat.codes.to_numpy()
+    daily_vol = (frame["volatilidad"].to_numpy(dtype=float) / np.sqrt(252)).astype(dtype)[:, np.newaxis]
+    idio_weight = max(0.0, 1.0 - market_weight - sector_weight)
+
+    market = rng.standard_normal(n_days).astype(dtype)
+    sectors = rng.standard_normal((len(frame["sector"].cat.categories), n_days)).astype(dtype)
+    market *= np.sqrt(market_weight)
+    sectors *= np.sqrt(sector_weight)
+    prices = rng.standard_normal((n_assets, n_days), dtype=dtype)
+    last_price = frame["precio"].to_numpy(dtype=dtype)
+
+    # Por bloques de filas, para no crear temporales del tamaño de la matriz
+    block_size = 65536
+    for start in range(0, n_assets, block_size):
+        block = prices[start:start + block_size]
+        block *= np.sqrt(idio_weight)
+        block += market
+        block += sectors[sector[start:start + block_size]]
+        block *= daily_vol[start:start + block_size]
+        # Precios hacia atrás desde el último (el precio actual del activo)
+        np.cumsum(block, axis=1, out=block)
+        block -= block[:, -1:]
+        np.exp(block, out=block)
+        block *= last_price[start:start + block_size, np.newaxis]
+    return prices
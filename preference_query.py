@@ -0,0 +1,493 @@
+"""
+preference_query.py
+Motor de consultas de preferencias: las preferencias se compilan una vez en
+predicados que se evalúan vectorizados sobre las columnas del universo, en
+el orden que decide un pequeño planificador.
+
+Sintaxis de las preferencias (clave -> condición):
+    {"sector": "salud"}                         igualdad (como hasta ahora)
+    {"precio": {"<": 50}}                       rango: <, <=, >, >=
+    {"volatilidad": {"between": [0.1, 0.3]}}    entre dos valores (incluidos)
+    {"tipo": {"in": ["ETF", "fondo"]}}          pertenencia a un conjunto
+    {"sector": {"not_in": ["cripto"]}}          no pertenencia
+    {"riesgo": {"!=": "alto"}}                  distinto
+    {"sector": {"not": {"in": ["cripto"]}}}     negación de cualquier condición
+Varios operadores en la misma clave se combinan con AND
+({"precio": {">=": 10, "<": 50}}).
+"""
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
+from collections import OrderedDict
+import json
+import operator
+import threading
+import numpy as np
+import pandas as pd
+
+from error_handling import ValidationError
+from asset_universe import AssetUniverse
+
+# Filas que se evalúan para estimar la selectividad de un predicado sin índice
+_SAMPLE_SIZE = 256
+
+# Por debajo de esta fracción de candidatos, los predicados se evalúan solo
+# en las filas candidatas en lugar de sobre la columna entera
+_SPARSE_FRACTION = 0.02
+
+# Consultas compiladas que se conservan (las más recientes)
+_CACHE_SIZE = 256
+
+_COMPARISONS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+def _is_scalar(value: Any) -> bool:
+    return not isinstance(value, (list, tuple, set, frozenset, dict))
+
+def _column_values(universe: AssetUniverse, column: str, rows: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    """
+    Valores de una columna en las filas `rows` (todas si es None), o None si
+    la columna no existe. Las categóricas se decodifican solo en esas filas.
+    """
+    if column not in universe.frame.columns:
+        return None
+    series = universe.frame[column]
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes = series.cat.codes.to_numpy()
+        if rows is not None:
+            codes = codes[rows]
+        # El código -1 (sin valor) cae en el None añadido al final
+        return np.append(series.cat.categories.to_numpy(dtype=object), None)[codes]
+    values = series.to_numpy()
+    return values if rows is None else values[rows]
+
+def _elementwise(values: np.ndarray, test) -> np.ndarray:
+    """
+    `test` aplicado a cada valor, para tipos que no admiten la operación
+    vectorizada (los valores que no se pueden comparar no cumplen).
+    """
+    def check(value):
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            return False
+        try:
+            return bool(test(value))
+        except TypeError:
+            return False
+    return np.fromiter((check(value) for value in values), dtype=bool, count=len(values))
+
+class Predicate:
+    """
+    Condición sobre un atributo de los activos.
+
+    `evaluate` la resuelve sobre las columnas de un universo (en las filas
+    candidatas o en todas) y `matches`, sobre un activo (dict), con la misma
+    semántica que `a.get(clave)`: un atributo ausente no cumple ninguna
+    comparación.
+    """
+
+    column: str
+
+    def evaluate(self, universe: AssetUniverse, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Args:
+            universe: Universo de activos.
+            rows: Filas candidatas (None: todas).
+
+        Returns:
+            np.ndarray: Máscara booleana alineada con `rows` (o con el universo).
+        """
+        raise NotImplementedError
+
+    def matches(self, asset: Dict[str, Any]) -> bool:
+        raise NotImplementedError
+
+    def packed(self, universe: AssetUniverse) -> Optional[np.ndarray]:
+        """Bitmap del índice de atributos que resuelve el predicado (None si no hay)."""
+        return None
+
+    def selectivity(self, universe: AssetUniverse) -> float:
+        """
+        Fracción estimada de activos que cumplen el predicado (sobre una
+        muestra equiespaciada del universo).
+        """
+        n_assets = len(universe)
+        if n_assets == 0:
+            return 0.0
+        sample = np.linspace(0, n_assets - 1, num=min(n_assets, _SAMPLE_SIZE)).astype(np.intp)
+        return float(self.evaluate(universe, sample).mean())
+
+    def _indexed(self, universe: AssetUniverse) -> bool:
+        return self.column in universe.index.columns
+
+    @staticmethod
+    def _size(universe: AssetUniverse, rows: Optional[np.ndarray]) -> int:
+        return len(universe) if rows is None else len(rows)
+
+class _BitmapPredicate(Predicate):
+    """
+    Predicado que, sobre un atributo indexado, se resuelve con el bitmap del
+    índice invertido (y su selectividad es exacta).
+    """
+
+    def bitmap(self, universe: AssetUniverse) -> np.ndarray:
+        raise NotImplementedError
+
+    def scan(self, values: Optional[np.ndarray], size: int) -> np.ndarray:
+        raise NotImplementedError
+
+    def packed(self, universe):
+        return self.bitmap(universe) if self._indexed(universe) else None
+
+    def evaluate(self, universe: AssetUniverse, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        if self._indexed(universe):
+            index = universe.index
+            bitmap = self.bitmap(universe)
+            return index.to_mask(bitmap) if rows is None else index.contains(bitmap, rows)
+        return self.scan(_column_values(universe, self.column, rows), self._size(universe, rows))
+
+    def selectivity(self, universe: AssetUniverse) -> float:
+        if len(universe) and self._indexed(universe):
+            return universe.index.count(self.bitmap(universe)) / len(universe)
+        return super().selectivity(universe)
+
+class Equals(_BitmapPredicate):
+    """`a.get(column) == value` (None: atributo ausente)."""
+
+    def __init__(self, column: str, value: Any):
+        self.column = column
+        self.value = value
+
+    def bitmap(self, universe):
+        return universe.index.bitmap(self.column, self.value)
+
+    def scan(self, values, size):
+        if values is None:
+            return np.full(size, self.value is None)
+        if self.value is None:
+            return np.asarray(pd.isna(values), dtype=bool)
+        if not _is_scalar(self.value):
+            return np.fromiter((value == self.value for value in values), dtype=bool, count=size)
+        return np.asarray(values == self.value, dtype=bool)
+
+    def matches(self, asset):
+        return asset.get(self.column) == self.value
+
+    def __repr__(self):
+        return f"{self.column} == {self.value!r}"
+
+class InSet(_BitmapPredicate):
+    """`a.get(column) in values`."""
+
+    def __init__(self, column: str, values: Iterable[Any]):
+        self.column = column
+        self.values = tuple(values)
+
+    def bitmap(self, universe):
+        index = universe.index
+        result = np.zeros((len(universe) + 7) // 8, dtype=np.uint8)
+        for value in self.values:
+            result |= index.bitmap(self.column, value)
+        return result
+
+    def scan(self, values, size):
+        if values is None:
+            return np.full(size, None in self.values)
+        return pd.Series(values, copy=False).isin(self.values).to_numpy(dtype=bool)
+
+    def matches(self, asset):
+        return asset.get(self.column) in self.values
+
+    def __repr__(self):
+        return f"{self.column} in {list(self.values)!r}"
+
+class Truthy(_BitmapPredicate):
+    """`a.get(column, False)` es verdadero."""
+
+    def __init__(self, column: str):
+        self.column = column
+
+    def bitmap(self, universe):
+        return universe.index.truthy(self.column)
+
+    def scan(self, values, size):
+        if values is None:
+            return np.zeros(size, dtype=bool)
+        return np.asarray(pd.notna(values), dtype=bool) & values.astype(bool)
+
+    def matches(self, asset):
+        return bool(asset.get(self.column, False))
+
+    def __repr__(self):
+        return f"{self.column}"
+
+class Compare(Predicate):
+    """`a.get(column) <op> operand` con <, <=, >, >=."""
+
+    def __init__(self, column: str, op: str, operand: Any):
+        self.column = column
+        self.op = op
+        self.operand = operand
+        self._compare = _COMPARISONS[op]
+
+    def evaluate(self, universe, rows=None):
+        values = _column_values(universe, self.column, rows)
+        if values is None:
+            return np.zeros(self._size(universe, rows), dtype=bool)
+        try:
+            # Columnas numéricas: una comparación vectorizada (NaN no cumple)
+            return np.asarray(self._compare(values, self.operand), dtype=bool)
+        except TypeError:
+            return _elementwise(values, lambda value: self._compare(value, self.operand))
+
+    def matches(self, asset):
+        value = asset.get(self.column)
+        if value is None:
+            return False
+        try:
+            return bool(self._compare(value, self.operand))
+        except TypeError:
+            return False
+
+    def __repr__(self):
+        return f"{self.column} {self.op} {self.operand!r}"
+
+class Between(Predicate):
+    """`low <= a.get(column) <= high`."""
+
+    def __init__(self, column: str, low: Any, high: Any):
+        self.column = column
+        self.low = low
+        self.high = high
+
+    def evaluate(self, universe, rows=None):
+        values = _column_values(universe, self.column, rows)
+        if values is None:
+            return np.zeros(self._size(universe, rows), dtype=bool)
+        try:
+            return np.asarray((values >= self.low) & (values <= self.high), dtype=bool)
+        except TypeError:
+            return _elementwise(values, lambda value: self.low <= value <= self.high)
+
+    def matches(self, asset):
+        value = asset.get(self.column)
+        if value is None:
+            return False
+        try:
+            return bool(self.low <= value <= self.high)
+        except TypeError:
+            return False
+
+    def __repr__(self):
+        return f"{self.column} between [{self.low!r}, {self.high!r}]"
+
+class Not(Predicate):
+    """Negación de un predicado (los activos sin el atributo la cumplen)."""
+
+    def __init__(self, predicate: Predicate):
+        self.predicate = predicate
+        self.column = predicate.column
+
+    def evaluate(self, universe, rows=None):
+        return ~self.predicate.evaluate(universe, rows)
+
+    def packed(self, universe):
+        bitmap = self.predicate.packed(universe)
+        return None if bitmap is None else universe.index.complement(bitmap)
+
+    def matches(self, asset):
+        return not self.predicate.matches(asset)
+
+    def selectivity(self, universe):
+        return 1.0 - self.predicate.selectivity(universe)
+
+    def __repr__(self):
+        return f"not ({self.predicate!r})"
+
+class PreferenceQuery:
+    """
+    Conjunción de predicados compilada a partir de unas preferencias.
+
+    Sobre un universo, el planificador ordena los predicados por
+    selectividad estimada (exacta con el índice de atributos, por muestreo
+    en el resto). Los que resuelve el índice se combinan primero como
+    bitmaps; los demás se aplican del más al menos selectivo, sobre la
+    columna entera mientras quedan muchos candidatos y, cuando quedan pocos,
+    solo sobre las filas candidatas.
+    """
+
+    def __init__(self, predicates: Sequence[Predicate] = ()):
+        self.predicates: Tuple[Predicate, ...] = tuple(predicates)
+
+    def __len__(self) -> int:
+        return len(self.predicates)
+
+    def __repr__(self):
+        return " and ".join(repr(predicate) for predicate in self.predicates) or "true"
+
+    def and_(self, *predicates: Predicate) -> 'PreferenceQuery':
+        """Consulta con predicados adicionales."""
+        return PreferenceQuery(self.predicates + predicates)
+
+    def plan(self, universe: AssetUniverse) -> List[Tuple[float, Predicate]]:
+        """
+        Predicados en orden de evaluación, con su selectividad estimada.
+        """
+        return self._order(universe, self.predicates)
+
+    @staticmethod
+    def _order(universe: AssetUniverse, predicates: Sequence[Predicate]) -> List[Tuple[float, Predicate]]:
+        estimates = [(predicate.selectivity(universe), predicate) for predicate in predicates]
+        return sorted(estimates, key=lambda estimate: estimate[0])
+
+    def mask(self, universe: AssetUniverse) -> np.ndarray:
+        """
+        Máscara de los activos del universo que cumplen la consulta.
+        """
+        n_assets = len(universe)
+        if not self.predicates:
+            return np.ones(n_assets, dtype=bool)
+
+        # Atributos indexados: AND de bitmaps empaquetados (n/8 bytes cada
+        # uno), en cualquier orden
+        bitmap = None
+        rest = []
+        for predicate in self.predicates:
+            packed = predicate.packed(universe)
+            if packed is None:
+                rest.append(predicate)
+            else:
+                bitmap = packed.copy() if bitmap is None else np.bitwise_and(bitmap, packed, out=bitmap)
+        mask = None if bitmap is None else universe.index.to_mask(bitmap)
+
+        # Resto, del más al menos selectivo: sobre la columna entera mientras
+        # quedan muchos candidatos y, a partir de ahí, solo sobre las filas candidatas
+        if len(rest) > 1:
+            rest = [predicate for _, predicate in self._order(universe, rest)]
+        rows = None
+        for predicate in rest:
+            if rows is None and mask is not None and np.count_nonzero(mask) < _SPARSE_FRACTION * n_assets:
+                rows = np.flatnonzero(mask)
+            if rows is None:
+                keep = predicate.evaluate(universe)
+                mask = keep if mask is None else np.logical_and(mask, keep, out=mask)
+            else:
+                rows = rows[predicate.evaluate(universe, rows)]
+                if len(rows) == 0:
+                    break
+        if rows is not None:
+            mask = np.zeros(n_assets, dtype=bool)
+            mask[rows] = True
+        return mask
+
+    def matches(self, asset: Dict[str, Any]) -> bool:
+        """Si un activo (dict) cumple la consulta."""
+        return all(predicate.matches(asset) for predicate in self.predicates)
+
+    def filter(self, assets):
+        """
+        Activos que cumplen la consulta.
+
+        Args:
+            assets (list | AssetUniverse): Activos.
+
+        Returns:
+            list | AssetUniverse: Activos seleccionados (del mismo tipo que `assets`).
+        """
+        if isinstance(assets, AssetUniverse):
+            return assets.take(self.mask(assets))
+        return [asset for asset in assets if self.matches(asset)]
+
+class _All(Predicate):
+    """Conjunción de predicados sobre un atributo (operando de 'not')."""
+
+    def __init__(self, column: str, predicates: Sequence[Predicate]):
+        self.column = column
+        self.predicates = tuple(predicates)
+
+    def evaluate(self, universe, rows=None):
+        result = self.predicates[0].evaluate(universe, rows)
+        for predicate in self.predicates[1:]:
+            result &= predicate.evaluate(universe, rows)
+        return result
+
+    def matches(self, asset):
+        return all(predicate.matches(asset) for predicate in self.predicates)
+
+    def __repr__(self):
+        return "(" + " and ".join(repr(predicate) for predicate in self.predicates) + ")"
+
+def _invalid(message: str, clave: str, condicion: Any) -> ValidationError:
+    return ValidationError(message, {"clave": clave, "condicion": repr(condicion)})
+
+def _compile_condition(clave: str, condicion: Any) -> List[Predicate]:
+    """Predicados de la condición de una preferencia."""
+    if not isinstance(condicion, dict):
+        return [Equals(clave, condicion)]
+    if not condicion:
+        raise _invalid("Condición de preferencia vacía", clave, condicion)
+    predicates: List[Predicate] = []
+    for op, operand in condicion.items():
+        if op in _COMPARISONS:
+            if operand is None or not _is_scalar(operand):
+                raise _invalid(f"El operador '{op}' necesita un valor", clave, condicion)
+            predicates.append(Compare(clave, op, operand))
+        elif op == "between":
+            if not isinstance(operand, (list, tuple)) or len(operand) != 2 or None in operand:
+                raise _invalid("'between' necesita dos valores [mínimo, máximo]", clave, condicion)
+            predicates.append(Between(clave, operand[0], operand[1]))
+        elif op in ("in", "not_in"):
+            if not isinstance(operand, (list, tuple, set, frozenset)) or not all(_is_scalar(v) for v in operand):
+                raise _invalid(f"'{op}' necesita una lista de valores", clave, condicion)
+            predicate = InSet(clave, operand)
+            predicates.append(predicate if op == "in" else Not(predicate))
+        elif op == "==":
+            predicates.append(Equals(clave, operand))
+        elif op == "!=":
+            predicates.append(Not(Equals(clave, operand)))
+        elif op == "not":
+            inner = _compile_condition(clave, operand)
+            predicates.append(Not(inner[0] if len(inner) == 1 else _All(clave, inner)))
+        else:
+            raise _invalid(f"Operador de preferencia desconocido: '{op}'", clave, condicion)
+    return predicates
+
+_compiled: 'OrderedDict[str, PreferenceQuery]' = OrderedDict()
+_compiled_lock = threading.Lock()
+
+def compile_preferences(preferencias: Optional[Dict[str, Any]]) -> PreferenceQuery:
+    """
+    Compila unas preferencias (ver la sintaxis en el docstring del módulo).
+
+    Las consultas compiladas se guardan por su contenido, así que las
+    preferencias repetidas entre peticiones no se vuelven a compilar.
+
+    Args:
+        preferencias (dict, opcional): Preferencias del cliente.
+
+    Returns:
+        PreferenceQuery: Consulta compilada.
+
+    Raises:
+        ValidationError: Si una condición no es válida.
+    """
+    if not preferencias:
+        return PreferenceQuery()
+    try:
+        key = json.dumps(preferencias, sort_keys=True, default=repr)
+    except TypeError:
+        key = None
+    if key is not None:
+        with _compiled_lock:
+            query = _compiled.get(key)
+            if query is not None:
+                _compiled.move_to_end(key)
+                return query
+
+    predicates: List[Predicate] = []
+    for clave, condicion in preferencias.items():
+        predicates.extend(_compile_condition(clave, condicion))
+    query = PreferenceQuery(predicates)
+
+    if key is not None:
+        with _compiled_lock:
+            _compiled[key] = query
+            while len(_compiled) > _CACHE_SIZE:
+                _compiled.popitem(last=False)
+    return query
@@ -0,0 +1,282 @@
+"""
+price_store.py
+Almacén en disco del historial diario de precios (barras por activo) sobre
+ficheros planos de NumPy con memoria mapeada.
+"""
+from typing import Dict, Any, List, Optional, Sequence, Union
+import json
+import os
+import numpy as np
+import pandas as pd
+
+from logger import NeoproyecttoLogger
+from error_handling import InvestmentError, ValidationError
+from technical_indicators import MIN_HISTORY, indicator_training_frame
+
+logger = NeoproyecttoLogger("neoproyectto.price_store")
+
+# Campos de cada barra diaria
+DEFAULT_FIELDS = ("open", "high", "low", "close", "volume")
+
+DateLike = Union[str, np.datetime64, pd.Timestamp]
+
+def _day(date: DateLike) -> np.datetime64:
+    """Fecha como datetime64[D]."""
+    return np.datetime64(pd.Timestamp(date).date(), 'D')
+
+class PriceStore:
+    """
+    Historial diario de precios de un conjunto fijo de tickers.
+
+    Cada campo es un fichero binario con una fila por día y una columna por
+    ticker (orden día-mayor), de modo que escribir un día es añadir una fila
+    al final del fichero y un rango de fechas es un bloque contiguo. Las
+    lecturas devuelven vistas (tickers x días) del fichero mapeado en memoria,
+    sin copiarlo, y `meta.json` guarda cuántos días están confirmados: un
+    append interrumpido no deja datos a medias visibles.
+
+    Estructura del directorio:
+        meta.json      tickers, campos, tipo y número de días
+        dates.bin      fechas (int64, días desde 1970-01-01)
+        <campo>.bin    valores (n_días, n_tickers)
+    """
+
+    def __init__(self, path: str):
+        """
+        Abre un almacén existente.
+
+        Args:
+            path: Directorio del almacén.
+        """
+        self.path = path
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.exists(meta_path):
+            raise InvestmentError("Almacén de precios no encontrado", {"path": path})
+        with open(meta_path) as f:
+            meta = json.load(f)
+        self.tickers: List[str] = meta["tickers"]
+        self.fields: List[str] = meta["fields"]
+        self.dtype = np.dtype(meta["dtype"])
+        self.n_days: int = meta["n_days"]
+        self._columns = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self._maps: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def create(cls, path: str, tickers: Sequence[str], fields: Sequence[str] = DEFAULT_FIELDS,
+               dtype: str = "float32") -> 'PriceStore':
+        """
+        Crea un almacén vacío.
+
+        Args:
+            path: Directorio del almacén (se crea si no existe).
+            tickers: Tickers, en el orden de las columnas.
+            fields: Campos de cada barra.
+            dtype: Tipo de los valores ('float32' o 'float64').
+        """
+        if len(set(tickers)) != len(tickers):
+            raise ValidationError("Tickers duplicados en el almacén de precios", {"path": path})
+        os.makedirs(path, exist_ok=True)
+        for name in ["dates", *fields]:
+            open(os.path.join(path, f"{name}.bin"), "wb").close()
+        cls._write_meta(path, {"tickers": list(tickers), "fields": list(fields),
+                               "dtype": np.dtype(dtype).str, "n_days": 0})
+        return cls(path)
+
+    @staticmethod
+    def _write_meta(path: str, meta: Dict[str, Any]) -> None:
+        """Escribe meta.json de forma atómica."""
+        tmp_path = os.path.join(path, "meta.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(path, "meta.json"))
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.bin")
+
+    def _map(self, name: str) -> np.ndarray:
+        """
+        Fichero mapeado en memoria (solo lectura) con los días confirmados.
+        """
+        cached = self._maps.get(name)
+        if cached is not None and len(cached) == self.n_days:
+            return cached
+        if name == "dates":
+            dtype, shape = np.dtype(np.int64), (self.n_days,)
+        else:
+            dtype, shape = self.dtype, (self.n_days, len(self.tickers))
+        if self.n_days == 0:
+            array = np.empty(shape, dtype=dtype)
+        else:
+            array = np.memmap(self._file(name), dtype=dtype, mode="r", shape=shape)
+        self._maps[name] = array
+        return array
+
+    @property
+    def dates(self) -> np.ndarray:
+        """Fechas almacenadas (datetime64[D])."""
+        return self._map("dates").view("datetime64[D]")
+
+    def append(self, date: DateLike, bars: Union[Dict[str, Any], pd.DataFrame]) -> None:
+        """
+        Añade las barras de un día.
+
+        Args:
+            date: Fecha, posterior a la última almacenada.
+            bars: Campo -> valores por ticker (array en el orden de `tickers`
+                  o dict/Series ticker -> valor), o DataFrame con una fila por
+                  ticker y una columna por campo. Los tickers o campos que
+                  faltan se guardan como NaN.
+        """
+        if isinstance(bars, pd.DataFrame):
+            bars = {field: bars[field] for field in self.fields if field in bars.columns}
+        rows = {field: self._row(bars.get(field))[np.newaxis, :] for field in self.fields}
+        self.append_many([date], rows)
+
+    def append_many(self, dates: Sequence[DateLike], bars: Dict[str, np.ndarray]) -> None:
+        """
+        Añade varios días de una vez (carga inicial o recuperación de huecos).
+
+        Args:
+            dates: Fechas crecientes, posteriores a la última almacenada.
+            bars: Campo -> matriz (n_fechas, n_tickers).
+        """
+        days = np.array([_day(date) for date in dates], dtype='datetime64[D]')
+        if len(days) == 0:
+            return
+        last = self.dates[-1] if self.n_days else None
+        if np.any(np.diff(days) <= np.timedelta64(0, 'D')) or (last is not None and days[0] <= last):
+            raise ValidationError("Las fechas del almacén de precios deben ser crecientes",
+                                {"last": str(last), "first": str(days[0])})
+
+        shape = (len(days), len(self.tickers))
+        blocks = {}
+        for field in self.fields:
+            values = bars.get(field)
+            block = np.full(shape, np.nan, dtype=self.dtype) if values is None \
+                else np.ascontiguousarray(values, dtype=self.dtype)
+            if block.shape != shape:
+                raise ValidationError("Forma de las barras incorrecta",
+                                    {"field": field, "expected": list(shape), "shape": list(block.shape)})
+            blocks[field] = block
+
+        # Primero los datos y después meta.json: si el proceso se interrumpe,
+        # las filas sobrantes de un append anterior se descartan aquí
+        row_bytes = {"dates": 8, **{field: len(self.tickers) * self.dtype.itemsize for field in self.fields}}
+        for name, block in [("dates", days.astype(np.int64)), *blocks.items()]:
+            with open(self._file(name), "r+b") as f:
+                f.truncate(self.n_days * row_bytes[name])
+                f.seek(0, os.SEEK_END)
+                f.write(block.tobytes())
+
+        self._write_meta(self.path, {"tickers": self.tickers, "fields": self.fields,
+                                     "dtype": self.dtype.str, "n_days": self.n_days + len(days)})
+        self.n_days += len(days)
+
+    def _row(self, values: Any) -> np.ndarray:
+        """Valores de un campo para un día, en el orden de `tickers`."""
+        row = np.full(len(self.tickers), np.nan, dtype=self.dtype)
+        if values is None:
+            return row
+        if isinstance(values, (dict, pd.Series)):
+            for ticker, value in values.items():
+                column = self._columns.get(ticker)
+                if column is not None:
+                    row[column] = value
+            return row
+        row[:] = values
+        return row
+
+    def _date_range(self, start: Optional[DateLike], end: Optional[DateLike]) -> slice:
+        """Filas del rango de fechas [start, end] (ambos incluidos)."""
+        dates = self._map("dates")
+        first = 0 if start is None else int(np.searchsorted(dates, _day(start).astype(np.int64), side="left"))
+        stop = self.n_days if end is None else int(np.searchsorted(dates, _day(end).astype(np.int64), side="right"))
+        return slice(first, stop)
+
+    def _ticker_index(self, tickers: Optional[Sequence[str]]) -> Union[slice, np.ndarray]:
+        """
+        Columnas de los tickers: un slice (vista sin copia) si están
+        equiespaciados en el almacén, o un array de índices.
+        """
+        if tickers is None:
+            return slice(None)
+        try:
+            columns = np.array([self._columns[ticker] for ticker in tickers], dtype=np.intp)
+        except KeyError as e:
+            raise InvestmentError("Ticker no encontrado en el almacén de precios", {"ticker": e.args[0]})
+        if len(columns) == 1:
+            return slice(int(columns[0]), int(columns[0]) + 1)
+        if len(columns) > 1:
+            steps = np.diff(columns)
+            if steps[0] > 0 and np.all(steps == steps[0]):
+                return slice(int(columns[0]), int(columns[-1]) + 1, int(steps[0]))
+        return columns
+
+    def read(self, field: str = "close", tickers: Optional[Sequence[str]] = None,
+             start: Optional[DateLike] = None, end: Optional[DateLike] = None) -> np.ndarray:
+        """
+        Valores de un campo en un rango de fechas.
+
+        Si `tickers` es None o forma un bloque equiespaciado del almacén, el
+        resultado es una vista del fichero mapeado (sin copia, solo lectura);
+        con otra selección de tickers se copian solo esas columnas.
+
+        Args:
+            field: Campo de la barra.
+            tickers: Tickers (por defecto, todos).
+            start: Primera fecha (incluida).
+            end: Última fecha (incluida).
+
+        Returns:
+            np.ndarray: Matriz (n_tickers, n_días), como espera technical_indicators.
+        """
+        if field not in self.fields:
+            raise InvestmentError("Campo no disponible en el almacén de precios", {"field": field})
+        return self._map(field)[self._date_range(start, end), self._ticker_index(tickers)].T
+
+    def latest(self, field: str = "close", tickers: Optional[Sequence[Optional[str]]] = None,
+               days: int = MIN_HISTORY + 1) -> np.ndarray:
+        """
+        Últimos `days` valores de un campo por ticker (por ejemplo, para los
+        indicadores técnicos del día con `latest_indicators`). Los tickers que
+        no están en el almacén quedan a NaN: sus indicadores toman los valores neutros.
+
+        Returns:
+            np.ndarray: Matriz (n_tickers, n_días) en float64.
+        """
+        if field not in self.fields:
+            raise InvestmentError("Campo no disponible en el almacén de precios", {"field": field})
+        values = self._map(field)[max(0, self.n_days - days):]
+        if tickers is None:
+            return values.T.astype(float)
+        columns = np.array([self._columns.get(ticker, -1) for ticker in tickers], dtype=np.intp)
+        known = columns >= 0
+        history = np.full((len(columns), len(values)), np.nan)
+        history[known] = values[:, columns[known]].T
+        return history
+
+    def history(self, ticker: str, start: Optional[DateLike] = None,
+                end: Optional[DateLike] = None) -> pd.DataFrame:
+        """
+        Barras de un ticker como DataFrame indexado por fecha (para paneles).
+        """
+        rows = self._date_range(start, end)
+        column = self._ticker_index([ticker])
+        return pd.DataFrame(
+            {field: self._map(field)[rows, column][:, 0] for field in self.fields},
+            index=pd.DatetimeIndex(self.dates[rows], name="fecha")
+        )
+
+    def training_frame(
+        self,
+        assets: Optional[Union[Sequence[Dict[str, Any]], pd.DataFrame]] = None,
+        tickers: Optional[Sequence[str]] = None,
+        start: Optional[DateLike] = None,
+        end: Optional[DateLike] = None,
+        **kwargs: Any
+    ) -> pd.DataFrame:
+        """
+        Datos de entrenamiento con indicadores técnicos a partir de los
+        cierres del rango (ver `indicator_training_frame`).
+        """
+        return indicator_training_frame(self.read("close", tickers, start, end), assets, **kwargs)
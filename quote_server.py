@@ -0,0 +1,144 @@
+"""
+quote_server.py
+Servidor HTTP local de cotizaciones simuladas, para pruebas y desarrollo
+de la ingesta de datos de mercado (scraper.py).
+
+Endpoints:
+    GET /tickers                  -> ["TCK00000", ...]
+    GET /quotes?symbols=A,B,C     -> [{"nombre": "A", ...}, ...]
+"""
+from typing import Dict, Any, List, Optional
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import json
+import threading
+import time
+import zlib
+
+SECTORES = ["tecnología", "finanzas", "salud", "consumo", "energía", "industrial", "inmobiliario"]
+TIPOS = ["acción", "bono", "fondo", "ETF", "REIT", "criptomoneda"]
+RIESGOS = ["bajo", "moderado", "alto"]
+
+def simulated_quote(ticker: str) -> Dict[str, Any]:
+    """
+    Cotización determinista de un ticker (siempre la misma para el mismo nombre).
+    """
+    seed = zlib.crc32(ticker.encode("utf-8"))
+    return {
+        "nombre": ticker,
+        "sector": SECTORES[seed % len(SECTORES)],
+        "tipo": TIPOS[(seed // 7) % len(TIPOS)],
+        "riesgo": RIESGOS[(seed // 49) % len(RIESGOS)],
+        "precio": round(5 + (seed % 49500) / 100, 2),
+        "rendimiento_simulado": round(((seed // 343) % 3000) / 100 - 8, 2),
+        "dividendos_mensuales": (seed // 1029) % 4 == 0
+    }
+
+class QuoteServer:
+    """
+    Servidor de cotizaciones en un hilo en segundo plano.
+
+    Permite simular latencia y fallos transitorios (respuestas 503) para
+    probar la concurrencia, los timeouts y los reintentos del cliente.
+
+    Uso:
+        with QuoteServer(n_tickers=1000, latency=0.01) as server:
+            ingestor = MarketDataIngestor([HTTPQuoteSource("local", server.url)])
+    """
+
+    def __init__(self, n_tickers: int = 100, latency: float = 0.0, failures: int = 0,
+                 host: str = "127.0.0.1", port: int = 0):
+        """
+        Inicializa el servidor (port=0 elige un puerto libre).
+
+        Args:
+            n_tickers: Número de tickers del universo simulado.
+            latency: Segundos de espera por petición.
+            failures: Número de peticiones iniciales de cotizaciones que fallan con 503.
+        """
+        self.tickers = [f"TCK{i:05d}" for i in range(n_tickers)]
+        self.latency = latency
+        self.failures = failures
+        self.requests = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """URL base del servidor."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'QuoteServer':
+        """Arranca el servidor en un hilo en segundo plano."""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Detiene el servidor."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'QuoteServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _quotes(self, symbols: List[str]) -> Optional[List[Dict[str, Any]]]:
+        """
+        Cotizaciones de los símbolos, o None si la petición debe fallar.
+        """
+        with self._lock:
+            self.requests += 1
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+            fail = self.failures > 0
+            if fail:
+                self.failures -= 1
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            return None if fail else [simulated_quote(symbol) for symbol in symbols]
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Conexiones persistentes, como un proveedor real
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path == "/tickers":
+                    self._send(200, server.tickers)
+                elif url.path == "/quotes":
+                    symbols = [s for s in parse_qs(url.query).get("symbols", [""])[0].split(",") if s]
+                    quotes = server._quotes(symbols)
+                    if quotes is None:
+                        self._send(503, {"error": "no disponible"})
+                    else:
+                        self._send(200, quotes)
+                else:
+                    self._send(404, {"error": "no encontrado"})
+
+            def _send(self, status: int, payload: Any) -> None:
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -1,16 +1,39 @@
 """
 scraper.py
-Simula la obtención de datos de activos de todos los mercados y atributos para preferencias.
+Obtención de datos de activos de todos los mercados y atributos para preferencias.
+
+Las fuentes de datos son enchufables (`MarketDataSource`). Con
+NEOPROYECTTO_MARKET_DATA_URL configurado, las cotizaciones se descargan de
+forma asíncrona y concurrente de ese proveedor; si no, se usan los datos
+simulados de siempre. Las funciones `fetch_*` sirven instantáneas en caché
+(`SnapshotCache`) que se recargan en segundo plano.
 """
 
+from typing import Dict, Any, Awaitable, Callable, Iterator, List, Optional, Sequence, Tuple
+from collections import deque
+from concurrent.futures import Future
+import asyncio
+import hashlib
+import json
+import os
 import random
+import threading
+import time
 
-def fetch_all_market_data():
-    """
-    Simula la obtención de datos de activos de todos los mercados.
+import httpx
+import numpy as np
+import pandas as pd
 
-    Returns:
-        list: Lista de activos simulados.
+from logger import NeoproyecttoLogger
+from error_handling import ExternalServiceError
+from asset_universe import AssetUniverse
+from market_generator import generate_assets
+
+logger = NeoproyecttoLogger("neoproyectto.scraper")
+
+def _simulated_market_assets() -> List[Dict[str, Any]]:
+    """
+    Activos simulados de todos los mercados.
     """
     return [
         {
@@ -57,12 +80,9 @@ def fetch_all_market_data():
         },
     ]
 
-def fetch_dividend_data():
+def _simulated_dividend_assets() -> List[Dict[str, Any]]:
     """
-    Simula la obtención de datos de activos con dividendos mensuales.
-
-    Returns:
-        list: Lista de activos simulados con dividendos mensuales.
+    Activos simulados con dividendos mensuales.
     """
     return [
         {
@@ -89,4 +109,748 @@ def fetch_dividend_data():
             "rendimiento_simulado": random.uniform(8, 15),
             "dividendos_mensuales": False
         },
-    ]
\ No newline at end of file
+    ]
+
+class MarketDataSource:
+    """
+    Fuente de datos de mercado enchufable.
+
+    Las subclases implementan `fetch`, que recibe el ingestor para usar su
+    cliente HTTP compartido, su límite de concurrencia y sus reintentos.
+    """
+
+    name = "base"
+    # Timeout por petición de la fuente (segundos)
+    timeout = 10.0
+    # Activos por petición (aproximado), para acotar la memoria de la ingesta en streaming
+    request_size = 1
+
+    async def fetch(self, ingestor: 'MarketDataIngestor') -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def iter_requests(self, ingestor: 'MarketDataIngestor') -> Iterator[Awaitable[List[Dict[str, Any]]]]:
+        """
+        Peticiones de la fuente, una por bloque de activos, creadas a medida
+        que se consumen (ingesta en streaming). Por defecto, un único bloque.
+        """
+        yield self.fetch(ingestor)
+
+    def dividend_assets(self, assets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Activos con información de dividendos mensuales de la fuente, a partir
+        de los ya descargados con `fetch`. Por defecto, los que tienen
+        'dividendos_mensuales'.
+        """
+        return [asset for asset in assets if "dividendos_mensuales" in asset]
+
+class SimulatedSource(MarketDataSource):
+    """
+    Fuente con los activos simulados (sin red).
+    """
+
+    name = "simulada"
+
+    async def fetch(self, ingestor: 'MarketDataIngestor') -> List[Dict[str, Any]]:
+        return _simulated_market_assets()
+
+    def dividend_assets(self, assets: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # La lista de dividendos simulada es independiente de la de mercado
+        return _simulated_dividend_assets()
+
+class SyntheticSource(MarketDataSource):
+    """
+    Mercado sintético reproducible de `n_assets` activos (market_generator.py),
+    generado por bloques de `chunk_size` para la ingesta en streaming.
+    """
+
+    name = "sintética"
+
+    def __init__(self, n_assets: int, seed: int = 0, chunk_size: int = 100000):
+        self.n_assets = n_assets
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.request_size = chunk_size
+
+    async def _chunk(self, k: int) -> List[Dict[str, Any]]:
+        """Bloque k del mercado (su semilla depende solo de la semilla y de k)."""
+        start = k * self.chunk_size
+        return generate_assets(min(self.chunk_size, self.n_assets - start), seed=(self.seed, k), offset=start)
+
+    def iter_requests(self, ingestor: 'MarketDataIngestor') -> Iterator[Awaitable[List[Dict[str, Any]]]]:
+        for k in range(-(-self.n_assets // self.chunk_size)):
+            yield self._chunk(k)
+
+    async def fetch(self, ingestor: 'MarketDataIngestor') -> List[Dict[str, Any]]:
+        assets = []
+        for request in self.iter_requests(ingestor):
+            assets.extend(await request)
+        return assets
+
+class HTTPQuoteSource(MarketDataSource):
+    """
+    Proveedor HTTP de cotizaciones con la API de quote_server.py:
+    `GET /tickers` y `GET /quotes?symbols=A,B,C` (en lotes de `batch_size`).
+    """
+
+    def __init__(self, name: str, base_url: str, tickers: Optional[Sequence[str]] = None,
+                 timeout: float = 10.0, batch_size: int = 100):
+        """
+        Args:
+            name: Nombre de la fuente (para los logs).
+            base_url: URL base del proveedor.
+            tickers: Tickers a descargar (por defecto, los de `GET /tickers`).
+            timeout: Timeout por petición (segundos).
+            batch_size: Tickers por petición.
+        """
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.tickers = list(tickers) if tickers is not None else None
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.request_size = batch_size
+
+    def _batch_request(self, ingestor: 'MarketDataIngestor', batch: Sequence[str]) -> Awaitable[List[Dict[str, Any]]]:
+        """Petición de las cotizaciones de un lote de tickers."""
+        return ingestor.get_json(f"{self.base_url}/quotes", self.timeout, {"symbols": ",".join(batch)})
+
+    def iter_requests(self, ingestor: 'MarketDataIngestor') -> Iterator[Awaitable[List[Dict[str, Any]]]]:
+        tickers = self.tickers
+        if tickers is None:
+            tickers = ingestor.run(ingestor.get_json(f"{self.base_url}/tickers", self.timeout))
+        for i in range(0, len(tickers), self.batch_size):
+            yield self._batch_request(ingestor, tickers[i:i + self.batch_size])
+
+    async def fetch(self, ingestor: 'MarketDataIngestor') -> List[Dict[str, Any]]:
+        tickers = self.tickers
+        if tickers is None:
+            tickers = await ingestor.get_json(f"{self.base_url}/tickers", self.timeout)
+
+        batches = [tickers[i:i + self.batch_size] for i in range(0, len(tickers), self.batch_size)]
+        results = await asyncio.gather(*(self._batch_request(ingestor, batch) for batch in batches),
+                                       return_exceptions=True)
+
+        assets = []
+        failed = 0
+        for result in results:
+            if isinstance(result, Exception):
+                failed += 1
+            else:
+                assets.extend(result)
+        if failed:
+            logger.warning(f"Fuente {self.name}: {failed} de {len(batches)} lotes sin datos",
+                         {"source": self.name, "failed_batches": failed})
+            if failed == len(batches):
+                raise ExternalServiceError("La fuente de datos de mercado no responde",
+                                         {"source": self.name, "url": self.base_url})
+        return assets
+
+# Activos en curso como máximo en la ingesta en streaming (NEOPROYECTTO_STREAM_MAX_ASSETS)
+STREAM_MAX_ASSETS = int(os.environ.get("NEOPROYECTTO_STREAM_MAX_ASSETS", "200000"))
+
+class MarketDataIngestor:
+    """
+    Ingesta asíncrona de datos de mercado desde varias fuentes.
+
+    Todas las peticiones comparten un cliente HTTP con pool de conexiones
+    (keep-alive) y un semáforo que limita las peticiones simultáneas. Los
+    errores transitorios (conexión, timeout, 429 y 5xx) se reintentan con
+    backoff exponencial con jitter completo.
+
+    El ingestor tiene su propio bucle de eventos en un hilo dedicado: el
+    cliente y el pool viven en ese bucle, las llamadas síncronas esperan el
+    resultado y las asíncronas (`fetch_async`) lo esperan sin bloquear el
+    bucle de quien llama (por ejemplo, el de FastAPI).
+    """
+
+    def __init__(
+        self,
+        sources: Sequence[MarketDataSource],
+        max_concurrency: int = 32,
+        max_connections: int = 64,
+        retries: int = 3,
+        backoff_base: float = 0.1,
+        backoff_max: float = 2.0
+    ):
+        """
+        Inicializa el ingestor.
+
+        Args:
+            sources: Fuentes de datos.
+            max_concurrency: Peticiones HTTP simultáneas como máximo.
+            max_connections: Conexiones del pool del cliente HTTP.
+            retries: Reintentos por petición tras un error transitorio.
+            backoff_base: Espera base del backoff (segundos).
+            backoff_max: Espera máxima entre reintentos (segundos).
+        """
+        self.sources = list(sources)
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _submit(self, coro) -> Future:
+        """
+        Ejecuta una corrutina en el bucle del ingestor (arrancándolo si hace falta).
+        """
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="market-data", daemon=True
+                )
+                self._thread.start()
+            return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def get_json(self, url: str, timeout: float, params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        GET con límite de concurrencia y reintentos; devuelve el JSON de la respuesta.
+        """
+        if self._client is None:
+            self._client = httpx.AsyncClient(limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections
+            ))
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._semaphore:
+                    response = await self._client.get(url, params=params, timeout=timeout)
+                if response.status_code != 429 and response.status_code < 500:
+                    response.raise_for_status()
+                    return response.json()
+                error: Exception = ExternalServiceError(
+                    "Respuesta no disponible del proveedor", {"url": url, "status": response.status_code}
+                )
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                error = e
+            if attempt < self.retries:
+                # Backoff exponencial con jitter completo
+                await asyncio.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt)))
+        raise error
+
+    async def _fetch_sources(self) -> List[Tuple[MarketDataSource, List[Dict[str, Any]]]]:
+        """
+        Descarga todas las fuentes a la vez; una fuente que falla no detiene al resto.
+
+        Returns:
+            List: Pares (fuente, activos) de las fuentes que respondieron.
+        """
+        results = await asyncio.gather(*(source.fetch(self) for source in self.sources),
+                                       return_exceptions=True)
+        fetched = []
+        for source, result in zip(self.sources, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error obteniendo datos de la fuente {source.name}", exception=result)
+            else:
+                fetched.append((source, result))
+        n_assets = sum(len(assets) for _, assets in fetched)
+        if not n_assets and self.sources:
+            raise ExternalServiceError("Ninguna fuente de datos de mercado respondió",
+                                     {"sources": [source.name for source in self.sources]})
+        logger.info("Datos de mercado obtenidos",
+                  {"assets": n_assets, "sources": len(self.sources)})
+        return fetched
+
+    async def _fetch_all(self) -> List[Dict[str, Any]]:
+        """
+        Activos de todas las fuentes.
+        """
+        return [asset for _, assets in await self._fetch_sources() for asset in assets]
+
+    async def _fetch_all_with_dividends(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Activos de todas las fuentes y, de la misma descarga, los activos con
+        información de dividendos mensuales de cada fuente.
+        """
+        fetched = await self._fetch_sources()
+        assets = [asset for _, source_assets in fetched for asset in source_assets]
+        dividends = [asset for source, source_assets in fetched
+                     for asset in source.dividend_assets(source_assets)]
+        return assets, dividends
+
+    def fetch(self) -> List[Dict[str, Any]]:
+        """
+        Descarga todas las fuentes (llamada síncrona; no usar desde un bucle de eventos).
+        """
+        return self.run(self._fetch_all())
+
+    def fetch_with_dividends(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Como `fetch`, pero devuelve también los activos con dividendos mensuales.
+        """
+        return self.run(self._fetch_all_with_dividends())
+
+    def run(self, coro: Awaitable[Any]) -> Any:
+        """
+        Ejecuta una corrutina en el bucle del ingestor y espera su resultado.
+        """
+        return self._submit(coro).result()
+
+    def iter_chunks(self, max_pending: Optional[int] = None,
+                    max_pending_assets: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Ingesta en streaming: devuelve los bloques de activos de todas las
+        fuentes en orden, con como mucho `max_pending` peticiones (por defecto,
+        `max_concurrency`) y `max_pending_assets` activos (por defecto,
+        STREAM_MAX_ASSETS, según el `request_size` de cada fuente) en curso,
+        de modo que la memoria no depende del tamaño del universo. Siempre
+        queda al menos una petición en curso. Un bloque que falla se
+        registra y se omite.
+        """
+        max_pending = max_pending or self.max_concurrency
+        max_pending_assets = max_pending_assets or STREAM_MAX_ASSETS
+        pending: deque = deque()
+        pending_assets = 0
+        yielded = 0
+        failed = 0
+
+        def next_result():
+            nonlocal yielded, failed, pending_assets
+            source, future = pending.popleft()
+            pending_assets -= source.request_size
+            try:
+                chunk = future.result()
+            except Exception as e:
+                failed += 1
+                logger.error(f"Error obteniendo un bloque de la fuente {source.name}", exception=e)
+                return None
+            yielded += len(chunk)
+            return chunk
+
+        for source in self.sources:
+            try:
+                for request in source.iter_requests(self):
+                    while pending and (len(pending) >= max_pending or
+                                       pending_assets + source.request_size > max_pending_assets):
+                        chunk = next_result()
+                        if chunk:
+                            yield chunk
+                    pending.append((source, self._submit(request)))
+                    pending_assets += source.request_size
+            except Exception as e:
+                logger.error(f"Error obteniendo datos de la fuente {source.name}", exception=e)
+                failed += 1
+        while pending:
+            chunk = next_result()
+            if chunk:
+                yield chunk
+
+        if not yielded and failed:
+            raise ExternalServiceError("Ninguna fuente de datos de mercado respondió",
+                                     {"sources": [source.name for source in self.sources]})
+
+    async def fetch_async(self) -> List[Dict[str, Any]]:
+        """
+        Descarga todas las fuentes sin bloquear el bucle de eventos de quien llama.
+        """
+        return await asyncio.wrap_future(self._submit(self._fetch_all()))
+
+    def close(self) -> None:
+        """
+        Cierra el cliente HTTP y detiene el bucle del ingestor.
+        """
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        if self._client is not None:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), loop).result()
+            self._client = None
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join()
+        loop.close()
+
+def _default_ingestor() -> MarketDataIngestor:
+    """
+    Ingestor configurado por entorno: NEOPROYECTTO_MARKET_DATA_URL (una o varias
+    URLs separadas por comas) y NEOPROYECTTO_MARKET_DATA_TIMEOUT; sin URL,
+    mercado sintético si NEOPROYECTTO_SYNTHETIC_ASSETS > 0 (con semilla
+    NEOPROYECTTO_SYNTHETIC_SEED) o, si no, los datos simulados.
+    """
+    urls = [url.strip() for url in os.environ.get("NEOPROYECTTO_MARKET_DATA_URL", "").split(",") if url.strip()]
+    timeout = float(os.environ.get("NEOPROYECTTO_MARKET_DATA_TIMEOUT", "10"))
+    synthetic_assets = int(os.environ.get("NEOPROYECTTO_SYNTHETIC_ASSETS", "0"))
+    if not urls and synthetic_assets > 0:
+        seed = int(os.environ.get("NEOPROYECTTO_SYNTHETIC_SEED", "0"))
+        return MarketDataIngestor([SyntheticSource(synthetic_assets, seed=seed)])
+    if not urls:
+        return MarketDataIngestor([SimulatedSource()])
+    return MarketDataIngestor([
+        HTTPQuoteSource(f"proveedor_{i}", url, timeout=timeout) for i, url in enumerate(urls)
+    ])
+
+# Ingestor compartido por el proceso
+market_data_ingestor = _default_ingestor()
+
+class SnapshotDelta:
+    """
+    Cambios entre dos instantáneas consecutivas, por activo (clave 'nombre').
+
+    Se calcula sobre los universos columnares de las dos instantáneas: las
+    filas se emparejan por 'nombre' y cada columna se compara vectorizada.
+
+    Atributos:
+        from_version / to_version: Versiones de las instantáneas.
+        added / removed: Nombres de los activos nuevos y retirados.
+        changed: Nombre -> campos modificados.
+        previous_index: Para cada fila de la instantánea nueva, su fila en la
+                        anterior (-1 si el activo es nuevo).
+    """
+
+    def __init__(self, from_version: str, to_version: str, names: pd.Index, removed: List[str],
+                 changed_fields: Dict[str, np.ndarray], previous_index: np.ndarray):
+        """
+        Args:
+            names: Nombres de los activos de la instantánea nueva, por fila.
+            removed: Nombres de los activos retirados.
+            changed_fields: Campo -> máscara de las filas nuevas en las que cambió
+                            (solo los campos con algún cambio).
+            previous_index: Fila anterior de cada fila nueva (-1 si es nueva).
+        """
+        self.from_version = from_version
+        self.to_version = to_version
+        self.previous_index = previous_index
+        self.removed = removed
+        self._names = names
+        self._added = previous_index < 0
+        self._changed_fields = changed_fields
+        self.added = names[self._added].tolist()
+        self._changed: Optional[Dict[str, List[str]]] = None
+
+    @classmethod
+    def between(cls, previous: 'MarketSnapshot', current: 'MarketSnapshot') -> Optional['SnapshotDelta']:
+        """
+        Delta de `previous` a `current`, o None si los activos no tienen un
+        'nombre' único (entonces no se puede emparejar y hay que recalcular todo).
+        """
+        old, new = previous.universe.frame, current.universe.frame
+        if "nombre" not in old.columns or "nombre" not in new.columns:
+            return None
+        old_names, names = pd.Index(old["nombre"]), pd.Index(new["nombre"])
+        if old_names.hasnans or names.hasnans or not old_names.is_unique or not names.is_unique:
+            return None
+
+        previous_index = old_names.get_indexer(names)
+        matched = previous_index >= 0
+        new_rows, old_rows = np.flatnonzero(matched), previous_index[matched]
+        changed_fields = {}
+        for field in sorted((set(old.columns) | set(new.columns)) - {"nombre"}):
+            differs = _differs(old.get(field), new.get(field), old_rows, new_rows)
+            if differs.any():
+                mask = np.zeros(len(names), dtype=bool)
+                mask[matched] = differs
+                changed_fields[field] = mask
+        kept = np.zeros(len(old_names), dtype=bool)
+        kept[old_rows] = True
+        removed = old_names[~kept].tolist()
+        return cls(previous.version, current.version, names, removed, changed_fields, previous_index)
+
+    @property
+    def changed(self) -> Dict[str, List[str]]:
+        """Nombre -> campos modificados (solo de los activos modificados)."""
+        if self._changed is None:
+            changed: Dict[str, List[str]] = {}
+            for field, mask in self._changed_fields.items():
+                for name in self._names[mask]:
+                    changed.setdefault(name, []).append(field)
+            self._changed = changed
+        return self._changed
+
+    def rows(self, fields: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        Filas de la instantánea nueva que hay que recalcular: las de los
+        activos nuevos y las de los modificados (solo si cambió alguno de
+        `fields`, cuando se indica).
+        """
+        mask = self._added.copy()
+        for field in self._changed_fields if fields is None else fields:
+            if field in self._changed_fields:
+                mask |= self._changed_fields[field]
+        return np.flatnonzero(mask)
+
+    def summary(self) -> Dict[str, Any]:
+        """Resumen del delta (para logs y diagnósticos)."""
+        changed = np.zeros(len(self._names), dtype=bool)
+        for mask in self._changed_fields.values():
+            changed |= mask
+        return {"from_version": self.from_version, "to_version": self.to_version,
+                "added": len(self.added), "removed": len(self.removed),
+                "changed": int(changed.sum())}
+
+def _category_codes(series: pd.Series, categories: pd.Index) -> np.ndarray:
+    """Códigos de una columna categórica sobre `categories` (-1 si falta el valor)."""
+    codes = series.cat.codes.to_numpy()
+    return np.where(codes >= 0, categories.get_indexer(series.cat.categories)[codes], -1)
+
+def _differs(before: Optional[pd.Series], after: Optional[pd.Series],
+             old_rows: np.ndarray, new_rows: np.ndarray) -> np.ndarray:
+    """
+    Máscara de los activos emparejados (filas `old_rows` -> `new_rows`) cuyo
+    valor cambió. Los valores ausentes (NaN/None o sin la clave) son iguales
+    entre sí.
+    """
+    if before is None or after is None:
+        present, rows = (after, new_rows) if before is None else (before, old_rows)
+        return ~pd.isna(present.to_numpy()[rows])
+    if isinstance(before.dtype, pd.CategoricalDtype) and isinstance(after.dtype, pd.CategoricalDtype):
+        categories = before.cat.categories.union(after.cat.categories)
+        return _category_codes(before, categories)[old_rows] != _category_codes(after, categories)[new_rows]
+    old_values, new_values = before.to_numpy()[old_rows], after.to_numpy()[new_rows]
+    if old_values.dtype.kind in "biuf" and new_values.dtype.kind in "biuf":
+        differs = old_values != new_values
+        if old_values.dtype.kind == "f" and new_values.dtype.kind == "f":
+            differs &= ~(np.isnan(old_values) & np.isnan(new_values))
+        return differs
+    old_values, new_values = pd.Series(old_values), pd.Series(new_values)
+    return (new_values.ne(old_values) & ~(new_values.isna() & old_values.isna())).to_numpy()
+
+class MarketSnapshot:
+    """
+    Instantánea de una lista de activos (su contenido no cambia).
+
+    `version` es un hash del contenido: dos descargas con los mismos datos
+    tienen la misma versión, así que las cachés posteriores pueden usarla
+    como clave. `delta` describe los cambios respecto a la instantánea
+    anterior de la misma caché, y `dividends` es la instantánea de los
+    activos con información de dividendos mensuales (la lista que dio la
+    fuente junto a la de mercado o, si no dio ninguna, los activos de
+    mercado con 'dividendos_mensuales').
+    """
+
+    def __init__(self, assets: List[Dict[str, Any]], fetched_at: float,
+                 dividend_assets: Optional[List[Dict[str, Any]]] = None):
+        self.assets = tuple(assets)
+        self.fetched_at = fetched_at
+        content = assets if dividend_assets is None else [assets, dividend_assets]
+        digest = hashlib.sha1(json.dumps(content, sort_keys=True, default=str).encode("utf-8"))
+        self.version = digest.hexdigest()[:16]
+        self.delta: Optional[SnapshotDelta] = None
+        self._universe: Optional[AssetUniverse] = None
+        self._dividend_assets = dividend_assets
+        self._dividends: Optional["MarketSnapshot"] = None
+
+    @property
+    def universe(self) -> AssetUniverse:
+        """
+        Universo columnar de la instantánea (se construye una vez por instantánea).
+        """
+        if self._universe is None:
+            self._universe = AssetUniverse.from_records(self.assets)
+        return self._universe
+
+    @property
+    def dividends(self) -> "MarketSnapshot":
+        """
+        Instantánea de los activos con dividendos mensuales de esta misma
+        descarga (se construye una vez por instantánea).
+        """
+        if self._dividends is None:
+            assets = self._dividend_assets
+            if assets is None:
+                assets = [asset for asset in self.assets if "dividendos_mensuales" in asset]
+            self._dividends = MarketSnapshot(assets, self.fetched_at)
+        return self._dividends
+
+class SnapshotCache:
+    """
+    Caché de instantáneas de datos de mercado con stale-while-revalidate.
+
+    Mientras la instantánea tiene menos de `ttl` segundos se sirve tal cual;
+    después se sigue sirviendo y se lanza una recarga en segundo plano. Las
+    recargas simultáneas se agrupan en una sola descarga, y solo la primera
+    petición (sin instantánea todavía) espera a la fuente. Si una recarga
+    falla se conserva la instantánea anterior.
+    """
+
+    def __init__(self, loader: Callable[[], Any], ttl: float = 60.0,
+                 name: str = "mercado", clock: Callable[[], float] = time.monotonic):
+        """
+        Inicializa la caché.
+
+        Args:
+            loader: Función que descarga la lista de activos, o un par (activos,
+                    activos con dividendos mensuales) si la fuente los da por separado.
+            ttl: Segundos tras los que la instantánea se recarga.
+            name: Nombre de la caché (para los logs).
+            clock: Reloj monótono (inyectable para pruebas).
+        """
+        self.loader = loader
+        self.ttl = ttl
+        self.name = name
+        self._clock = clock
+        self._snapshot: Optional[MarketSnapshot] = None
+        self._pending: Optional[Future] = None
+        self._lock = threading.Lock()
+        self.refreshes = 0
+        self.stale_hits = 0
+
+    def _start_refresh(self) -> Future:
+        """
+        Lanza una recarga en segundo plano, o devuelve la que ya está en curso.
+        """
+        with self._lock:
+            if self._pending is not None:
+                return self._pending
+            future = self._pending = Future()
+        threading.Thread(target=self._load, args=(future,), name=f"snapshot-{self.name}",
+                         daemon=True).start()
+        return future
+
+    def _load(self, future: Future) -> None:
+        """
+        Descarga los activos y publica la nueva instantánea. Cualquier error
+        (de la fuente o al preparar la instantánea) conserva la anterior y se
+        entrega a quien espera la recarga.
+        """
+        error: Optional[Exception] = None
+        try:
+            snapshot = self._refresh()
+        except Exception as e:
+            logger.error(f"Error recargando la instantánea de {self.name}", exception=e)
+            error = e
+        finally:
+            with self._lock:
+                self._pending = None
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(snapshot)
+
+    def _refresh(self) -> MarketSnapshot:
+        """
+        Descarga y prepara la instantánea, y la publica si su versión es nueva.
+        """
+        loaded = self.loader()
+        assets, dividend_assets = loaded if isinstance(loaded, tuple) else (loaded, None)
+        snapshot = MarketSnapshot(assets, self._clock(), dividend_assets)
+        previous = self._snapshot
+        if previous is not None and previous.version == snapshot.version:
+            # Sin cambios: se conserva la instantánea (y su universo) con la nueva fecha
+            previous.fetched_at = snapshot.fetched_at
+            snapshot = previous
+        else:
+            if previous is not None:
+                snapshot.delta = SnapshotDelta.between(previous, snapshot)
+            # Los índices de atributos se construyen aquí, fuera del camino de las peticiones
+            snapshot.universe.index
+            snapshot.dividends.universe.index
+        with self._lock:
+            self._snapshot = snapshot
+            self.refreshes += 1
+        if snapshot is not previous:
+            logger.info(f"Nueva instantánea de {self.name}",
+                      {"version": snapshot.version, "assets": len(snapshot.assets),
+                       "delta": snapshot.delta.summary() if snapshot.delta else None})
+        return snapshot
+
+    def prefetch(self) -> Future:
+        """
+        Recarga la instantánea en segundo plano (por ejemplo, al arrancar).
+        """
+        return self._start_refresh()
+
+    def get(self) -> MarketSnapshot:
+        """
+        Instantánea actual; solo espera a la fuente si todavía no hay ninguna.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self._start_refresh().result()
+        if self._clock() - snapshot.fetched_at >= self.ttl:
+            self.stale_hits += 1
+            self._start_refresh()
+        return snapshot
+
+    async def get_async(self) -> MarketSnapshot:
+        """
+        Igual que `get`, sin bloquear el bucle de eventos en la primera carga.
+        """
+        if self._snapshot is None:
+            return await asyncio.wrap_future(self._start_refresh())
+        return self.get()
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Estado de la caché.
+        """
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version if snapshot else None,
+            "assets": len(snapshot.assets) if snapshot else 0,
+            "age_s": round(self._clock() - snapshot.fetched_at, 3) if snapshot else None,
+            "refreshes": self.refreshes,
+            "stale_hits": self.stale_hits
+        }
+
+def _load_market_data() -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Descarga los activos de todos los mercados y, de la misma descarga, los de dividendos."""
+    return market_data_ingestor.fetch_with_dividends()
+
+# Instantáneas compartidas por el proceso (NEOPROYECTTO_MARKET_DATA_TTL, en segundos)
+_snapshot_ttl = float(os.environ.get("NEOPROYECTTO_MARKET_DATA_TTL", "60"))
+market_snapshots = SnapshotCache(_load_market_data, ttl=_snapshot_ttl, name="mercado")
+
+def fetch_all_market_data():
+    """
+    Obtiene los datos de activos de todos los mercados (de la instantánea en caché).
+
+    Returns:
+        list: Lista de activos (copias que el llamador puede modificar).
+    """
+    return [dict(asset) for asset in market_snapshots.get().assets]
+
+def fetch_dividend_data():
+    """
+    Obtiene los datos de activos con información de dividendos mensuales
+    (de la instantánea en caché).
+
+    Returns:
+        list: Lista de activos con el atributo 'dividendos_mensuales'.
+    """
+    return [dict(asset) for asset in market_snapshots.get().dividends.assets]
+
+def fetch_market_universe() -> AssetUniverse:
+    """
+    Universo columnar de todos los mercados (compartido; no se modifica en el sitio).
+    """
+    return market_snapshots.get().universe
+
+def fetch_dividend_universe() -> AssetUniverse:
+    """
+    Universo columnar de los activos con información de dividendos mensuales.
+    """
+    return market_snapshots.get().dividends.universe
+
+def iter_market_universe(chunk_size: int = 10000) -> Iterator[AssetUniverse]:
+    """
+    Universo de todos los mercados en bloques columnares de unos `chunk_size`
+    activos, descargados en streaming sin pasar por la instantánea en caché
+    (para universos demasiado grandes para tenerlos enteros en memoria).
+    """
+    buffer: List[Dict[str, Any]] = []
+    for chunk in market_data_ingestor.iter_chunks():
+        buffer.extend(chunk)
+        if len(buffer) >= chunk_size:
+            yield AssetUniverse.from_records(buffer)
+            buffer = []
+    if buffer:
+        yield AssetUniverse.from_records(buffer)
+
+async def fetch_all_market_data_async():
+    """
+    Versión asíncrona de `fetch_all_market_data` (no bloquea el bucle de eventos).
+    """
+    return [dict(asset) for asset in (await market_snapshots.get_async()).assets]
+
+async def fetch_dividend_data_async():
+    """
+    Versión asíncrona de `fetch_dividend_data` (no bloquea el bucle de eventos).
+    """
+    return [dict(asset) for asset in (await market_snapshots.get_async()).dividends.assets]
@@ -0,0 +1,170 @@
+"""
+sharded_predictor.py
+Predicción por fragmentos en varios procesos sobre una matriz de
+características en memoria compartida.
+"""
+from typing import Dict, Any, List, Optional, Tuple
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+
+from logger import NeoproyecttoLogger
+
+logger = NeoproyecttoLogger("neoproyectto.sharded_predictor")
+
+# Tamaño mínimo del universo para repartirlo entre procesos
+MIN_ASSETS = int(os.environ.get("NEOPROYECTTO_SHARDED_MIN_ASSETS", "20000"))
+
+# Predictor cargado en cada proceso del pool
+_worker_predictor = None
+
+def _init_worker(path: str, compact: bool) -> None:
+    """
+    Carga el artefacto de modelos en el proceso en modo compilado: el bosque
+    se puntúa desde los arrays .npy del bosque compilado, mapeados en memoria
+    y compartidos entre procesos (el Random Forest de sklearn copiaría sus
+    nodos al cargarse).
+    """
+    global _worker_predictor
+    from ai_predictor import FinancialPredictor
+    _worker_predictor = FinancialPredictor.load(path, mmap=True, compiled=True, compact=compact)
+
+def _predict_shard(features_name: str, output_name: str, shape: Tuple[int, int], dtype: str,
+                   start: int, stop: int, timeframe: str) -> int:
+    """
+    Predice las filas [start, stop) de la matriz compartida y escribe el
+    resultado en la misma posición del array de salida compartido.
+    """
+    # Los procesos del pool comparten el resource_tracker del principal, que
+    # es quien crea y libera los bloques
+    features_block = shared_memory.SharedMemory(name=features_name)
+    output_block = shared_memory.SharedMemory(name=output_name)
+    try:
+        features = np.ndarray(shape, dtype=dtype, buffer=features_block.buf)
+        output = np.ndarray(shape[0], dtype=np.float64, buffer=output_block.buf)
+        output[start:stop] = _worker_predictor._predict_timeframe(features[start:stop], timeframe)
+        del features, output
+    finally:
+        features_block.close()
+        output_block.close()
+    return stop - start
+
+class ShardedPredictor:
+    """
+    Reparte la predicción de un universo grande entre varios procesos.
+
+    El proceso principal codifica los activos directamente en un bloque de
+    `multiprocessing.shared_memory`; cada proceso del pool puntúa un fragmento
+    de filas sin copiar la matriz y escribe su parte en un array de salida
+    también compartido. Los procesos cargan el artefacto del modelo publicado
+    una sola vez y se reinician cuando cambia su versión.
+    """
+
+    def __init__(self, n_workers: Optional[int] = None, min_assets: int = MIN_ASSETS):
+        """
+        Inicializa el predictor por fragmentos.
+
+        Args:
+            n_workers: Procesos del pool (por defecto, todos los núcleos).
+            min_assets: Tamaño mínimo del universo para repartirlo entre procesos.
+        """
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.min_assets = min_assets
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._model_version: Optional[str] = None
+        self._artifact_dir: Optional[str] = None
+        # Protege el pool y su artefacto: las peticiones concurrentes (API en
+        # run_in_threadpool) no pueden cerrarlo o reemplazarlo mientras otra envía
+        self._lock = threading.Lock()
+
+    def _ensure_pool(self, predictor) -> None:
+        """
+        Arranca (o reinicia) el pool con el artefacto de la versión del predictor.
+        Se llama con `_lock` adquirido.
+        """
+        if self._executor is not None and self._model_version == predictor.model_version:
+            return
+        self._close_pool()
+        self._artifact_dir = tempfile.mkdtemp(prefix="neoproyectto-shards-")
+        path = os.path.join(self._artifact_dir, "modelo")
+        predictor.save(path)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.n_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(path, predictor.compact)
+        )
+        self._model_version = predictor.model_version
+        logger.info("Pool de predicción por fragmentos iniciado",
+                  {"workers": self.n_workers, "model_version": self._model_version})
+
+    def predict(self, predictor, assets: List[Dict[str, Any]], timeframe: str = '1m',
+                price_history: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Predice el retorno esperado de todos los activos.
+
+        Args:
+            predictor: FinancialPredictor entrenado (el publicado en el registro).
+            assets: Lista de activos.
+            timeframe: Marco temporal para la predicción.
+            price_history: Historial de precios de los activos para los
+                           modelos con indicadores técnicos (ver `predict_returns_batch`).
+
+        Returns:
+            np.ndarray: Retornos esperados en porcentaje, en el orden de `assets`.
+        """
+        shape = (len(assets), len(predictor.encoder.feature_names))
+        dtype = np.dtype(predictor.feature_dtype)
+        features_block = shared_memory.SharedMemory(create=True, size=max(1, shape[0] * shape[1] * dtype.itemsize))
+        output_block = shared_memory.SharedMemory(create=True, size=max(1, shape[0] * 8))
+        try:
+            features = np.ndarray(shape, dtype=dtype, buffer=features_block.buf)
+            predictor._encode(assets, price_history, out=features)
+            del features
+
+            bounds = np.linspace(0, shape[0], min(self.n_workers, max(1, shape[0])) + 1).astype(int)
+            # Cerrar o reiniciar el pool espera a las tareas ya enviadas
+            with self._lock:
+                self._ensure_pool(predictor)
+                futures = [
+                    self._executor.submit(_predict_shard, features_block.name, output_block.name,
+                                          shape, dtype.str, int(start), int(stop), timeframe)
+                    for start, stop in zip(bounds[:-1], bounds[1:])
+                ]
+            for future in futures:
+                future.result()
+
+            output = np.ndarray(shape[0], dtype=np.float64, buffer=output_block.buf)
+            predictions = output.copy()
+            del output
+            return predictions
+        finally:
+            for block in (features_block, output_block):
+                try:
+                    block.close()
+                except BufferError:
+                    # Una excepción en curso aún referencia una vista del bloque
+                    pass
+                block.unlink()
+
+    def close(self) -> None:
+        """
+        Detiene el pool y elimina el artefacto temporal.
+        """
+        with self._lock:
+            self._close_pool()
+
+    def _close_pool(self) -> None:
+        """`close` con `_lock` ya adquirido."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._artifact_dir is not None:
+            shutil.rmtree(self._artifact_dir, ignore_errors=True)
+            self._artifact_dir = None
+        self._model_version = None
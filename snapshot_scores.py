@@ -0,0 +1,90 @@
+"""
+snapshot_scores.py
+Puntuaciones por activo de una instantánea de mercado que se actualizan de
+forma incremental con los deltas entre instantáneas.
+"""
+from typing import Callable, Dict, Hashable, Optional, Sequence, Tuple
+import threading
+import numpy as np
+
+from logger import NeoproyecttoLogger
+from asset_universe import AssetUniverse
+
+logger = NeoproyecttoLogger("neoproyectto.snapshot_scores")
+
+class SnapshotScorer:
+    """
+    Caché de una columna de puntuaciones (por ejemplo, la probabilidad de
+    ganancia) alineada con el universo de la instantánea actual.
+
+    Para cada clave (por ejemplo, el perfil de riesgo) guarda las
+    puntuaciones de la última instantánea. Cuando llega la siguiente y su
+    delta parte de esa versión, las puntuaciones de los activos sin cambios
+    se reordenan con `previous_index` y solo se puntúan los activos nuevos o
+    con cambios en los campos relevantes, de modo que el coste sigue al
+    número de cambios y no al tamaño del universo. Un cambio de modelo, un
+    salto de más de una instantánea o un delta sin activos en común con la
+    anterior fuerzan el recálculo completo. El modelo puntúa fuera del
+    cerrojo, que solo protege la publicación del estado.
+    """
+
+    def __init__(self, score: Callable[[AssetUniverse, Hashable], np.ndarray]):
+        """
+        Args:
+            score: Función (universo, clave) -> puntuación de cada activo.
+        """
+        self.score = score
+        # clave -> (versión de la instantánea, versión del modelo, puntuaciones)
+        self._state: Dict[Hashable, Tuple[str, Optional[str], np.ndarray]] = {}
+        self._lock = threading.Lock()
+        self.full_updates = 0
+        self.incremental_updates = 0
+        self.rescored = 0
+
+    def scores(self, snapshot, key: Hashable, model_version: Optional[str] = None,
+               fields: Optional[Sequence[str]] = None) -> np.ndarray:
+        """
+        Puntuaciones de los activos de `snapshot` (en su orden) para `key`.
+
+        Args:
+            snapshot: MarketSnapshot de scraper.py.
+            key: Clave de la puntuación (parámetros que la afectan).
+            model_version: Versión del modelo que puntúa; si cambia, se recalcula todo.
+            fields: Campos de los que depende la puntuación (por defecto, todos).
+
+        Returns:
+            np.ndarray: Puntuaciones (solo lectura; compartidas entre peticiones).
+        """
+        with self._lock:
+            state = self._state.get(key)
+        if state is not None and state[0] == snapshot.version and state[1] == model_version:
+            return state[2]
+
+        # El modelo puntúa fuera del cerrojo: una recarga lenta no bloquea al resto de peticiones
+        delta = snapshot.delta
+        universe = snapshot.universe
+        incremental = state is not None and state[1] == model_version and delta is not None \
+            and delta.from_version == state[0] and len(state[2]) > 0 \
+            and bool((delta.previous_index >= 0).any())
+        if incremental:
+            rows = delta.rows(fields)
+            scores = state[2][delta.previous_index]
+            if len(rows):
+                scores[rows] = self.score(universe.take(rows), key)
+        else:
+            rows = np.arange(len(universe))
+            scores = np.asarray(self.score(universe, key), dtype=float)
+        scores.setflags(write=False)
+
+        with self._lock:
+            if incremental:
+                self.incremental_updates += 1
+            else:
+                self.full_updates += 1
+            self.rescored += len(rows)
+            # Si otra petición publicó mientras tanto, se conserva su estado
+            if self._state.get(key) is state:
+                self._state[key] = (snapshot.version, model_version, scores)
+        logger.info("Puntuaciones de la instantánea actualizadas",
+                  {"version": snapshot.version, "rescored": len(rows), "assets": len(universe)})
+        return scores
@@ -0,0 +1,190 @@
+"""
+technical_indicators.py
+Indicadores técnicos vectorizados (medias móviles, volatilidad realizada,
+momento y RSI) calculados sobre una matriz de precios (activos x días).
+"""
+from typing import Dict, Any, List, Optional, Sequence, Union
+import numpy as np
+import pandas as pd
+
+from feature_encoder import NUMERIC_FEATURES, FeatureEncoder, default_encoder
+
+# Sesiones bursátiles por año (para anualizar la volatilidad)
+TRADING_DAYS = 252
+
+# Indicadores: nombre -> valor neutro si no hay historial suficiente
+INDICATOR_FEATURES: Dict[str, float] = {
+    "media_movil_20": 0.0,             # % del precio sobre su media de 20 sesiones
+    "media_movil_50": 0.0,             # % del precio sobre su media de 50 sesiones
+    "volatilidad_realizada_20": 0.2,   # desviación anualizada de 20 retornos logarítmicos
+    "momento_20": 0.0,                 # % de variación en 20 sesiones
+    "momento_60": 0.0,                 # % de variación en 60 sesiones
+    "rsi_14": 50.0                     # RSI de 14 sesiones (medias simples)
+}
+
+INDICATOR_NAMES = list(INDICATOR_FEATURES)
+
+# Sesiones de historial necesarias para calcular todos los indicadores
+MIN_HISTORY = 60
+
+# Codificador con las características estáticas más los indicadores
+indicator_encoder = FeatureEncoder(numeric={**NUMERIC_FEATURES, **INDICATOR_FEATURES})
+
+def _cumulative(values: np.ndarray) -> np.ndarray:
+    """
+    Sumas acumuladas por fila con una columna inicial de ceros, de modo que
+    la suma de values[:, a:b] es cumulative[:, b] - cumulative[:, a].
+    """
+    cumulative = np.empty((values.shape[0], values.shape[1] + 1))
+    cumulative[:, 0] = 0.0
+    np.cumsum(values, axis=1, out=cumulative[:, 1:])
+    return cumulative
+
+def _as_index(at: np.ndarray) -> Union[slice, np.ndarray]:
+    """
+    Convierte índices equiespaciados en un slice (vistas en lugar de copias indexadas).
+    """
+    if len(at) > 1:
+        steps = np.diff(at)
+        if steps[0] > 0 and np.all(steps == steps[0]):
+            return slice(int(at[0]), int(at[-1]) + 1, int(steps[0]))
+    return at
+
+def _shift(index: Union[slice, np.ndarray], offset: int) -> Union[slice, np.ndarray]:
+    """Desplaza un índice (slice o array) `offset` posiciones."""
+    if isinstance(index, slice):
+        return slice(index.start + offset, index.stop + offset, index.step)
+    return index + offset
+
+def compute_indicators(
+    prices: np.ndarray,
+    at: Optional[Sequence[int]] = None
+) -> np.ndarray:
+    """
+    Calcula los indicadores técnicos de todos los activos a la vez.
+
+    Las ventanas móviles se resuelven con sumas acumuladas (una pasada por
+    serie y una resta por ventana), sin bucles por activo ni por día.
+
+    Args:
+        prices: Matriz de precios de cierre (n_activos, n_días), del más antiguo al más reciente.
+        at: Índices de día en los que evaluar los indicadores (por defecto, el último).
+            Cada índice debe tener al menos MIN_HISTORY sesiones previas.
+
+    Returns:
+        np.ndarray: Matriz (n_indicadores, n_activos, len(at)) en el orden de INDICATOR_NAMES.
+    """
+    prices = np.asarray(prices, dtype=float)
+    if prices.ndim == 1:
+        prices = prices[np.newaxis, :]
+    n_days = prices.shape[1]
+    at = np.array([n_days - 1] if at is None else at, dtype=np.intp)
+    if len(at) and (at.min() < MIN_HISTORY or at.max() >= n_days):
+        raise ValueError(f"Los índices deben estar entre {MIN_HISTORY} y {n_days - 1}")
+
+    # Solo hace falta el tramo de historial que cubren las ventanas
+    start = max(0, int(at.min(initial=n_days - 1)) - MIN_HISTORY)
+    prices = prices[:, start:]
+    index = _as_index(at - start)
+
+    def window(cumulative: np.ndarray, size: int, end: int = 1) -> np.ndarray:
+        # Suma de las `size` posiciones que terminan en cada índice (+ end - 1)
+        return cumulative[:, _shift(index, end)] - cumulative[:, _shift(index, end - size)]
+
+    current = prices[:, index]
+    indicators = np.empty((len(INDICATOR_NAMES), prices.shape[0], len(at)))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Precio sobre su media móvil simple
+        cumulative = _cumulative(prices)
+        for k, size in enumerate((20, 50)):
+            np.divide(current * size, window(cumulative, size), out=indicators[k])
+            indicators[k] -= 1.0
+            indicators[k] *= 100
+
+        # Volatilidad realizada: el retorno logarítmico del día t está en la posición t - 1
+        returns = np.diff(np.log(prices), axis=1)
+        mean = window(_cumulative(returns), 20, end=0) / 20
+        returns *= returns
+        variance = window(_cumulative(returns), 20, end=0) / 20 - mean * mean
+        np.maximum(variance, 0.0, out=variance)
+        indicators[2] = np.sqrt(variance * (TRADING_DAYS * 20 / 19))
+
+        # Momento
+        for k, size in enumerate((20, 60), start=3):
+            np.divide(current, prices[:, _shift(index, -size)], out=indicators[k])
+            indicators[k] -= 1.0
+            indicators[k] *= 100
+
+        # RSI con medias simples de subidas y bajadas
+        changes = np.diff(prices, axis=1)
+        gains = window(_cumulative(np.maximum(changes, 0.0)), 14, end=0)
+        np.abs(changes, out=changes)
+        total = window(_cumulative(changes), 14, end=0)
+        indicators[5] = np.where(total > 0, 100.0 * gains / total, 50.0)
+
+    return indicators
+
+def latest_indicators(prices: np.ndarray) -> np.ndarray:
+    """
+    Indicadores en el último día de la matriz de precios, con los valores
+    neutros de INDICATOR_FEATURES si falta historial o hay precios no válidos.
+
+    Returns:
+        np.ndarray: Matriz (n_activos, n_indicadores).
+    """
+    prices = np.asarray(prices, dtype=float)
+    if prices.ndim == 1:
+        prices = prices[np.newaxis, :]
+    defaults = np.fromiter(INDICATOR_FEATURES.values(), dtype=float)
+    if prices.shape[1] <= MIN_HISTORY:
+        return np.tile(defaults, (prices.shape[0], 1))
+    indicators = compute_indicators(prices)[:, :, 0].T
+    return np.where(np.isfinite(indicators), indicators, defaults)
+
+def indicator_training_frame(
+    prices: np.ndarray,
+    assets: Optional[Union[Sequence[Dict[str, Any]], pd.DataFrame]] = None,
+    horizons: Optional[Dict[str, int]] = None,
+    step: int = 21,
+    time_column: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Construye datos de entrenamiento para FinancialPredictor a partir del
+    historial de precios: una fila por activo y fecha de muestreo, con las
+    características estáticas del activo, los indicadores en esa fecha y el
+    retorno posterior (en %) de cada horizonte.
+
+    Args:
+        prices: Matriz de precios (n_activos, n_días).
+        assets: Atributos de los activos (sector, tipo, riesgo, volatilidad), en
+                el orden de las filas de `prices`. Sin ellos se usan los valores por defecto.
+        horizons: Columna objetivo -> sesiones hacia delante
+                  (por defecto {'rendimiento': 21}, un mes).
+        step: Sesiones entre fechas de muestreo.
+        time_column: Si se indica, columna con el índice de día de cada fila
+                     (para el backtest; debe retirarse antes de entrenar).
+
+    Returns:
+        pd.DataFrame: Columnas de `indicator_encoder.feature_names` más los objetivos.
+    """
+    prices = np.asarray(prices, dtype=float)
+    horizons = horizons or {"rendimiento": 21}
+    n_assets, n_days = prices.shape
+    at = np.arange(MIN_HISTORY, n_days - max(horizons.values()), step)
+
+    static = default_encoder.transform(assets if assets is not None else [{}] * n_assets)
+    columns = {name: np.repeat(static[:, j], len(at)) for j, name in enumerate(default_encoder.feature_names)}
+    # El precio es el de cada fecha de muestreo
+    columns["precio"] = prices[:, at].reshape(-1)
+    indicators = compute_indicators(prices, at)
+    for k, name in enumerate(INDICATOR_NAMES):
+        columns[name] = indicators[k].reshape(-1)
+
+    if time_column is not None:
+        columns[time_column] = np.tile(at, n_assets)
+
+    frame = pd.DataFrame(columns)
+    for target, horizon in horizons.items():
+        frame[target] = ((prices[:, at + horizon] / prices[:, at] - 1.0) * 100).reshape(-1)
+    return frame.replace([np.inf, -np.inf], np.nan).dropna().reset_index(drop=True)
@@ -0,0 +1,237 @@
+"""
+test_ai_predictor.py
+Pruebas para el predictor financiero: registro, marcos temporales,
+actualizaciones, artefactos y caché de predicciones.
+"""
+
+import unittest
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from ai_predictor import FinancialPredictor, ModelRegistry, PredictionCache
+from error_handling import ConfigurationError, InvestmentError
+from testing_data import test_assets, _historical_data, _multi_timeframe_data
+
+class TestModelRegistry(unittest.TestCase):
+    """Pruebas para el registro de modelos compartido."""
+    
+    def test_registry_trains_once(self):
+        """El registro entrena una sola vez y comparte el predictor."""
+        calls = []
+        def loader():
+            calls.append(1)
+            return _historical_data()
+        registry = ModelRegistry(loader)
+        predictor = registry.get_predictor()
+        self.assertIs(registry.get_predictor(), predictor)
+        self.assertTrue(registry.is_trained)
+        self.assertEqual(len(calls), 1)
+    
+    def test_registry_swap(self):
+        """El predictor publicado se sustituye de forma atómica."""
+        registry = ModelRegistry(lambda: None)
+        previous = registry.get_predictor()
+        self.assertFalse(registry.is_trained)
+        new_predictor = FinancialPredictor(_historical_data())
+        self.assertIs(registry.swap(new_predictor), previous)
+        self.assertIs(registry.get_predictor(), new_predictor)
+        self.assertTrue(registry.is_trained)
+
+class TestMultiTimeframe(unittest.TestCase):
+    """Pruebas para los modelos por marco temporal."""
+    
+    def test_timeframe_models_are_selected(self):
+        """Cada marco temporal usa su propio modelo."""
+        predictor = FinancialPredictor(_multi_timeframe_data(), n_jobs=1)
+        self.assertEqual(sorted(predictor.timeframe_predictors), ["1y", "3m", "6m"])
+        self.assertNotIn("rendimiento_3m", predictor.feature_names)
+        for timeframe in ("3m", "6m", "1y"):
+            dedicated = predictor.timeframe_predictors[timeframe]
+            np.testing.assert_allclose(
+                predictor.predict_returns_batch(test_assets, timeframe),
+                dedicated.predict_returns_batch(test_assets, "1m")
+            )
+    
+    def test_without_targets_uses_factor(self):
+        """Sin objetivo propio se mantiene el factor por marco temporal."""
+        predictor = FinancialPredictor(_historical_data())
+        np.testing.assert_allclose(
+            predictor.predict_returns_batch(test_assets, "6m"),
+            predictor.predict_returns_batch(test_assets, "1m") * 4.5
+        )
+    
+    def test_parallel_training_matches_sequential(self):
+        """El entrenamiento en paralelo produce los mismos modelos."""
+        data = _multi_timeframe_data()
+        sequential = FinancialPredictor(data, n_jobs=1)
+        parallel = FinancialPredictor(data, n_jobs=2)
+        for timeframe in ("1m", "3m", "1y"):
+            np.testing.assert_allclose(
+                parallel.predict_returns_batch(test_assets, timeframe),
+                sequential.predict_returns_batch(test_assets, timeframe)
+            )
+    
+    def test_timeframe_models_roundtrip(self):
+        """Los modelos por marco temporal se guardan y cargan con el artefacto."""
+        predictor = FinancialPredictor(_multi_timeframe_data(), n_jobs=1)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            predictor.save(tmpdir)
+            loaded = FinancialPredictor.load(tmpdir)
+            np.testing.assert_allclose(
+                loaded.predict_returns_batch(test_assets, "1y"),
+                predictor.predict_returns_batch(test_assets, "1y")
+            )
+
+class TestIncrementalUpdate(unittest.TestCase):
+    """Pruebas para la actualización incremental del predictor."""
+    
+    def test_update_linear_matches_full_refit(self):
+        """La regresión lineal actualizada equivale a reentrenar con todo."""
+        history = _historical_data(200, seed=0)
+        new_rows = _historical_data(50, seed=1)
+        predictor = FinancialPredictor(history)
+        predictor.update(new_rows)
+        full = FinancialPredictor(pd.concat([history, new_rows], ignore_index=True))
+        
+        X = new_rows[predictor.feature_names].to_numpy()
+        np.testing.assert_allclose(
+            predictor.models["linear"].predict(predictor.scaler.transform(X)),
+            full.models["linear"].predict(full.scaler.transform(X)),
+            rtol=1e-6
+        )
+        np.testing.assert_allclose(predictor.scaler.mean_, full.scaler.mean_)
+    
+    def test_update_adds_trees_up_to_limit(self):
+        """Cada actualización añade árboles y el bosque no supera el límite."""
+        predictor = FinancialPredictor(_historical_data())
+        version = predictor.model_version
+        predictor.update(_historical_data(20, seed=2), trees_per_update=10, max_trees=105)
+        self.assertEqual(len(predictor.models["random_forest"].estimators_), 105)
+        self.assertNotEqual(predictor.model_version, version)
+        self.assertIsInstance(predictor.predict_return(test_assets[0]), float)
+    
+    def test_update_requires_trained_models(self):
+        """Actualizar un predictor sin entrenar es un error."""
+        with self.assertRaises(InvestmentError):
+            FinancialPredictor().update(_historical_data(10))
+
+class TestBackgroundRetraining(unittest.TestCase):
+    """Pruebas para el reentrenamiento en segundo plano."""
+    
+    def test_retrain_publishes_new_predictor(self):
+        """El reentrenamiento publica un predictor nuevo sin modificar el actual."""
+        registry = ModelRegistry(lambda: _historical_data(seed=3))
+        registry.swap(FinancialPredictor(_historical_data()))
+        previous = registry.get_predictor()
+        previous_version = previous.model_version
+        
+        published = registry.retrain_in_background().result(timeout=60)
+        self.assertIs(registry.get_predictor(), published)
+        self.assertIsNot(published, previous)
+        self.assertEqual(previous.model_version, previous_version)
+        
+        status = registry.status()
+        self.assertEqual(status["model_version"], published.model_version)
+        self.assertGreater(status["training_duration_s"], 0)
+        self.assertEqual(status["last_retrain"]["status"], "published")
+        registry.stop()
+    
+    def test_retrain_rejects_worse_candidate(self):
+        """Un candidato con peor error de validación no se publica."""
+        validation = _historical_data(100, seed=4)
+        noise = _historical_data(300, seed=5)
+        noise["rendimiento"] = np.random.default_rng(6).normal(0, 20, len(noise))
+        registry = ModelRegistry()
+        current = FinancialPredictor(_historical_data(400, seed=7))
+        registry.swap(current)
+        
+        result = registry.retrain_in_background(noise, validation).result(timeout=60)
+        self.assertIs(result, current)
+        self.assertIs(registry.get_predictor(), current)
+        self.assertEqual(registry.status()["last_retrain"]["status"], "rejected")
+        registry.stop()
+
+class TestModelArtifacts(unittest.TestCase):
+    """Pruebas para los artefactos de modelos en disco."""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, "modelos")
+    
+    def test_save_and_load_roundtrip(self):
+        """Un artefacto cargado predice igual que el predictor original."""
+        predictor = FinancialPredictor(_historical_data())
+        metadata = predictor.save(self.path)
+        loaded = FinancialPredictor.load(self.path)
+        self.assertEqual(loaded.model_version, metadata["model_version"])
+        np.testing.assert_allclose(
+            loaded.predict_returns_batch(test_assets),
+            predictor.predict_returns_batch(test_assets)
+        )
+    
+    def test_load_rejects_other_schema(self):
+        """Un artefacto con otro esquema de características se rechaza."""
+        data = _historical_data().rename(columns={"precio": "price"})
+        FinancialPredictor(data).save(self.path)
+        with self.assertRaises(ConfigurationError):
+            FinancialPredictor.load(self.path)
+    
+    def test_registry_loads_artifact(self):
+        """El registro carga el artefacto existente en lugar de entrenar."""
+        FinancialPredictor(_historical_data()).save(self.path)
+        def loader():
+            raise AssertionError("no debería entrenar")
+        registry = ModelRegistry(loader, model_dir=self.path)
+        registry.get_predictor()
+        self.assertTrue(registry.is_trained)
+
+class TestPredictionCache(unittest.TestCase):
+    """Pruebas para la caché de predicciones."""
+    
+    def test_lru_eviction(self):
+        """Se desaloja la entrada usada hace más tiempo."""
+        cache = PredictionCache(maxsize=2)
+        cache.set_many(["a", "b"], [1.0, 2.0])
+        cache.get_many(["a"])
+        cache.set_many(["c"], [3.0])
+        _, found = cache.get_many(["a", "b", "c"])
+        self.assertEqual(found.tolist(), [True, False, True])
+        self.assertEqual(cache.stats()["evictions"], 1)
+    
+    def test_ttl_expiry(self):
+        """Las entradas caducan pasado el TTL."""
+        now = [0.0]
+        cache = PredictionCache(ttl=10, clock=lambda: now[0])
+        cache.set_many(["a"], [1.0])
+        now[0] = 5.0
+        self.assertTrue(cache.get_many(["a"])[1][0])
+        now[0] = 11.0
+        self.assertFalse(cache.get_many(["a"])[1][0])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+    
+    def test_predictor_uses_cache(self):
+        """Las predicciones repetidas salen de la caché con el mismo valor."""
+        predictor = FinancialPredictor(_historical_data())
+        cache = PredictionCache()
+        first = predictor.predict_returns_batch(test_assets, cache=cache)
+        second = predictor.predict_returns_batch(test_assets, cache=cache)
+        np.testing.assert_array_equal(first, second)
+        np.testing.assert_allclose(first, predictor.predict_returns_batch(test_assets))
+        self.assertEqual(cache.hits, len(test_assets))
+        self.assertEqual(cache.misses, len(test_assets))
+        self.assertEqual(predictor.predict_return(test_assets[0], cache=cache), first[0])
+    
+    def test_swap_invalidates_cache(self):
+        """Publicar un predictor nuevo vacía la caché."""
+        registry = ModelRegistry(_historical_data)
+        registry.get_predictor().predict_returns_batch(test_assets, cache=registry.cache)
+        self.assertEqual(registry.cache.stats()["size"], len(test_assets))
+        registry.swap(FinancialPredictor(_historical_data(seed=1)))
+        self.assertEqual(registry.cache.stats()["size"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,24 @@
+"""
+test_asset_selector.py
+Pruebas para la selección de activos en streaming.
+"""
+
+import unittest
+
+from asset_universe import AssetUniverse
+from asset_selector import top_assets
+
+class TestStreamingPipeline(unittest.TestCase):
+    """Pruebas para el pipeline en streaming."""
+    
+    def test_top_assets_matches_full_sort(self):
+        """El heap acotado da los mismos k activos que ordenar todo el universo (con empates)."""
+        records = [{"nombre": f"A{i}", "probabilidad_ganancia": (i * 7 % 13) / 13} for i in range(300)]
+        expected = sorted(records, key=lambda a: a["probabilidad_ganancia"], reverse=True)[:20]
+        chunks = [records[i:i + 64] for i in range(0, len(records), 64)]
+        self.assertEqual(top_assets(iter(chunks), 20), expected)
+        universes = (AssetUniverse.from_records(chunk) for chunk in chunks)
+        self.assertEqual(top_assets(universes, 20), expected)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+test_asset_universe.py
+Pruebas para el universo de activos columnar.
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from asset_universe import AssetUniverse
+from asset_selector import select_all_assets, select_dividend_assets
+from diversify import build_portfolio
+from feature_encoder import FeatureEncoder
+from quote_server import simulated_quote
+
+class TestAssetUniverse(unittest.TestCase):
+    """Pruebas para el universo de activos columnar."""
+    
+    def setUp(self):
+        self.records = [simulated_quote(f"T{i:04d}") for i in range(500)]
+        del self.records[3]["riesgo"]
+        del self.records[7]["dividendos_mensuales"]
+        for i, record in enumerate(self.records):
+            record["probabilidad_ganancia"] = (i * 37 % 100) / 100 + 0.01
+        self.universe = AssetUniverse.from_records(self.records)
+    
+    def test_records_roundtrip(self):
+        """Los adaptadores conservan los activos, sin añadir claves ausentes."""
+        self.assertEqual(self.universe.to_records(), self.records)
+        self.assertIsInstance(self.universe.frame["sector"].dtype, pd.CategoricalDtype)
+    
+    def test_selection_matches_dict_pipeline(self):
+        """La selección por columnas coincide con la selección sobre dicts."""
+        for perfil, preferencias in [("bajo", {"sector": "salud"}), ("alto", {"tipo": "ETF"}),
+                                     ("moderado", None), ("bajo", {"sector": "inexistente"})]:
+            selected = select_all_assets(self.universe, perfil, preferencias)
+            self.assertEqual(selected.to_records(), select_all_assets(self.records, perfil, preferencias))
+        selected = select_dividend_assets(self.universe, {"riesgo": "bajo"})
+        self.assertEqual(selected.to_records(), select_dividend_assets(self.records, {"riesgo": "bajo"}))
+    
+    def test_portfolio_matches_dict_pipeline(self):
+        """La cartera construida por columnas es la misma que con dicts."""
+        top = self.universe.top("probabilidad_ganancia", 40)
+        expected = sorted(self.records, key=lambda a: a["probabilidad_ganancia"], reverse=True)[:40]
+        self.assertEqual(top.to_records(), expected)
+        self.assertEqual(build_portfolio(top, 10000), build_portfolio(expected, 10000))
+    
+    def test_encoder_uses_categorical_codes(self):
+        """El codificador da la misma matriz para el universo columnar y para los dicts."""
+        encoder = FeatureEncoder()
+        np.testing.assert_array_equal(encoder.transform(self.universe.frame), encoder.transform(self.records))
+
+if __name__ == "__main__":
+    unittest.main()
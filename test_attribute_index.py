@@ -0,0 +1,68 @@
+"""
+test_attribute_index.py
+Pruebas para el índice invertido de atributos.
+"""
+
+import unittest
+
+import numpy as np
+
+from asset_universe import AssetUniverse
+from attribute_index import AttributeIndex
+from asset_selector import select_all_assets, select_dividend_assets
+from market_generator import generate_assets
+from scraper import SnapshotCache
+
+class TestAttributeIndex(unittest.TestCase):
+    """Pruebas para el índice invertido de atributos."""
+    
+    def setUp(self):
+        self.records = generate_assets(3000, seed=5)
+        for record in self.records[::7]:
+            del record["riesgo"]
+        for record in self.records[::11]:
+            record["sector"] = None
+        self.universe = AssetUniverse.from_records(self.records)
+    
+    def test_bitmaps_match_column_scans(self):
+        """Cada bitmap (y su intersección) coincide con la comparación de columnas."""
+        index = AttributeIndex(self.universe.frame)
+        self.assertEqual(index.columns, ["sector", "tipo", "riesgo", "dividendos_mensuales"])
+        for name in index.columns:
+            values = self.universe.frame[name]
+            for value in values.dropna().unique():
+                np.testing.assert_array_equal(index.to_mask(index.bitmap(name, value)),
+                                              values.eq(value).to_numpy(dtype=bool, na_value=False))
+            np.testing.assert_array_equal(index.to_mask(index.bitmap(name, None)), values.isna().to_numpy())
+        bitmap = index.bitmap("sector", "salud") & index.bitmap("tipo", "acción")
+        expected = [r.get("sector") == "salud" and r["tipo"] == "acción" for r in self.records]
+        np.testing.assert_array_equal(index.to_mask(bitmap), expected)
+        self.assertFalse(index.to_mask(index.bitmap("sector", "inexistente")).any())
+    
+    def test_selection_matches_dict_pipeline(self):
+        """La selección con el índice coincide con los filtros sobre dicts."""
+        for perfil in ["bajo", "moderado", "alto"]:
+            for preferencias in [None, {"sector": "salud"}, {"sector": None}, {"tipo": "bono", "riesgo": "bajo"},
+                                 {"dividendos_mensuales": True}, {"sector": "energía", "nombre": "SYN0000004"}]:
+                selected = select_all_assets(self.universe, perfil, preferencias)
+                expected = select_all_assets(self.records, perfil, preferencias)
+                self.assertEqual(list(selected.column("nombre")), [a["nombre"] for a in expected])
+        for preferencias in [None, {"tipo": "REIT"}, {"riesgo": None}]:
+            selected = select_dividend_assets(self.universe, preferencias)
+            expected = select_dividend_assets(self.records, preferencias)
+            self.assertEqual(list(selected.column("nombre")), [a["nombre"] for a in expected])
+    
+    def test_index_built_once_per_snapshot(self):
+        """El índice se construye al cargar la instantánea y se reutiliza entre consultas."""
+        cache = SnapshotCache(lambda: self.records, ttl=60, name="prueba")
+        snapshot = cache.get()
+        index = snapshot.universe._index
+        self.assertIsNotNone(index)
+        scored = snapshot.universe.with_column("probabilidad_ganancia", np.zeros(len(self.records)))
+        self.assertIs(scored.index, index)
+        self.assertIsNot(scored.with_column("sector", None).index, index)
+        select_all_assets(snapshot.universe, "bajo", {"sector": "salud"})
+        self.assertIs(snapshot.universe.index, index)
+
+if __name__ == "__main__":
+    unittest.main()
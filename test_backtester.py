@@ -0,0 +1,39 @@
+"""
+test_backtester.py
+Pruebas para el backtest walk-forward.
+"""
+
+import unittest
+
+import numpy as np
+
+from backtester import WalkForwardBacktester
+from testing_data import _historical_data
+
+class TestBacktester(unittest.TestCase):
+    """Pruebas para el backtest walk-forward."""
+    
+    def test_windows(self):
+        """Las ventanas crecientes empiezan siempre en 0 y las móviles conservan su tamaño."""
+        periods = np.repeat(np.arange(10), 2)
+        expanding = WalkForwardBacktester(4, 3).windows(periods)
+        self.assertEqual([(len(train), len(test)) for train, test in expanding], [(8, 6), (14, 6)])
+        rolling = WalkForwardBacktester(4, 2, mode="rolling", gap=1).windows(periods)
+        self.assertEqual([periods[train].tolist()[::2] for train, _ in rolling],
+                         [[0, 1, 2, 3], [2, 3, 4, 5], [4, 5, 6, 7]])
+        self.assertEqual([periods[test].min() for _, test in rolling], [5, 7, 9])
+    
+    def test_run_scores_blends(self):
+        """El backtest puntúa todas las mezclas y expone la del predictor."""
+        data = _historical_data(300).assign(fecha=np.repeat(np.arange(30), 10))
+        report = WalkForwardBacktester(
+            10, 5, time_column="fecha", hyperparameters={"n_estimators": 10}, n_jobs=1
+        ).run(data)
+        self.assertEqual(len(report["windows"]), 4)
+        self.assertEqual(report["blend"], report["summary"]["0.3"])
+        self.assertEqual(set(report["summary"]["1"]), {"mae", "rmse", "hit_rate", "ic"})
+        # La mezcla debe mejorar la predicción constante más simple
+        self.assertLess(report["blend"]["mae"], np.abs(data["rendimiento"] - data["rendimiento"].mean()).mean())
+
+if __name__ == "__main__":
+    unittest.main()
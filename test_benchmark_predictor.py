@@ -0,0 +1,32 @@
+"""
+test_benchmark_predictor.py
+Pruebas para la comparación de benchmarks con la línea base.
+"""
+
+import unittest
+
+from benchmark_predictor import compare_with_baseline
+
+class TestBenchmarkBaseline(unittest.TestCase):
+    """Pruebas para la comparación de benchmarks con la línea base."""
+    
+    def test_compare_with_baseline(self):
+        """Se detectan las latencias que suben y los rendimientos que bajan."""
+        baseline = {
+            "environment": {"cpu_count": 8},
+            "latency": {"p50_us": 100.0, "p99_us": 200.0},
+            "throughput": {"100": {"seconds": 1.0, "assets_per_second": 1000}}
+        }
+        results = {
+            "environment": {"cpu_count": 1},
+            "latency": {"p50_us": 110.0, "p99_us": 300.0},
+            "throughput": {"100": {"seconds": 1.0, "assets_per_second": 500}}
+        }
+        regressions = compare_with_baseline(results, baseline, tolerance=0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith("latency.p99_us"))
+        self.assertTrue(regressions[1].startswith("throughput.100.assets_per_second"))
+        self.assertEqual(compare_with_baseline(baseline, baseline), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+"""
+test_compiled_forest.py
+Pruebas para el bosque compilado y el modo de precisión compacta.
+"""
+
+import unittest
+from unittest.mock import patch
+import tempfile
+
+import numpy as np
+
+from ai_predictor import FinancialPredictor
+from compiled_forest import CompiledForest
+from error_handling import InvestmentError
+from testing_data import test_assets, _historical_data
+
+class TestCompiledForest(unittest.TestCase):
+    """Pruebas para el modo de inferencia compilado."""
+    
+    def test_compiled_forest_matches_sklearn(self):
+        """El bosque compilado reproduce las predicciones de sklearn."""
+        predictor = FinancialPredictor(_historical_data())
+        forest = predictor.models["random_forest"]
+        X = np.random.default_rng(1).normal(size=(50, 5))
+        compiled = CompiledForest.from_sklearn(forest)
+        np.testing.assert_allclose(compiled.predict(X), forest.predict(X), rtol=1e-9)
+    
+    def test_large_batches_traverse_by_tree(self):
+        """Los lotes grandes se recorren árbol a árbol y por bloques con el mismo resultado."""
+        predictor = FinancialPredictor(_historical_data())
+        forest = predictor.models["random_forest"]
+        X = np.random.default_rng(2).normal(size=(1000, 5))
+        compiled = CompiledForest.from_sklearn(forest)
+        with patch("compiled_forest.CHUNK_ROWS", 300):
+            np.testing.assert_allclose(compiled.predict(X), forest.predict(X), rtol=1e-9)
+            np.testing.assert_array_equal(compiled.predict_trees(X)[:, :200], compiled.predict_trees(X[:200]))
+    
+    def test_compiled_predictor_matches_default(self):
+        """El predictor compilado coincide con el predictor por defecto."""
+        data = _historical_data()
+        default = FinancialPredictor(data)
+        compiled = FinancialPredictor(data, compiled=True)
+        for asset in test_assets:
+            self.assertAlmostEqual(
+                compiled.predict_return(asset), default.predict_return(asset), places=9
+            )
+    
+    def test_large_batches_use_sklearn(self):
+        """Solo los lotes pequeños usan el bosque compilado; los grandes, sklearn."""
+        data = _historical_data()
+        default = FinancialPredictor(data)
+        compiled = FinancialPredictor(data, compiled=True, compiled_max_batch=2)
+        assets = test_assets * 2
+        with patch.object(compiled.compiled_forest, "predict", wraps=compiled.compiled_forest.predict) as predict:
+            compiled.predict_return(assets[0])
+            self.assertEqual(predict.call_count, 1)
+            np.testing.assert_allclose(compiled.predict_returns_batch(assets),
+                                       default.predict_returns_batch(assets), rtol=1e-9)
+            self.assertEqual(predict.call_count, 1)
+    
+    def test_load_compiled_artifact_memory_mapped(self):
+        """El artefacto compilado se carga con arrays mapeados en memoria, sin el bosque de sklearn."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            predictor = FinancialPredictor(_historical_data())
+            predictor.save(tmpdir)
+            loaded = FinancialPredictor.load(tmpdir, compiled=True)
+            self.assertNotIn("random_forest", loaded.models)
+            for name in ("feature", "threshold", "children", "value", "roots", "depths"):
+                self.assertIsInstance(getattr(loaded.compiled_forest, name), np.memmap)
+            np.testing.assert_allclose(
+                loaded.predict_returns_batch(test_assets * 100),
+                predictor.predict_returns_batch(test_assets * 100)
+            )
+    
+    def test_save_loaded_compiled_predictor(self):
+        """Un predictor cargado sin el bosque de sklearn se guarda copiando su artefacto."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            FinancialPredictor(_historical_data()).save(f"{tmpdir}/a")
+            loaded = FinancialPredictor.load(f"{tmpdir}/a", compiled=True)
+            loaded.save(f"{tmpdir}/b")
+            copy = FinancialPredictor.load(f"{tmpdir}/b")
+            self.assertIn("random_forest", copy.models)
+            self.assertEqual(copy.model_version, loaded.model_version)
+            loaded.model_version = "otra"
+            with self.assertRaises(InvestmentError):
+                loaded.save(f"{tmpdir}/c")
+
+class TestCompactPrecision(unittest.TestCase):
+    """Pruebas para el modo de precisión compacta (float32)."""
+    
+    def test_rounded_thresholds_keep_decisions(self):
+        """Los umbrales float32 redondeados hacia abajo conservan todas las decisiones."""
+        forest = CompiledForest(
+            feature=np.array([0, 0, 0], dtype=np.int32), threshold=np.array([0.1, 0.0, 0.0]),
+            children=np.array([[2, 1], [1, 1], [2, 2]], dtype=np.int32),
+            value=np.array([0.0, -1.0, 1.0]), roots=np.array([0], dtype=np.int32),
+            depths=np.array([1], dtype=np.int32)
+        )
+        compact = forest.astype(np.float32)
+        self.assertLessEqual(float(compact.threshold[0]), 0.1)
+        X = np.array([[np.float32(0.1)], [np.nextafter(np.float32(0.1), np.float32(0))]])
+        np.testing.assert_array_equal(compact.predict(X), forest.predict(X))
+        self.assertLess(compact.nbytes, forest.nbytes)
+    
+    def test_compact_predictor(self):
+        """El predictor compacto usa float32 y apenas difiere del de float64."""
+        data = _historical_data()
+        compact = FinancialPredictor(data, compact=True)
+        self.assertTrue(compact.compiled)
+        self.assertEqual(compact._encode(test_assets).dtype, np.float32)
+        self.assertEqual(compact.compiled_forest.threshold.dtype, np.float32)
+        np.testing.assert_allclose(
+            compact.predict_returns_batch(test_assets),
+            FinancialPredictor(data).predict_returns_batch(test_assets),
+            atol=1e-5
+        )
+    
+    def test_compact_large_batches_use_compiled_forest(self):
+        """El modo compacto predice también los lotes grandes con el bosque compilado."""
+        compact = FinancialPredictor(_historical_data(), compact=True, compiled_max_batch=2)
+        with patch.object(compact.models["random_forest"], "predict") as sklearn_predict:
+            compact.predict_returns_batch(test_assets * 2)
+            sklearn_predict.assert_not_called()
+    
+    def test_load_compact_artifact(self):
+        """El artefacto compacto se carga desde la copia float32 mapeada, sin sklearn."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            data = _historical_data()
+            predictor = FinancialPredictor(data)
+            predictor.save(tmpdir)
+            compact = FinancialPredictor.load(tmpdir, compact=True)
+            self.assertNotIn("random_forest", compact.models)
+            self.assertIsInstance(compact.compiled_forest.threshold, np.memmap)
+            self.assertEqual(compact.compiled_forest.threshold.dtype, np.float32)
+            np.testing.assert_allclose(
+                compact.predict_returns_batch(test_assets * 100),
+                predictor.predict_returns_batch(test_assets * 100),
+                atol=1e-5
+            )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+"""
+test_feature_encoder.py
+Pruebas para el codificador de características.
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from feature_encoder import FeatureEncoder
+from testing_data import test_assets
+
+class TestFeatureEncoder(unittest.TestCase):
+    """Pruebas para el codificador de características."""
+    
+    assets = test_assets + [
+        {"nombre": "X", "sector": "ENERGÍA", "tipo": "ETF", "riesgo": "Alto", "precio": 12.5},
+        {"nombre": "Y", "sector": "desconocido", "tipo": "REIT", "volatilidad": 0.3},
+        {"nombre": "Z"},
+    ]
+    
+    def test_transform_matches_encode_one(self):
+        """La codificación por lotes coincide con la de un activo."""
+        encoder = FeatureEncoder()
+        matrix = encoder.transform(self.assets)
+        self.assertTrue(matrix.flags["C_CONTIGUOUS"])
+        for row, asset in zip(matrix, self.assets):
+            np.testing.assert_array_equal(row, encoder.encode_one(asset))
+    
+    def test_unknown_categories_use_defaults(self):
+        """Las categorías desconocidas y los valores ausentes usan los valores por defecto."""
+        encoder = FeatureEncoder()
+        self.assertEqual(encoder.encode_one(self.assets[3]), [5.0, 4.0, 3.0, 12.5, 0.1])
+        self.assertEqual(encoder.encode_one(self.assets[5]), [7.0, 6.0, 2.0, 50.0, 0.1])
+    
+    def test_transform_dataframe(self):
+        """Un DataFrame se codifica igual que la lista de activos."""
+        encoder = FeatureEncoder()
+        np.testing.assert_array_equal(
+            encoder.transform(pd.DataFrame(self.assets)),
+            encoder.transform(self.assets)
+        )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+"""
+test_hyperparameter_search.py
+Pruebas para la búsqueda de hiperparámetros.
+"""
+
+import unittest
+import os
+import tempfile
+
+import numpy as np
+
+from ai_predictor import FinancialPredictor
+from hyperparameter_search import HyperparameterSearch, make_linear_model
+from testing_data import _historical_data
+
+class TestHyperparameterSearch(unittest.TestCase):
+    """Pruebas para la búsqueda de hiperparámetros."""
+    
+    def test_successive_halving(self):
+        """Cada ronda reduce los candidatos y aumenta los árboles; el ganador se guarda con el modelo."""
+        search = HyperparameterSearch(n_candidates=5, n_splits=2, min_trees=4, max_trees=12, n_jobs=1)
+        predictor = FinancialPredictor(_historical_data(), search=search)
+        history = predictor.search_result["history"]
+        self.assertEqual([(r["candidates"], r["trees"]) for r in history], [(6, 4), (2, 12)])
+        self.assertEqual(predictor.hyperparameters["n_estimators"], 12)
+        self.assertEqual(len(predictor.models["random_forest"].estimators_), 12)
+        with tempfile.TemporaryDirectory() as tmp:
+            metadata = predictor.save(os.path.join(tmp, "modelo"))
+            loaded = FinancialPredictor.load(os.path.join(tmp, "modelo"))
+        self.assertEqual(metadata["hyperparameters"], predictor.hyperparameters)
+        self.assertEqual(loaded.search_result["cv_mae"], predictor.search_result["cv_mae"])
+    
+    def test_ridge_update_is_exact(self):
+        """La actualización incremental con Ridge equivale a reentrenar la parte lineal."""
+        data = _historical_data(300)
+        predictor = FinancialPredictor(data.iloc[:200], hyperparameters={"linear_alpha": 5.0})
+        predictor.update(data.iloc[200:])
+        X = data.drop(columns="rendimiento")
+        full = make_linear_model({"linear_alpha": 5.0}).fit(
+            (X - X.mean()) / X.std(ddof=0), data["rendimiento"]
+        )
+        np.testing.assert_allclose(predictor.models["linear"].coef_, full.coef_)
+        np.testing.assert_allclose(predictor.models["linear"].intercept_, full.intercept_)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,16 @@
 import pytest
+from unittest.mock import patch
+import main
 from main import (
     gestionar_inversion_dividendos_mensuales,
     autoinversion_ia_global,
     puente_autoinversion_a_dividendos
 )
 from validation import validate_investment_params, validate_autoinversion_params
+from asset_universe import AssetUniverse
+from asset_selector import select_all_assets
+from scraper import MarketDataIngestor, HTTPQuoteSource
+from quote_server import QuoteServer
 
 def test_gestionar_inversion_dividendos_mensuales():
     # Test con parámetros normales
@@ -79,4 +85,22 @@ def test_validacion_parametros():
     
     invalid, error = validate_autoinversion_params("extremo", 10, 2)
     assert invalid is False
-    assert "perfil" in error.lower()
\ No newline at end of file
+    assert "perfil" in error.lower()
+
+def test_streaming_autoinversion_matches_full():
+    """La selección en streaming coincide con la del universo completo."""
+    def probabilidades(activos, perfil_riesgo, preferencias):
+        return (activos.column("rendimiento_simulado") + 8) / 30
+    
+    with QuoteServer(n_tickers=3000) as server:
+        ingestor = MarketDataIngestor([HTTPQuoteSource("local", server.url, batch_size=250)])
+        try:
+            with patch("scraper.market_data_ingestor", ingestor), \
+                    patch("main.calcular_probabilidades_ganancia", side_effect=probabilidades):
+                streamed = main._activos_top_streaming("bajo", {"tipo": "bono"}, k=5, chunk_size=1000)
+                universe = AssetUniverse.from_records(ingestor.fetch())
+        finally:
+            ingestor.close()
+    universe = universe.with_column("probabilidad_ganancia", probabilidades(universe, "bajo", None))
+    expected = select_all_assets(universe, "bajo", {"tipo": "bono"}).top("probabilidad_ganancia", 5)
+    assert streamed == expected.to_records()
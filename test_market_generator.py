@@ -0,0 +1,40 @@
+"""
+test_market_generator.py
+Pruebas para el generador de mercados sintéticos.
+"""
+
+import unittest
+
+import numpy as np
+
+from asset_universe import AssetUniverse
+from market_generator import generate_assets, generate_universe, generate_price_history
+
+class TestMarketGenerator(unittest.TestCase):
+    """Pruebas para el generador de mercados sintéticos."""
+    
+    def test_schema_and_seed(self):
+        """Los activos tienen el esquema del proyecto y la misma semilla da el mismo mercado."""
+        assets = generate_assets(2000, seed=3)
+        self.assertEqual(assets, generate_assets(2000, seed=3))
+        self.assertNotEqual(assets, generate_assets(2000, seed=4))
+        self.assertTrue({"nombre", "sector", "tipo", "riesgo", "rendimiento_simulado",
+                         "dividendos_mensuales"} <= set(assets[0]))
+        self.assertEqual(len({asset["nombre"] for asset in assets}), 2000)
+        self.assertEqual({asset["riesgo"] for asset in assets}, {"bajo", "moderado", "alto"})
+        self.assertIsInstance(assets[0]["dividendos_mensuales"], bool)
+        self.assertEqual(AssetUniverse.from_records(assets).to_records(), generate_universe(2000, seed=3).to_records())
+    
+    def test_correlated_price_history(self):
+        """Los activos del mismo sector están más correlacionados y el último precio es el actual."""
+        universe = generate_universe(300, seed=1)
+        prices = generate_price_history(universe, n_days=500, seed=2)
+        np.testing.assert_allclose(prices[:, -1], universe.frame["precio"], rtol=1e-5)
+        correlation = np.corrcoef(np.diff(np.log(prices.astype(float)), axis=1))
+        sector = universe.frame["sector"].cat.codes.to_numpy()
+        same = (sector[:, None] == sector[None, :]) & ~np.eye(len(sector), dtype=bool)
+        other = sector[:, None] != sector[None, :]
+        self.assertGreater(correlation[same].mean(), correlation[other].mean() + 0.1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+test_monte_carlo.py
+Pruebas para la simulación Monte Carlo de retornos.
+"""
+
+import unittest
+
+import numpy as np
+
+from ai_predictor import FinancialPredictor, calcular_probabilidad_ganancia, calcular_probabilidades_ganancia
+from monte_carlo import MonteCarloSimulator
+from testing_data import test_assets, _historical_data
+
+class TestMonteCarlo(unittest.TestCase):
+    """Pruebas para la simulación Monte Carlo de retornos."""
+    
+    def test_simulation_summary(self):
+        """El resumen de la simulación se ajusta a la distribución teórica."""
+        simulator = MonteCarloSimulator(n_paths=20000, seed=3)
+        result = simulator.simulate(np.array([1.0, -2.0, 0.0]), np.array([1.0, 2.0, 0.5]))
+        np.testing.assert_allclose(result["expected_return"], [1.0, -2.0, 0.0], atol=0.05)
+        np.testing.assert_allclose(result["probability_gain"], [0.8413, 0.1587, 0.5], atol=0.02)
+        self.assertEqual(result["quantiles"].shape, (3, 3))
+        self.assertTrue(np.all(np.diff(result["quantiles"], axis=1) > 0))
+    
+    def test_simulation_is_seeded(self):
+        """Con la misma semilla se obtiene el mismo resultado, también por bloques."""
+        means, stds = np.linspace(-1, 1, 50), np.full(50, 0.5)
+        first = MonteCarloSimulator(n_paths=1000, seed=5).simulate(means, stds)
+        second = MonteCarloSimulator(n_paths=1000, seed=5).simulate(means, stds)
+        np.testing.assert_array_equal(first["probability_gain"], second["probability_gain"])
+        blocked = MonteCarloSimulator(n_paths=1000, seed=5, max_block_size=7000).simulate(means, stds)
+        self.assertEqual(blocked["probability_gain"].shape, (50,))
+    
+    def test_basic_simulation_factors(self):
+        """La simulación básica vectorizada conserva los factores por sector, tipo y riesgo."""
+        predictor = FinancialPredictor(seed=1)
+        assets = [
+            {"sector": "tecnología", "tipo": "acción", "riesgo": "moderado"},
+            {"sector": "cripto", "tipo": "criptomoneda", "riesgo": "alto"},
+            {"sector": "Salud", "tipo": "Bono", "riesgo": "bajo"},
+        ]
+        np.testing.assert_allclose(predictor._basic_return_means(assets), [1.5, 1.12, 0.7])
+        means, stds = predictor.predict_return_distribution(assets, "3m")
+        np.testing.assert_allclose(means, [3.75, 2.8, 1.75])
+        np.testing.assert_allclose(stds, 0.5)
+        self.assertEqual(
+            FinancialPredictor(seed=2).predict_returns_batch(assets).tolist(),
+            FinancialPredictor(seed=2).predict_returns_batch(assets).tolist()
+        )
+    
+    def test_trained_distribution(self):
+        """Con modelos entrenados la media es la predicción y la dispersión es positiva."""
+        predictor = FinancialPredictor(_historical_data())
+        means, stds = predictor.predict_return_distribution(test_assets)
+        np.testing.assert_allclose(means, predictor.predict_returns_batch(test_assets))
+        self.assertTrue(np.all(stds >= 0))
+        compiled = FinancialPredictor(_historical_data(), compiled=True)
+        np.testing.assert_allclose(compiled.predict_return_distribution(test_assets)[1], stds)
+    
+    def test_probabilidades_montecarlo(self):
+        """Las probabilidades por Monte Carlo están entre 0 y 1."""
+        probabilities = calcular_probabilidades_ganancia(test_assets, "bajo", metodo="montecarlo")
+        self.assertEqual(len(probabilities), len(test_assets))
+        self.assertTrue(all(0.0 <= p <= 1.0 for p in probabilities))
+        probability = calcular_probabilidad_ganancia(test_assets[0], metodo="montecarlo")
+        self.assertGreaterEqual(probability, 0.0)
+        self.assertLessEqual(probability, 1.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,36 +9,13 @@ import json
 
 from diversify import build_portfolio
 from main import gestionar_inversion_dividendos_mensuales
-from ai_predictor import FinancialPredictor, calcular_probabilidad_ganancia
+from ai_predictor import (
+    FinancialPredictor,
+    calcular_probabilidad_ganancia,
+    calcular_probabilidades_ganancia
+)
 from validation import validate_investment_params
-
-# Datos para pruebas
-test_assets = [
-    {
-        "nombre": "AAPL", 
-        "sector": "tecnología", 
-        "tipo": "acción", 
-        "rendimiento_simulado": 7.5,
-        "probabilidad_ganancia": 0.8,
-        "riesgo": "moderado"
-    },
-    {
-        "nombre": "MSFT", 
-        "sector": "tecnología", 
-        "tipo": "acción", 
-        "rendimiento_simulado": 6.2,
-        "probabilidad_ganancia": 0.75,
-        "riesgo": "bajo"
-    },
-    {
-        "nombre": "AMZN", 
-        "sector": "consumo", 
-        "tipo": "acción", 
-        "rendimiento_simulado": 8.1,
-        "probabilidad_ganancia": 0.65,
-        "riesgo": "alto"
-    }
-]
+from testing_data import test_assets, _historical_data
 
 class TestDiversify(unittest.TestCase):
     """Pruebas para el módulo de diversificación."""
@@ -85,7 +62,28 @@ class TestAiPredictor(unittest.TestCase):
         asset = test_assets[0]
         result = predictor.predict_return(asset, "1m")
         self.assertIsInstance(result, float)
-        
+    
+    def test_predict_returns_batch_matches_single(self):
+        """El cálculo por lotes coincide con la predicción activo a activo."""
+        predictor = FinancialPredictor(_historical_data())
+        batch = predictor.predict_returns_batch(test_assets, "3m")
+        self.assertEqual(batch.shape, (len(test_assets),))
+        for asset, value in zip(test_assets, batch):
+            self.assertAlmostEqual(predictor.predict_return(asset, "3m"), value, places=9)
+    
+    def test_predict_returns_batch_empty(self):
+        """Una lista vacía devuelve un array vacío."""
+        predictor = FinancialPredictor(_historical_data())
+        self.assertEqual(len(predictor.predict_returns_batch([])), 0)
+    
+    def test_calcular_probabilidades_ganancia(self):
+        """Prueba el cálculo de probabilidades por lotes."""
+        probabilities = calcular_probabilidades_ganancia(test_assets, "alto")
+        self.assertEqual(len(probabilities), len(test_assets))
+        for probability in probabilities:
+            self.assertGreaterEqual(probability, 0.0)
+            self.assertLessEqual(probability, 1.0)
+
 class TestValidation(unittest.TestCase):
     """Pruebas para el sistema de validación."""
     
@@ -135,4 +133,4 @@ def test_gestionar_inversion_dividendos_mensuales(mock_select, mock_fetch):
     mock_select.assert_called_once()
 
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+test_preference_query.py
+Pruebas para el motor de consultas de preferencias.
+"""
+
+import unittest
+
+import numpy as np
+
+from asset_universe import AssetUniverse
+from asset_selector import select_all_assets, select_dividend_assets
+from error_handling import ValidationError
+from market_generator import generate_assets
+from preference_query import compile_preferences
+from validation import validate_investment_params
+
+class TestPreferenceQuery(unittest.TestCase):
+    """Pruebas para el motor de consultas de preferencias."""
+    
+    def setUp(self):
+        self.records = generate_assets(3000, seed=9)
+        for record in self.records[::7]:
+            del record["riesgo"]
+        for record in self.records[::13]:
+            del record["precio"]
+        self.universe = AssetUniverse.from_records(self.records)
+    
+    def test_vectorized_query_matches_dict_semantics(self):
+        """La consulta vectorizada selecciona lo mismo que sobre dicts."""
+        casos = [
+            {"precio": {"<": 30}},
+            {"volatilidad": {"between": [0.1, 0.3]}, "tipo": {"in": ["ETF", "fondo"]}},
+            {"precio": {">=": 10, "<": 50}, "sector": {"not_in": ["cripto", "salud"]}},
+            {"riesgo": {"!=": "alto"}, "dividendos_mensuales": True},
+            {"precio": {"not": {"between": [10, 20]}}, "riesgo": {"not": None}},
+            {"sector": "salud", "tipo": "bono", "nombre": {">": "SYN0001500"}},
+            {"inexistente": {"<": 3}},
+            {"precio": {"<": "texto"}},
+        ]
+        for preferencias in casos:
+            query = compile_preferences(preferencias)
+            np.testing.assert_array_equal(query.mask(self.universe),
+                                          [query.matches(a) for a in self.records], str(preferencias))
+            for perfil in ["bajo", "alto"]:
+                selected = select_all_assets(self.universe, perfil, preferencias)
+                expected = select_all_assets(self.records, perfil, preferencias)
+                self.assertEqual(list(selected.column("nombre")), [a["nombre"] for a in expected])
+            selected = select_dividend_assets(self.universe, preferencias)
+            self.assertEqual(list(selected.column("nombre")), [a["nombre"] for a in select_dividend_assets(self.records, preferencias)])
+    
+    def test_planner_applies_most_selective_first(self):
+        """El planificador ordena los predicados de más a menos selectivo."""
+        query = compile_preferences({"sector": {"not_in": ["cripto"]}, "precio": {"<": 4},
+                                     "volatilidad": {"<": 1.0}})
+        plan = query.plan(self.universe)
+        selectividades = [selectividad for selectividad, _ in plan]
+        self.assertEqual(selectividades, sorted(selectividades))
+        self.assertEqual(plan[0][1].column, "precio")
+        # Con pocos candidatos el resto se evalúa solo en sus filas: mismo resultado
+        np.testing.assert_array_equal(query.mask(self.universe), [query.matches(a) for a in self.records])
+    
+    def test_preferences_compiled_once(self):
+        """Las preferencias repetidas reutilizan la consulta compilada."""
+        query = compile_preferences({"precio": {"<": 30}, "tipo": {"in": ["ETF"]}})
+        self.assertIs(compile_preferences({"tipo": {"in": ["ETF"]}, "precio": {"<": 30}}), query)
+        self.assertEqual(len(compile_preferences(None)), 0)
+    
+    def test_invalid_preferences_rejected(self):
+        """Las condiciones mal formadas dan error de validación."""
+        for preferencias in [{"precio": {"~": 3}}, {"precio": {"between": [1]}}, {"tipo": {"in": "ETF"}},
+                             {"precio": {"<": None}}, {"precio": {}}]:
+            with self.assertRaises(ValidationError):
+                compile_preferences(preferencias)
+            valid, error = validate_investment_params(10000, "EUR", preferencias)
+            self.assertFalse(valid)
+            self.assertTrue(error)
+
+if __name__ == "__main__":
+    unittest.main()
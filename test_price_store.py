@@ -0,0 +1,67 @@
+"""
+test_price_store.py
+Pruebas para el almacén de precios con memoria mapeada.
+"""
+
+import unittest
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from error_handling import ValidationError
+from price_store import PriceStore
+from technical_indicators import indicator_training_frame
+from testing_data import _price_history
+
+class TestPriceStore(unittest.TestCase):
+    """Pruebas para el almacén de precios con memoria mapeada."""
+    
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.tickers = [f"T{i:03d}" for i in range(20)]
+        self.dates = pd.bdate_range("2023-01-02", periods=120)
+        self.close = _price_history(assets=20, days=120).T
+    
+    def test_append_and_range_reads(self):
+        """Los appends diarios y por bloques se leen por rango sin copiar el fichero."""
+        store = PriceStore.create(self.path, self.tickers, dtype="float64")
+        store.append_many(self.dates[:100], {"close": self.close[:100]})
+        for date, row in zip(self.dates[100:], self.close[100:]):
+            store.append(date, {"close": row, "volume": {"T003": 1000}})
+        
+        store = PriceStore(self.path)
+        self.assertEqual(store.n_days, 120)
+        window = store.read("close", start=self.dates[10], end=self.dates[29])
+        np.testing.assert_array_equal(window, self.close[10:30].T)
+        self.assertTrue(np.shares_memory(window, store._map("close")))
+        subset = store.read("close", tickers=["T002", "T004", "T006"], end=self.dates[4])
+        np.testing.assert_array_equal(subset, self.close[:5, [2, 4, 6]].T)
+        self.assertTrue(np.shares_memory(subset, store._map("close")))
+        
+        history = store.history("T003", start=self.dates[-2])
+        self.assertEqual(history["volume"].tolist(), [1000, 1000])
+        self.assertTrue(history["open"].isna().all())
+    
+    def test_rejects_out_of_order_dates(self):
+        """Las fechas deben ser crecientes y un append fallido no altera el almacén."""
+        store = PriceStore.create(self.path, self.tickers)
+        store.append(self.dates[5], {"close": self.close[5]})
+        with self.assertRaises(ValidationError):
+            store.append(self.dates[5], {"close": self.close[6]})
+        with self.assertRaises(ValidationError):
+            store.append_many(self.dates[6:8], {"close": self.close[6:7]})
+        self.assertEqual(PriceStore(self.path).n_days, 1)
+        store.append(self.dates[6], {"close": self.close[6]})
+        np.testing.assert_allclose(PriceStore(self.path).read("close")[:, -1], self.close[6], rtol=1e-6)
+    
+    def test_training_frame(self):
+        """Los datos de entrenamiento salen directamente de un rango del almacén."""
+        store = PriceStore.create(self.path, self.tickers, dtype="float64")
+        store.append_many(self.dates, {"close": self.close})
+        frame = store.training_frame(tickers=self.tickers[:5], step=10)
+        expected = indicator_training_frame(self.close[:, :5].T, step=10)
+        pd.testing.assert_frame_equal(frame, expected)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,327 @@
+"""
+test_scraper.py
+Pruebas para la ingesta de datos de mercado, las instantáneas en caché
+y sus deltas.
+"""
+
+import unittest
+from unittest.mock import patch
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+
+from asset_universe import AssetUniverse
+from error_handling import ExternalServiceError
+from scraper import MarketDataIngestor, HTTPQuoteSource, SnapshotCache, SimulatedSource, SyntheticSource
+from snapshot_scores import SnapshotScorer
+from quote_server import QuoteServer, simulated_quote
+import scraper
+
+class TestMarketDataIngestion(unittest.TestCase):
+    """Pruebas para la ingesta asíncrona de datos de mercado."""
+    
+    def test_loaders_use_configured_source(self):
+        """Las cargas y el streaming pasan siempre por las fuentes del ingestor."""
+        for source, n_assets in [(SimulatedSource(), 6), (SyntheticSource(50, chunk_size=20), 50)]:
+            ingestor = MarketDataIngestor([source])
+            try:
+                with patch.object(scraper, "market_data_ingestor", ingestor), \
+                        patch.object(type(source), "fetch", autospec=True, side_effect=type(source).fetch) as fetch:
+                    self.assertEqual(len(scraper._load_market_data()[0]), n_assets)
+                    self.assertEqual(fetch.call_count, 1)
+                    self.assertEqual(sum(len(chunk) for chunk in scraper.iter_market_universe(30)), n_assets)
+            finally:
+                ingestor.close()
+    
+    def test_simulated_market_and_dividend_lists(self):
+        """Con la fuente simulada, mercado y dividendos son las listas de la línea base."""
+        ingestor = MarketDataIngestor([SimulatedSource()])
+        try:
+            with patch.object(scraper, "market_data_ingestor", ingestor):
+                snapshot = SnapshotCache(scraper._load_market_data, ttl=60).get()
+        finally:
+            ingestor.close()
+        self.assertEqual([asset["nombre"] for asset in snapshot.assets],
+                         [asset["nombre"] for asset in scraper._simulated_market_assets()])
+        self.assertEqual([asset["nombre"] for asset in snapshot.dividends.assets],
+                         [asset["nombre"] for asset in scraper._simulated_dividend_assets()])
+        self.assertIn(False, [asset["dividendos_mensuales"] for asset in snapshot.dividends.assets])
+    
+    def test_concurrent_fetch(self):
+        """Los lotes de cotizaciones se descargan a la vez y llegan completos."""
+        with QuoteServer(n_tickers=2000, latency=0.01) as server:
+            ingestor = MarketDataIngestor([HTTPQuoteSource("local", server.url, batch_size=50)],
+                                          max_concurrency=8)
+            try:
+                assets = ingestor.fetch()
+            finally:
+                ingestor.close()
+        self.assertEqual(sorted(asset["nombre"] for asset in assets), server.tickers)
+        self.assertEqual(assets[0], simulated_quote(assets[0]["nombre"]))
+        self.assertEqual(server.requests, 40)
+        self.assertGreater(server.max_in_flight, 1)
+        self.assertLessEqual(server.max_in_flight, 8)
+    
+    def test_retries_transient_errors(self):
+        """Las respuestas 503 transitorias se reintentan con backoff."""
+        with QuoteServer(n_tickers=100, failures=2) as server:
+            ingestor = MarketDataIngestor([HTTPQuoteSource("local", server.url)], backoff_base=0.01)
+            try:
+                assets = ingestor.fetch()
+            finally:
+                ingestor.close()
+        self.assertEqual(len(assets), 100)
+        self.assertEqual(server.requests, 3)
+    
+    def test_slow_source_times_out(self):
+        """Una fuente que no responde a tiempo se descarta sin detener al resto."""
+        with QuoteServer(n_tickers=10) as fast, QuoteServer(n_tickers=10, latency=0.5) as slow:
+            ingestor = MarketDataIngestor([
+                HTTPQuoteSource("rápida", fast.url),
+                HTTPQuoteSource("lenta", slow.url, tickers=slow.tickers, timeout=0.05)
+            ], retries=1, backoff_base=0.01)
+            try:
+                self.assertEqual(len(ingestor.fetch()), 10)
+                ingestor.sources = ingestor.sources[1:]
+                with self.assertRaises(ExternalServiceError):
+                    ingestor.fetch()
+            finally:
+                ingestor.close()    
+    def test_chunks_are_bounded(self):
+        """La ingesta en streaming limita las peticiones en curso y conserva el orden."""
+        with QuoteServer(n_tickers=1000, latency=0.005) as server:
+            ingestor = MarketDataIngestor([HTTPQuoteSource("local", server.url, batch_size=50)])
+            try:
+                chunks = list(ingestor.iter_chunks(max_pending=3))
+            finally:
+                ingestor.close()
+        self.assertEqual(len(chunks), 20)
+        self.assertEqual([asset["nombre"] for chunk in chunks for asset in chunk], server.tickers)
+        self.assertLessEqual(server.max_in_flight, 3)    
+    def test_synthetic_source_streams_same_market(self):
+        """La fuente sintética da el mismo mercado completo y en streaming."""
+        ingestor = MarketDataIngestor([SyntheticSource(2500, seed=5, chunk_size=1000)])
+        try:
+            full = ingestor.fetch()
+            chunks = list(ingestor.iter_chunks())
+        finally:
+            ingestor.close()
+        self.assertEqual([len(chunk) for chunk in chunks], [1000, 1000, 500])
+        self.assertEqual([asset for chunk in chunks for asset in chunk], full)    
+    def test_streaming_bounds_assets_in_flight(self):
+        """La ingesta en streaming no genera más activos que el límite por delante del consumidor."""
+        generated = []
+        
+        class CountingSource(SyntheticSource):
+            async def _chunk(self, k):
+                generated.append(k)
+                return await super()._chunk(k)
+        
+        ingestor = MarketDataIngestor([CountingSource(2000, chunk_size=100)])
+        try:
+            consumed = 0
+            for chunk in ingestor.iter_chunks(max_pending_assets=250):
+                consumed += 1
+                # El bloque que se está consumiendo más los que hay en curso
+                self.assertLessEqual((len(generated) - consumed) * 100, 250)
+                time.sleep(0.002)
+        finally:
+            ingestor.close()
+        self.assertEqual(consumed, 20)
+        self.assertEqual(len(generated), 20)
+
+class TestSnapshotCache(unittest.TestCase):
+    """Pruebas para la caché de instantáneas de datos de mercado."""
+    
+    def setUp(self):
+        self.now = 0.0
+        self.calls = 0
+        self.release = threading.Event()
+        self.data = [{"nombre": "A", "rendimiento_simulado": 1.0}]
+    
+    def _loader(self):
+        self.calls += 1
+        self.release.wait(5)
+        return [dict(asset) for asset in self.data]
+    
+    def test_concurrent_loads_collapse(self):
+        """Las peticiones simultáneas sin instantánea comparten una sola descarga."""
+        cache = SnapshotCache(self._loader, ttl=10, clock=lambda: self.now)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            futures = [executor.submit(cache.get) for _ in range(8)]
+            time.sleep(0.05)
+            self.release.set()
+            versions = {future.result().version for future in futures}
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len(versions), 1)
+    
+    def test_stale_while_revalidate(self):
+        """Una instantánea caducada se sirve mientras se recarga en segundo plano."""
+        self.release.set()
+        cache = SnapshotCache(self._loader, ttl=10, clock=lambda: self.now)
+        first = cache.get()
+        self.now = 5.0
+        self.assertIs(cache.get(), first)
+        self.assertEqual(self.calls, 1)
+        
+        self.release.clear()
+        self.data = [{"nombre": "A", "rendimiento_simulado": 2.0}]
+        self.now = 20.0
+        self.assertIs(cache.get(), first)
+        self.assertIs(cache.get(), first)
+        self.release.set()
+        second = cache.prefetch().result()
+        self.assertEqual(self.calls, 2)
+        self.assertNotEqual(second.version, first.version)
+        self.assertIs(cache.get(), second)
+    
+    def test_failed_refresh_keeps_snapshot(self):
+        """Si la recarga falla se sigue sirviendo la instantánea anterior."""
+        self.release.set()
+        cache = SnapshotCache(self._loader, ttl=10, clock=lambda: self.now)
+        first = cache.get()
+        self.data = None
+        self.now = 20.0
+        with self.assertRaises(TypeError):
+            cache.prefetch().result()
+        # Los mismos datos producen la misma versión
+        self.data = [{"nombre": "A", "rendimiento_simulado": 1.0}]
+        self.assertIs(cache.get(), first)
+        self.assertEqual(cache.prefetch().result().version, first.version)
+
+    def test_failed_preparation_releases_refresh(self):
+        """Un error al preparar la instantánea se entrega y no bloquea recargas posteriores."""
+        self.release.set()
+        cache = SnapshotCache(self._loader, ttl=10, clock=lambda: self.now)
+        self.data = [{"nombre": "a", "sector": {"x": 1}}]
+        with self.assertRaises(TypeError):
+            cache.prefetch().result(timeout=5)
+        with self.assertRaises(TypeError):
+            cache.get()
+        self.data = [{"nombre": "A", "rendimiento_simulado": 1.0}]
+        self.assertEqual(cache.get().assets[0]["nombre"], "A")
+        self.assertEqual(self.calls, 3)
+
+    def test_dividend_view_reuses_market_download(self):
+        """La vista de dividendos se filtra de la instantánea de mercado, sin otra descarga."""
+        self.release.set()
+        self.data = [{"nombre": "A", "rendimiento_simulado": 1.0, "dividendos_mensuales": True},
+                     {"nombre": "B", "rendimiento_simulado": 2.0}]
+        cache = SnapshotCache(self._loader, ttl=10, clock=lambda: self.now)
+        snapshot = cache.get()
+        self.assertEqual([asset["nombre"] for asset in snapshot.dividends.assets], ["A"])
+        self.assertIs(snapshot.dividends, snapshot.dividends)
+        self.assertEqual(len(snapshot.dividends.universe), 1)
+        self.assertEqual(self.calls, 1)
+
+class TestSnapshotDeltas(unittest.TestCase):
+    """Pruebas para los deltas de instantáneas y las puntuaciones incrementales."""
+    
+    def setUp(self):
+        self.data = [simulated_quote(f"T{i:04d}") for i in range(1000)]
+        self.cache = SnapshotCache(lambda: [dict(asset) for asset in self.data], ttl=0)
+        self.scored = []
+    
+    def _score(self, universe, perfil):
+        self.scored.append(len(universe))
+        factor = 2.0 if perfil == "alto" else 1.0
+        return universe.column("precio").astype(float) * factor
+    
+    def _refresh(self):
+        return self.cache.prefetch().result()
+    
+    def test_delta_lists_changes(self):
+        """El delta recoge los activos añadidos, retirados y modificados con sus campos."""
+        first = self._refresh()
+        self.data[3]["precio"] += 1
+        self.data[8]["rendimiento_simulado"] += 1
+        del self.data[5]
+        self.data.append(simulated_quote("NUEVO"))
+        second = self._refresh()
+        delta = second.delta
+        self.assertEqual((delta.from_version, delta.to_version), (first.version, second.version))
+        self.assertEqual(delta.added, ["NUEVO"])
+        self.assertEqual(delta.removed, ["T0005"])
+        self.assertEqual(delta.changed, {"T0003": ["precio"], "T0008": ["rendimiento_simulado"]})
+        self.assertEqual(delta.rows(["precio"]).tolist(), [3, 999])
+        self.assertEqual(delta.previous_index[5], 6)
+        # Sin cambios se conserva la misma instantánea
+        self.assertIs(self._refresh(), second)
+    
+    def test_delta_compares_columns(self):
+        """El delta columnar detecta categorías nuevas, claves retiradas y columnas nuevas."""
+        self._refresh()
+        self.data[1]["sector"] = "sector_nuevo"
+        del self.data[2]["riesgo"]
+        self.data[4]["nota"] = "revisado"
+        self.data[6]["dividendos_mensuales"] = not self.data[6]["dividendos_mensuales"]
+        delta = self._refresh().delta
+        self.assertEqual(delta.changed, {"T0001": ["sector"], "T0002": ["riesgo"],
+                                         "T0004": ["nota"], "T0006": ["dividendos_mensuales"]})
+        self.assertEqual(delta.rows(["riesgo", "nota"]).tolist(), [2, 4])
+        self.assertEqual(delta.summary()["changed"], 4)
+        self.assertEqual((delta.added, delta.removed), ([], []))
+    
+    def test_incremental_scores(self):
+        """Solo se vuelven a puntuar los activos con cambios relevantes."""
+        scorer = SnapshotScorer(self._score)
+        scorer.scores(self._refresh(), "alto", "v1", ["precio"])
+        self.data[10]["precio"] = 1.0
+        self.data[20]["rendimiento_simulado"] = 0.0
+        del self.data[0]
+        self.data.append(simulated_quote("NUEVO"))
+        snapshot = self._refresh()
+        scores = scorer.scores(snapshot, "alto", "v1", ["precio"])
+        self.assertEqual(self.scored, [1000, 2])
+        np.testing.assert_array_equal(scores, [asset["precio"] * 2.0 for asset in self.data])
+        
+        scorer.scores(snapshot, "alto", "v1", ["precio"])
+        scorer.scores(snapshot, "alto", "v2", ["precio"])
+        self.assertEqual(self.scored[2:], [1000])
+        self.assertEqual((scorer.full_updates, scorer.incremental_updates), (2, 1))
+    
+    def test_scores_without_common_assets(self):
+        """Si la instantánea anterior estaba vacía o no comparte activos, se puntúa todo."""
+        scorer = SnapshotScorer(self._score)
+        empty = SimpleNamespace(version="v0", delta=None, universe=AssetUniverse.from_records([]))
+        self.assertEqual(len(scorer.scores(empty, "alto")), 0)
+        snapshot = self._refresh()
+        snapshot.delta = SimpleNamespace(from_version="v0", previous_index=np.full(1000, -1),
+                                         rows=lambda fields: np.arange(1000))
+        scores = scorer.scores(snapshot, "alto")
+        np.testing.assert_array_equal(scores, [asset["precio"] * 2.0 for asset in self.data])
+        self.data = [simulated_quote(f"N{i:04d}") for i in range(10)]
+        scorer.scores(self._refresh(), "alto")
+        self.assertEqual((scorer.full_updates, scorer.incremental_updates), (3, 0))
+    
+    def test_scoring_does_not_block_other_keys(self):
+        """Una puntuación lenta no bloquea las consultas de otras claves."""
+        started, release = threading.Event(), threading.Event()
+        
+        def slow_score(universe, perfil):
+            if perfil == "alto":
+                started.set()
+                release.wait(5)
+            return self._score(universe, perfil)
+        
+        scorer = SnapshotScorer(slow_score)
+        snapshot = self._refresh()
+        cached = scorer.scores(snapshot, "bajo")
+        self.data[0]["precio"] += 1
+        updated = self._refresh()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            slow = executor.submit(scorer.scores, snapshot, "alto")
+            self.assertTrue(started.wait(5))
+            try:
+                self.assertIs(executor.submit(scorer.scores, snapshot, "bajo").result(timeout=1), cached)
+                self.assertEqual(executor.submit(scorer.scores, updated, "bajo").result(timeout=1)[0],
+                                 self.data[0]["precio"])
+            finally:
+                release.set()
+            self.assertEqual(len(slow.result()), 1000)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+"""
+test_sharded_predictor.py
+Pruebas para la predicción por fragmentos en varios procesos.
+"""
+
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ai_predictor import FinancialPredictor, ModelRegistry
+from sharded_predictor import ShardedPredictor
+from testing_data import test_assets, _historical_data
+
+class TestShardedPredictor(unittest.TestCase):
+    """Pruebas para la predicción en memoria compartida."""
+    
+    def test_sharded_prediction(self):
+        """La predicción por fragmentos en memoria compartida coincide con la de un solo proceso."""
+        registry = ModelRegistry(_historical_data, prediction_workers=2)
+        registry._sharded.min_assets = 3
+        assets = test_assets * 5
+        try:
+            sharded = registry.predict_returns(assets)
+            self.assertIsNotNone(registry._sharded._executor)
+            np.testing.assert_allclose(sharded, registry.get_predictor().predict_returns_batch(assets))
+            # Un predictor nuevo reinicia los procesos con su versión
+            registry.swap(FinancialPredictor(_historical_data(seed=1)))
+            np.testing.assert_allclose(
+                registry.predict_returns(assets), registry.get_predictor().predict_returns_batch(assets)
+            )
+        finally:
+            registry.stop()
+        self.assertIsNone(registry._sharded._executor)
+    
+    def test_sharded_prediction_concurrent_close(self):
+        """Cerrar el pool mientras otras peticiones predicen no rompe ninguna."""
+        predictor = FinancialPredictor(_historical_data())
+        sharded = ShardedPredictor(n_workers=2, min_assets=3)
+        assets = test_assets * 5
+        expected = predictor.predict_returns_batch(assets)
+        try:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                futures = [executor.submit(sharded.predict, predictor, assets) for _ in range(4)]
+                executor.submit(sharded.close).result()
+                for future in futures:
+                    np.testing.assert_allclose(future.result(), expected)
+        finally:
+            sharded.close()
+        self.assertIsNone(sharded._executor)
+
+if __name__ == "__main__":
+    unittest.main()
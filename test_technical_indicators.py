@@ -0,0 +1,83 @@
+"""
+test_technical_indicators.py
+Pruebas para los indicadores técnicos vectorizados.
+"""
+
+import unittest
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from ai_predictor import FinancialPredictor, ModelRegistry
+from price_store import PriceStore
+from technical_indicators import (
+    INDICATOR_NAMES, compute_indicators, latest_indicators, indicator_training_frame
+)
+from testing_data import test_assets, _price_history
+
+class TestTechnicalIndicators(unittest.TestCase):
+    """Pruebas para los indicadores técnicos vectorizados."""
+    
+    def test_matches_pandas_rolling(self):
+        """Los indicadores coinciden con las ventanas móviles de pandas."""
+        prices = _price_history()
+        series = pd.Series(prices[3])
+        changes = series.diff()
+        gains = changes.clip(lower=0).rolling(14).sum()
+        losses = (-changes).clip(lower=0).rolling(14).sum()
+        expected = pd.DataFrame({
+            "media_movil_20": (series / series.rolling(20).mean() - 1) * 100,
+            "media_movil_50": (series / series.rolling(50).mean() - 1) * 100,
+            "volatilidad_realizada_20": np.log(series).diff().rolling(20).std() * np.sqrt(252),
+            "momento_20": series.pct_change(20) * 100,
+            "momento_60": series.pct_change(60) * 100,
+            "rsi_14": 100 * gains / (gains + losses)
+        })
+        at = [60, 61, 150, 299]
+        indicators = compute_indicators(prices, at)
+        self.assertEqual(indicators.shape, (len(INDICATOR_NAMES), 20, len(at)))
+        np.testing.assert_allclose(indicators[:, 3, :], expected[INDICATOR_NAMES].iloc[at].to_numpy().T)
+        np.testing.assert_allclose(latest_indicators(prices)[3], expected[INDICATOR_NAMES].iloc[-1])
+    
+    def test_short_history_uses_defaults(self):
+        """Sin historial suficiente se usan los valores neutros."""
+        indicators = latest_indicators(_price_history(days=30))
+        self.assertEqual(indicators[0, INDICATOR_NAMES.index("rsi_14")], 50.0)
+        with self.assertRaises(ValueError):
+            compute_indicators(_price_history(days=100), [10])
+    
+    def test_predictor_with_indicators(self):
+        """El predictor entrena con indicadores y los calcula desde el historial al predecir."""
+        prices = _price_history(assets=40)
+        data = indicator_training_frame(prices, test_assets * 13 + test_assets[:1])
+        self.assertEqual(list(data.columns[-7:]), INDICATOR_NAMES + ["rendimiento"])
+        predictor = FinancialPredictor(data)
+        predictions = predictor.predict_returns_batch(test_assets, price_history=prices[:3])
+        self.assertEqual(predictions.shape, (3,))
+        with tempfile.TemporaryDirectory() as tmp:
+            predictor.save(os.path.join(tmp, "modelo"))
+            loaded = FinancialPredictor.load(os.path.join(tmp, "modelo"))
+        np.testing.assert_allclose(
+            loaded.predict_returns_batch(test_assets, price_history=prices[:3]), predictions
+        )
+    
+    def test_registry_reads_price_store(self):
+        """El registro calcula los indicadores desde el almacén de precios, por nombre de activo."""
+        prices = _price_history(assets=40)
+        data = indicator_training_frame(prices, test_assets * 13 + test_assets[:1])
+        with tempfile.TemporaryDirectory() as tmp:
+            store = PriceStore.create(tmp, [asset["nombre"] for asset in test_assets], dtype="float64")
+            store.append_many(pd.bdate_range("2023-01-02", periods=prices.shape[1]), {"close": prices[:3].T})
+            registry = ModelRegistry(lambda: data, price_store=store)
+            predictor = registry.get_predictor()
+            np.testing.assert_allclose(
+                registry.predict_returns(test_assets),
+                predictor.predict_returns_batch(test_assets, price_history=prices[:3])
+            )
+            self.assertEqual(registry.price_history_version, prices.shape[1])
+            self.assertTrue(np.isnan(registry.price_history([{"nombre": "XYZ"}])).all())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+testing_data.py
+Datos sintéticos compartidos por las pruebas.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Datos para pruebas
+test_assets = [
+    {
+        "nombre": "AAPL", 
+        "sector": "tecnología", 
+        "tipo": "acción", 
+        "rendimiento_simulado": 7.5,
+        "probabilidad_ganancia": 0.8,
+        "riesgo": "moderado"
+    },
+    {
+        "nombre": "MSFT", 
+        "sector": "tecnología", 
+        "tipo": "acción", 
+        "rendimiento_simulado": 6.2,
+        "probabilidad_ganancia": 0.75,
+        "riesgo": "bajo"
+    },
+    {
+        "nombre": "AMZN", 
+        "sector": "consumo", 
+        "tipo": "acción", 
+        "rendimiento_simulado": 8.1,
+        "probabilidad_ganancia": 0.65,
+        "riesgo": "alto"
+    }
+]
+
+def _historical_data(rows=200, seed=0):
+    """Genera datos históricos sintéticos para entrenar el predictor."""
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({
+        "sector": rng.integers(1, 8, rows).astype(float),
+        "tipo": rng.integers(1, 7, rows).astype(float),
+        "riesgo": rng.integers(1, 4, rows).astype(float),
+        "precio": rng.uniform(10, 500, rows),
+        "volatilidad": rng.uniform(0.01, 0.5, rows),
+    })
+    data["rendimiento"] = (
+        data["riesgo"] * 2 + data["volatilidad"] * 10 - data["tipo"] * 0.5
+        + rng.normal(0, 0.5, rows)
+    )
+    return data
+
+def _multi_timeframe_data(rows=200, seed=0):
+    """Datos históricos con objetivos propios para 3 meses, 6 meses y 1 año."""
+    data = _historical_data(rows, seed)
+    rng = np.random.default_rng(seed + 100)
+    data["rendimiento_3m"] = data["rendimiento"] * 2 + rng.normal(0, 1, rows)
+    data["rendimiento_6m"] = -data["rendimiento"] + rng.normal(0, 1, rows)
+    data["rendimiento_1y"] = data["volatilidad"] * 50 + rng.normal(0, 1, rows)
+    return data
+
+def _price_history(assets=20, days=300, seed=0):
+    """Genera historiales de precios sintéticos (paseo aleatorio geométrico)."""
+    rng = np.random.default_rng(seed)
+    return 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, (assets, days)), axis=1))
@@ -2,6 +2,8 @@
 validation.py
 Funciones para validar entradas en las operaciones principales.
 """
+from error_handling import ValidationError
+from preference_query import compile_preferences
 
 def validate_investment_params(capital, moneda=None, preferencias=None):
     """
@@ -27,6 +29,12 @@ def validate_investment_params(capital, moneda=None, preferencias=None):
     if preferencias and not isinstance(preferencias, dict):
         return False, "Las preferencias deben ser un diccionario"
         
+    if preferencias:
+        try:
+            compile_preferences(preferencias)
+        except ValidationError as e:
+            return False, e.message
+        
     return True, ""
     
 def validate_autoinversion_params(perfil_riesgo, porcentaje_ganancia_reventa, tolerancia_perdida):